@@ -0,0 +1,260 @@
+# bench/scan_bench.py
+# ---------------------------------------------------------------------------
+#  掃描效能量測 (模擬儀器)
+#  ----------------------
+#  以 SimSerial + MotionService + LockInSim 跑真正的 ScanWorker.run()，
+#  把每一點的時間拆成：
+#
+#    move   ：goto() 開始 → 馬達實際到位 (SimSerial.last_arrival)
+#    ack    ：到位 → goto() 返回 (OK 延遲 + reader / 佇列 / 執行緒切換)
+#    query  ：lock-in read_xyz / read_xyz_block 本身
+#    settle ：其餘時間 (Settler / Dwell 的等待)
+#    emit   ：points.push (交給 GUI 的成本)
+#    render ：掃描結束後把同樣的點逐點餵給 LivePlotWidget.on_points (offscreen)
+#
+#  另報 points/s、點週期 jitter 分佈 (相對中位數)、tracemalloc 峰值記憶體。
+#  結果寫成 JSON，不同版本之間直接比對。
+#
+#  用法 (repo 根目錄)：
+#    python -m bench.scan_bench --points 20 50 --repeat 1 3 --out bench.json
+# ---------------------------------------------------------------------------
+
+import argparse
+import contextlib
+import json
+import os
+import pathlib
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+
+from drivers.motion import MotionService
+from drivers.motor import MotorArduino
+from drivers.sim import SimSerial, LockInSim
+from models.acquire import Dwell, Settler
+from models.mapper import Mapper
+from models.stream import PointBuffer
+from workers import ScanWorker
+
+HC_EV_NM = 1239.84193
+STAGES = ("move", "ack", "settle", "query", "emit")
+_app = None                                   # QApplication 需保持參照
+
+
+# ===========================================================================
+# 計時代理
+# ===========================================================================
+class _Clock:
+    """目前這一點各階段累計秒數"""
+
+    def __init__(self) -> None:
+        self.cur = dict.fromkeys(STAGES, 0.0)
+
+    def reset(self) -> None:
+        self.cur = dict.fromkeys(STAGES, 0.0)
+
+
+class TimedMotor:
+    def __init__(self, motor, ser: SimSerial, clk: _Clock) -> None:
+        self._m, self._ser, self._clk = motor, ser, clk
+
+    def goto(self, idx, backlash=None):
+        t0 = time.perf_counter()
+        self._m.goto(idx, backlash)
+        t1 = time.perf_counter()
+        arr = self._ser.last_arrival
+        arr = arr if t0 <= arr <= t1 else t1            # 沒動 (同一 idx) → 全算 move
+        self._clk.cur["move"] += arr - t0
+        self._clk.cur["ack"] += t1 - arr
+
+    def __getattr__(self, name):
+        return getattr(self._m, name)
+
+
+class TimedLockIn:
+    def __init__(self, lockin, clk: _Clock) -> None:
+        self._l, self._clk = lockin, clk
+
+    def read_xyz(self):
+        t0 = time.perf_counter()
+        r = self._l.read_xyz()
+        self._clk.cur["query"] += time.perf_counter() - t0
+        return r
+
+    def read_xyz_block(self, n, interval_s=0.0):
+        # 區塊內的 interval 等待屬於 settle / dwell，扣掉後才是查詢本身
+        t0 = time.perf_counter()
+        r = self._l.read_xyz_block(n, interval_s)
+        self._clk.cur["query"] += time.perf_counter() - t0 - max(n - 1, 0) * interval_s
+        return r
+
+    def __getattr__(self, name):
+        return getattr(self._l, name)
+
+
+class TimedBuffer(PointBuffer):
+    """push 即一點結束：記錄該點各階段與週期"""
+
+    def __init__(self, clk: _Clock) -> None:
+        super().__init__()
+        self._clk = clk
+        self.records = []
+        self._t_prev = time.perf_counter()
+
+    def push(self, item) -> None:
+        t0 = time.perf_counter()
+        super().push(item)
+        t1 = time.perf_counter()
+        rec = dict(self._clk.cur)
+        rec["emit"] += t1 - t0
+        rec["period"] = t1 - self._t_prev
+        rec["settle"] = max(rec["period"] - sum(rec[k] for k in ("move", "ack", "query", "emit")), 0.0)
+        self.records.append(rec)
+        self._t_prev = t1
+        self._clk.reset()
+
+
+# ===========================================================================
+# 量測
+# ===========================================================================
+def _summary(v) -> dict:
+    v = np.asarray(v, dtype=float) * 1e3
+    if v.size == 0:
+        return {}
+    p50, p95, p99 = np.percentile(v, [50, 95, 99])
+    return dict(mean=float(v.mean()), p50=float(p50), p95=float(p95), p99=float(p99),
+                max=float(v.max()))
+
+
+def _calibration(tmp: pathlib.Path) -> Mapper:
+    csv = tmp / "bench_cal.csv"
+    csv.write_text("idx,nm\n0,800\n900,950\n")
+    return Mapper(csv)
+
+
+def _render(items, ev_arr, repeat) -> list:
+    """把量到的點逐點餵給即時圖，回傳每點耗時 (s)"""
+    from PyQt5 import QtWidgets
+    from widgets.live_plot_widget import LivePlotWidget
+
+    global _app
+    _app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv[:1])
+    w = LivePlotWidget()
+    w.resize(900, 600); w.show()
+    w.reset_plot(); w.set_plan(ev_arr, repeat)
+    out, n_pts = [], len(ev_arr)
+    for k, it in enumerate(items):
+        if k and k % n_pts == 0:
+            w.start_new_run()
+        t0 = time.perf_counter()
+        w.on_points([it])
+        _app.processEvents()
+        out.append(time.perf_counter() - t0)
+    w.close()
+    return out
+
+
+def run_case(args, n_points: int, repeat: int, tmp: pathlib.Path) -> dict:
+    clk = _Clock()
+    ser = SimSerial(pulse_time=args.pulse_time, ack_latency=args.ack_latency,
+                    time_scale=args.time_scale, seed=0)
+    motor = MotorArduino(transport=ser)
+    motion = MotionService(motor)
+    mapper = _calibration(tmp)
+    lockin = LockInSim(mapper, ser.idx_now, query_s=args.query_ms / 1e3, seed=0)
+    lockin.set_param(time_const=args.tau, filter_slope=args.slope)
+
+    ev_arr = np.linspace(args.ev_start, args.ev_end, n_points)
+    idx_arr = np.rint(mapper.idx_from_nm(HC_EV_NM / ev_arr)).astype(int).tolist()
+    motion.goto(idx_arr[0])
+
+    tl = TimedLockIn(lockin, clk)
+    dwell = Dwell(tl, args.dwell_se) if args.dwell_se > 0 else None
+    worker = ScanWorker(tl, TimedMotor(motion, ser, clk), idx_arr, ev_arr, repeat, None,
+                        settler=Settler(tl), serpentine=args.serpentine, dwell=dwell)
+    worker.points = TimedBuffer(clk)
+
+    if args.mem:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    worker.run()                                   # 在本執行緒直接跑
+    wall = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1] if args.mem else None
+    if args.mem:
+        tracemalloc.stop()
+
+    motion.close(); motor.close()
+    recs = worker.points.records
+    items = worker.points.drain()
+    period = np.array([r["period"] for r in recs])
+    res = dict(points=n_points, repeat=repeat, n=len(recs), wall_s=wall,
+               points_per_s=len(recs) / wall if wall > 0 else 0.0,
+               stages_ms={k: _summary([r[k] for r in recs]) for k in STAGES},
+               period_ms=_summary(period),
+               jitter_ms=_summary(np.abs(period - np.median(period))) if period.size else {},
+               peak_mem_kib=peak / 1024 if peak is not None else None)
+    if args.render:
+        res["stages_ms"]["render"] = _summary(_render(items, ev_arr, repeat))
+    return res
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:  # noqa: broad-except
+        return "unknown"
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="ScanWorker 效能量測 (模擬儀器)")
+    ap.add_argument("--points", type=int, nargs="+", default=[20, 50])
+    ap.add_argument("--repeat", type=int, nargs="+", default=[1, 3])
+    ap.add_argument("--ev-start", type=float, default=1.35)
+    ap.add_argument("--ev-end", type=float, default=1.50)
+    ap.add_argument("--tau", default="10 ms", help="time_const，例如 '3 ms'")
+    ap.add_argument("--slope", default="12 dB/oct")
+    ap.add_argument("--dwell-se", type=float, default=0.0, help="> 0 啟用 Dwell")
+    ap.add_argument("--serpentine", action="store_true")
+    ap.add_argument("--pulse-time", type=float, default=0.003)
+    ap.add_argument("--ack-latency", type=float, default=0.002)
+    ap.add_argument("--query-ms", type=float, default=3.0)
+    ap.add_argument("--time-scale", type=float, default=1.0, help="馬達延遲倍率")
+    ap.add_argument("--no-render", dest="render", action="store_false")
+    ap.add_argument("--no-mem", dest="mem", action="store_false",
+                    help="不開 tracemalloc (它會拖慢配置密集的程式碼)")
+    ap.add_argument("--out", default="-", help="JSON 輸出檔，- = stdout")
+    args = ap.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.points:
+            for r in args.repeat:
+                with contextlib.redirect_stdout(sys.stderr):      # 驅動的 print 不混進 JSON
+                    res = run_case(args, n, r, pathlib.Path(tmp))
+                results.append(res)
+                print(f"[bench] {n:4d} pts × {r} : {res['points_per_s']:7.2f} pts/s  "
+                      f"period p50 {res['period_ms'].get('p50', 0):7.2f} ms  "
+                      f"jitter p95 {res['jitter_ms'].get('p95', 0):6.2f} ms", file=sys.stderr)
+
+    doc = dict(meta=dict(git=_git_rev(), python=platform.python_version(),
+                         platform=platform.platform(), time=time.strftime("%Y-%m-%dT%H:%M:%S"),
+                         args=vars(args)),
+               results=results)
+    text = json.dumps(doc, indent=2, ensure_ascii=False)
+    if args.out == "-":
+        print(text)
+    else:
+        pathlib.Path(args.out).write_text(text, encoding="utf8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+# drivers/aio.py
+# ---------------------------------------------------------------------------
+#  asyncio 儀器協調層
+#  ------------------
+#  驅動本身 (pyvisa / pyserial) 都是阻塞 I/O；這裡不改寫驅動，而是：
+#
+#    · 每台儀器一條專屬執行緒 (單工 executor)：同一台儀器的指令依序執行，
+#      不同儀器之間自然重疊 (GPIB 查詢、馬達移動、溫度計輪詢同時進行)
+#    · AsyncLockIn / AsyncMotor / AsyncDevice：await read_xyz()、goto()、
+#      set_param()…；MotionService 本身已有執行緒 → 直接 wrap 它的 Future
+#    · Orchestrator：背景執行緒跑 event loop；submit(coro) → Future，
+#      io(fn) 把檔案寫入丟到獨立 I/O 執行緒，不佔儀器執行緒
+#    · QtBridge：完成時在 GUI 執行緒呼叫 slot (同 MotionService.when_done)；
+#      post(fn, *args) 讓協程把進度等更新丟回 GUI 執行緒
+#
+#  目前的使用者：控制頁 Auto-Check (workers.auto_check，移動期間同時輪詢 EDC)
+#
+#  範例：移動期間同時輪詢溫度 (poll 要傳「會產生協程的函式」，每次呼叫都是新的一次查詢)
+#      t = AsyncDevice(thermo, "thermo")
+#      _, temps = await poll_during(amotor.goto(idx), lambda: t.call(thermo.read), 0.2)
+# ---------------------------------------------------------------------------
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+from drivers.qt_compat import QObject, pyqtSignal
+
+
+class AsyncDevice:
+    """任意阻塞物件 → 專屬執行緒上的 awaitable 呼叫"""
+
+    def __init__(self, dev, name: str = "dev") -> None:
+        self.dev = dev
+        self._ex = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"aio-{name}")
+
+    async def call(self, fn: Callable, *args, **kw) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._ex, functools.partial(fn, *args, **kw))
+
+    def close(self) -> None:
+        self._ex.shutdown(wait=True)
+
+
+class AsyncLockIn(AsyncDevice):
+    """LockInBase 的 async 版；Settler / Dwell 等阻塞流程可用 call() 放到同一執行緒"""
+
+    def __init__(self, lockin) -> None:
+        super().__init__(lockin, "lockin")
+
+    async def read_xyz(self) -> Tuple[float, float, float]:
+        return await self.call(self.dev.read_xyz)
+
+    async def read_xyz_block(self, n: int, interval_s: float = 0.0):
+        return await self.call(self.dev.read_xyz_block, n, interval_s)
+
+    async def set_param(self, **kw) -> None:
+        await self.call(self.dev.set_param, **kw)
+
+    def name(self) -> str:
+        return self.dev.name()
+
+    @property
+    def tau_s(self) -> float:
+        return self.dev.tau_s
+
+    @property
+    def slope_db(self) -> int:
+        return self.dev.slope_db
+
+    @property
+    def state(self):
+        return self.dev.state
+
+
+class AsyncMotor(AsyncDevice):
+    """MotorArduino 或 MotionService 的 async 版"""
+
+    def __init__(self, motor) -> None:
+        super().__init__(motor, "motor")
+
+    async def goto(self, idx: int, backlash: Optional[int] = None) -> int:
+        submit = getattr(self.dev, "submit", None)
+        if submit is not None:                       # MotionService：已有專屬執行緒
+            return await asyncio.wrap_future(submit(idx, backlash=backlash))
+        await self.call(self.dev.goto, idx, backlash)
+        return self.dev.position
+
+    async def sync(self, idx: int) -> None:
+        """S<idx>：設定目前計數器"""
+        await self.call(setattr, self.dev, "position", idx)
+
+    @property
+    def position(self) -> int:
+        return self.dev.position
+
+
+async def poll_during(aw: Awaitable, poll: Callable[[], Awaitable], period_s: float
+                      ) -> Tuple[Any, List[Tuple[float, Any]]]:
+    """等 aw 完成期間每 period_s 執行一次 poll()；回傳 (aw 結果, [(t, 值), …])"""
+    task = asyncio.ensure_future(aw)
+    samples = []
+    try:
+        while not task.done():
+            samples.append((time.perf_counter(), await poll()))
+            await asyncio.wait([task], timeout=period_s)
+    except BaseException:                           # 輪詢失敗 / 被取消 → 不留孤兒任務
+        task.cancel()
+        raise
+    return task.result(), samples
+
+
+class Orchestrator:
+    """背景 event loop；GUI / worker 執行緒以 submit() 投遞協程"""
+
+    def __init__(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="aio-io")
+        self._thread = threading.Thread(target=self._run, name="aio-loop", daemon=True)
+        self._thread.start()
+
+    def submit(self, coro) -> Future:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def io(self, fn: Callable, *args, **kw) -> Any:
+        """檔案寫入等非儀器阻塞工作 (於 loop 內 await)"""
+        return await self.loop.run_in_executor(self._io, functools.partial(fn, *args, **kw))
+
+    def close(self) -> None:
+        """取消還在跑的協程 (等它們收尾) 再停 loop"""
+        if self._thread.is_alive():
+            try:
+                self.submit(_cancel_all()).result(timeout=5.0)
+            except Exception:  # noqa: broad-except
+                pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5.0)
+        self._io.shutdown(wait=True)
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+        self.loop.close()
+
+
+async def _cancel_all() -> None:
+    tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class QtBridge(QObject):
+    """orch.submit() 的結果送回 GUI 執行緒：bridge.run(coro, slot) → slot(future)"""
+    _done = pyqtSignal(object, object)              # slot, future
+    _post = pyqtSignal(object, object)              # fn, args
+
+    def __init__(self, orch: Orchestrator) -> None:
+        super().__init__()
+        self.orch = orch
+        self._done.connect(lambda slot, fut: slot(fut))
+        self._post.connect(lambda fn, args: fn(*args))
+
+    def post(self, fn: Callable, *args) -> None:
+        """任何執行緒 → 在 GUI 執行緒呼叫 fn(*args) (不等待)"""
+        self._post.emit(fn, args)
+
+    def run(self, coro, slot: Optional[Callable[[Future], None]] = None) -> Future:
+        fut = self.orch.submit(coro)
+        if slot is not None:
+            fut.add_done_callback(lambda f: self._done.emit(slot, f))
+        return fut
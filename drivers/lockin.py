@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 import pyvisa
 import time
+import numpy as np
 from types import MappingProxyType               # 只需一次即可
 import math
 
@@ -8,6 +9,10 @@ import math
 # 1. Lock-in 抽象層
 ##################################################
 class LockInBase(ABC):
+    # 目前生效的時間常數 / 濾波斜率，由 set_param 更新 (供 settle 判斷)
+    tau_s    = 1.0        # s，與 LockInParamWidget 預設 1 s 一致
+    slope_db = 12         # dB/oct
+
     @abstractmethod
     def set_param(self, **kwargs):...
     @abstractmethod
@@ -15,6 +20,23 @@ class LockInBase(ABC):
     @abstractmethod
     def name(self):...
 
+    @property
+    def state(self):
+        """最後一次成功寫入的參數 (唯讀快照)"""
+        return MappingProxyType(dict(getattr(self, "_params", {})))
+
+    def read_xyz_block(self, n: int, interval_s: float = 0.0) -> np.ndarray:
+        """連續取 n 筆 → shape (n, 4)：t (perf_counter), x, y, edc
+        預設逐筆 read_xyz；驅動若有緩衝 / 管線化查詢請覆寫"""
+        out = np.empty((n, 4))
+        for i in range(n):
+            if i and interval_s > 0:
+                time.sleep(interval_s)
+            t_a = time.perf_counter()
+            x, y, e = self.read_xyz()
+            out[i] = ((t_a + time.perf_counter()) / 2, x, y, e)
+        return out
+
 ##################################################
 # 2. NF 5610B 驅動 (沿用 v1.0)
 ##################################################
@@ -25,6 +47,10 @@ class LockInNF5610B(LockInBase):
                    "100 mV":10,"300 mV":11,"1 V":12}
     _TIME_CONST = {"0.1 ms":0,"3 ms":1,"10 ms":2,"30 ms":3,"100 ms":4,
                    "300 ms":5,"1 s":6,"3 s":7,"10 s":8,"30 s":9}
+    _TIME_CONST_S = {"0.1 ms":1e-4,"3 ms":3e-3,"10 ms":1e-2,"30 ms":3e-2,"100 ms":0.1,
+                     "300 ms":0.3,"1 s":1.0,"3 s":3.0,"10 s":10.0,"30 s":30.0}
+    # 時間常數濾波斜率：面板設定，無 GPIB 指令 → 只記錄供 settle 使用
+    _SLOPE = {"6 dB/oct":6,"12 dB/oct":12,"18 dB/oct":18,"24 dB/oct":24}
     _FMO = {"THRU":0,"HPF":1,"LPF":2,"NORMAL Q1":30,"NORMAL Q5":31,"NORMAL Q30":32,
             "LPF Q1":33,"LPF Q5":34,"LPF Q30":35,"LPF Q1B":36,"LPF Q5B":37,"LPF Q30B":38}
     _OFQ_RANGE = {
@@ -34,30 +60,102 @@ class LockInNF5610B(LockInBase):
         "1-12 kHz": 3,
         "10-120 kHz": 4
     }
+    BURST_CHUNK        = 16       # 單次管線化查詢最多幾筆 (回應緩衝上限)
+    BURST_MAX_INTERVAL = 0.005    # s，要求間隔 ≤ 此值才用管線化 (約一次 GPIB 往返)
+
     def __init__(self, resource="GPIB0::2::INSTR", timeout_ms=5000):
         rm = pyvisa.ResourceManager()
         self.inst = rm.open_resource(resource)
         self.inst.timeout = timeout_ms
         self.inst.write("OSS1;ODS47,4")
+        self._burst_ok = True          # 儀器不接受多重查詢時自動退回逐筆
+        self._sent   = {}              # 指令標頭 → 最後送出的完整指令 (儀器狀態快取)
+        self._params = {}              # set_param 參數名 → 值
 
     def set_param(self, **kw):
-        cmd=[]
-        g=kw.get
-        if g('ref_mode'):cmd.append(f"BRM{self._REF_MODE[g('ref_mode')]}")
-        if g('sensitivity'):cmd.append(f"BSS{self._SENS[g('sensitivity')]}")
-        if g('time_const'):cmd.append(f"BTC{self._TIME_CONST[g('time_const')]}")
-        if g('filter_mode'):cmd.append(f"FMO{self._FMO[g('filter_mode')]}")
-        if g('int_osc_freq') is not None:
-            cmd.append(f"OFQ{int(g('int_osc_freq'))},{g('int_osc_range') + 1}")
-        if g('int_osc_level') is not None:
-            cmd.append(f"OLV{int(g('int_osc_level'))},{g('int_osc_level_range')}")
-        for c in cmd:
-            self.inst.write(c)
-        # ★ 新增：固定送 DDT434
-        self.inst.write("DDT434")
+        """只送與快取不同的指令，以 ; 串成單一 write；DDT434 只在首次送出"""
+        cmds = self._diff_cmds(kw)
+        if cmds:
+            try:
+                self.inst.write(";".join(cmds))
+            except Exception:
+                self.resync()              # 不確定儀器收到哪些 → 下次全部重送
+                raise
+        self._commit(kw)
+
+    def resync(self):
+        """清除狀態快取 (面板被手動改過、重新連線後呼叫)"""
+        self._sent.clear()
+
+    def _build_cmds(self, kw) -> dict:
+        """參數 → {標頭: 指令}；範圍參數未給時沿用快取 (LockInDummy 共用)"""
+        nf=LockInNF5610B
+        cmd={}
+        g=lambda k: kw.get(k, self._params.get(k))
+        if kw.get('ref_mode'):cmd["BRM"]=f"BRM{nf._REF_MODE[kw['ref_mode']]}"
+        if kw.get('sensitivity'):cmd["BSS"]=f"BSS{nf._SENS[kw['sensitivity']]}"
+        if kw.get('time_const'):cmd["BTC"]=f"BTC{nf._TIME_CONST[kw['time_const']]}"
+        if kw.get('filter_mode'):cmd["FMO"]=f"FMO{nf._FMO[kw['filter_mode']]}"
+        if kw.get('int_osc_freq') is not None:
+            cmd["OFQ"]=f"OFQ{int(kw['int_osc_freq'])},{g('int_osc_range') + 1}"
+        if kw.get('int_osc_level') is not None:
+            cmd["OLV"]=f"OLV{int(kw['int_osc_level'])},{g('int_osc_level_range')}"
+        return cmd
+
+    def _diff_cmds(self, kw) -> list:
+        cmds = LockInNF5610B._build_cmds(self, kw)
+        changed = [c for k, c in cmds.items() if self._sent.get(k) != c]
+        if "DDT" not in self._sent:
+            changed.append("DDT434")       # ★ 固定輸出設定：首次送出即可
+        return changed
+
+    def _commit(self, kw):
+        """寫入成功後更新快取"""
+        for c in LockInNF5610B._diff_cmds(self, kw):
+            self._sent[c[:3]] = c
+        self._params.update({k: v for k, v in kw.items() if v is not None})
+        LockInNF5610B._track_filter(self, kw)
+
+    def _track_filter(self, kw):
+        """記下目前 τ 與斜率 (LockInDummy 共用)"""
+        nf = LockInNF5610B
+        if kw.get('time_const'):
+            self.tau_s = nf._TIME_CONST_S[kw['time_const']]
+        if kw.get('filter_slope'):
+            self.slope_db = nf._SLOPE[kw['filter_slope']]
 
     def read_xyz(self):
         x,y,e=map(float,self.inst.query("?ODT").strip().split(','));return x,y,e
+
+    def read_xyz_block(self, n: int, interval_s: float = 0.0) -> np.ndarray:
+        """一個訊息送 k 個 ?ODT (以 ; 串接)，一次讀回 k 組 x,y,e；
+        時間戳在送出與讀完之間均分。間隔要求較長或儀器不支援時逐筆讀"""
+        if not self._burst_ok or interval_s > self.BURST_MAX_INTERVAL:
+            return super().read_xyz_block(n, interval_s)
+        out = np.empty((n, 4)); i = 0
+        while i < n:
+            k = min(self.BURST_CHUNK, n - i)
+            t_a = time.perf_counter()
+            try:
+                self.inst.write(";".join(["?ODT"] * k))
+                reply = self.inst.read()
+            except pyvisa.errors.VisaIOError:
+                reply = ""                 # 逾時：儀器沒回應多重查詢
+            t_b = time.perf_counter()
+            try:
+                vals = np.array(reply.replace(";", ",").split(","), dtype=float)
+            except ValueError:
+                vals = np.empty(0)
+            if vals.size != 3 * k:
+                self._burst_ok = False     # 不支援 → 清掉殘留回應，之後一律逐筆
+                self.inst.clear()
+                out[i:] = super().read_xyz_block(n - i, interval_s)
+                return out
+            out[i:i + k, 0] = t_a + (np.arange(k) + 0.5) * (t_b - t_a) / k
+            out[i:i + k, 1:] = vals.reshape(k, 3)
+            i += k
+        return out
+
     def name(self):return "NF 5610B"
 
 ##################################################
@@ -66,25 +164,12 @@ class LockInNF5610B(LockInBase):
 class LockInDummy(LockInBase):
     def __init__(self, logfile="dummy_lockin.log"):
         self.log=open(logfile,'a',encoding='utf8')
+        self._sent, self._params = {}, {}
     def set_param(self, **kw):
-        # 把 NF-5610B 的指令生成規則複製過來
+        # 沿用 NF-5610B 的指令生成與狀態快取規則 (只記錄變動的指令)
         nf = LockInNF5610B
-        maps = {                 # 用 MappingProxyType 防意外修改
-            'ref_mode'   : MappingProxyType(nf._REF_MODE),
-            'sensitivity': MappingProxyType(nf._SENS),
-            'time_const' : MappingProxyType(nf._TIME_CONST),
-            'filter_mode': MappingProxyType(nf._FMO),
-        }
-        cmd = []
-        g = kw.get
-        if g('ref_mode')      : cmd.append(f"BRM{maps['ref_mode'][g('ref_mode')]}")
-        if g('sensitivity')   : cmd.append(f"BSS{maps['sensitivity'][g('sensitivity')]}")
-        if g('time_const')    : cmd.append(f"BTC{maps['time_const'][g('time_const')]}")
-        if g('filter_mode')   : cmd.append(f"FMO{maps['filter_mode'][g('filter_mode')]}")
-        if g('int_osc_freq')  is not None:
-            cmd.append(f"OFQ{int(g('int_osc_freq'))},{g('int_osc_range') + 1}")
-        if g('int_osc_level') is not None:
-            cmd.append(f"OLV{int(g('int_osc_level'))},{g('int_osc_level_range')}")
+        cmd = nf._diff_cmds(self, kw)
+        nf._commit(self, kw)
 
         line = ";".join(cmd) or "—"
         self.log.write(line + "\n")
@@ -0,0 +1,169 @@
+# drivers/motion.py
+# ---------------------------------------------------------------------------
+#  MotionService：唯一擁有馬達的執行緒
+#  ----------------------------------
+#  所有移動 (掃描、Go、jog、Auto Check) 都經由這裡排隊，不再各自開 QThread
+#  搶 MotorArduino._lock：
+#
+#    · submit(idx, priority) → concurrent.futures.Future (結果 = 到位 idx)；
+#      idx 可為小數 (脈衝解析度，同 MotorArduino.goto)
+#    · 優先序：PRIO_SYNC < PRIO_SCAN < PRIO_GOTO < PRIO_JOG (數字小先做)，
+#      同優先序依送出順序
+#    · jog_by(delta)：尚未開始的 jog 會被合併成一次移動到最終目標，
+#      連點多下只走一趟
+#    · cancel_pending()：取消所有還沒開始的指令
+#    · when_done(fut, slot)：完成時在 GUI 執行緒呼叫 slot(fut)
+#
+#  另外代理 MotorArduino 的公開介面 (goto / position / 訊號…)，
+#  既有 worker 與控件可直接把它當 motor 使用。
+# ---------------------------------------------------------------------------
+
+import heapq
+import itertools
+import threading
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from drivers.qt_compat import QObject, pyqtSignal
+
+PRIO_SYNC = -1      # S<idx> 同步：必須在之後的移動之前
+PRIO_SCAN = 0
+PRIO_GOTO = 1
+PRIO_JOG  = 2
+
+
+class _Cmd:
+    __slots__ = ("kind", "idx", "backlash", "future")
+
+    def __init__(self, kind: str, idx: int, backlash: Optional[int] = None) -> None:
+        self.kind = kind
+        self.idx = idx
+        self.backlash = backlash
+        self.future: Future = Future()
+
+
+class MotionService(QObject):
+    _done = pyqtSignal(object, object)          # slot, future → GUI 執行緒
+
+    def __init__(self, motor) -> None:
+        super().__init__()
+        self._motor = motor
+        self._heap = []
+        self._seq = itertools.count()
+        self._cv = threading.Condition()
+        self._jog: Optional[_Cmd] = None        # 尚未開始、可合併的 jog
+        self._active: Optional[_Cmd] = None     # 執行中的指令
+        self._running = True
+        self._done.connect(lambda slot, fut: slot(fut))
+        self._thread = threading.Thread(target=self._loop, name="motion", daemon=True)
+        self._thread.start()
+
+    # ---------------- 代理 MotorArduino ----------------
+    @property
+    def positionChanged(self):
+        return self._motor.positionChanged
+
+    @property
+    def hitLimit(self):
+        return self._motor.hitLimit
+
+    @property
+    def position(self) -> int:
+        return self._motor.position
+
+    @position.setter
+    def position(self, idx: int) -> None:
+        self._put(_Cmd("sync", int(idx)), PRIO_SYNC)
+
+    @property
+    def backlash_idx(self) -> int:
+        return self._motor.backlash_idx
+
+    @backlash_idx.setter
+    def backlash_idx(self, n: int) -> None:
+        self._motor.backlash_idx = n
+
+    def __getattr__(self, name):
+        # PULSE_PER_IDX 等常數
+        if name == "_motor":
+            raise AttributeError(name)
+        return getattr(self._motor, name)
+
+    # ---------------- 指令 ----------------
+    def submit(self, idx: int, priority: int = PRIO_GOTO,
+               backlash: Optional[int] = None) -> Future:
+        return self._put(_Cmd("move", idx, backlash), priority)
+
+    def goto(self, idx: int, backlash: Optional[int] = None) -> None:
+        """阻塞版 (給 worker 執行緒用)，介面同 MotorArduino.goto"""
+        self.submit(idx, PRIO_SCAN, backlash).result()
+
+    def goto_pulse(self, pulse: int, backlash: Optional[int] = None) -> None:
+        """經由佇列的脈衝定位 (不直接呼叫 MotorArduino.goto_pulse 以免插隊)"""
+        self.goto(pulse / self._motor.PULSE_PER_IDX, backlash)
+
+    def jog_by(self, delta: int, lo: int = 0, hi: int = 999) -> Future:
+        """相對移動；以「已排隊的最終目標」為基準累加，未開始的 jog 直接改目標"""
+        with self._cv:
+            if self._jog is not None:
+                self._jog.idx = max(lo, min(hi, self._jog.idx + delta))
+                return self._jog.future
+            base = self._active.idx if self._active is not None else self._motor.position
+            cmd = _Cmd("move", max(lo, min(hi, base + delta)))
+            self._jog = cmd
+            self._push(cmd, PRIO_JOG)
+            return cmd.future
+
+    def cancel_pending(self) -> int:
+        """取消所有未開始的指令，回傳取消數"""
+        with self._cv:
+            n = sum(1 for _, _, c in self._heap if c.future.cancel())
+            self._heap.clear()
+            self._jog = None
+        return n
+
+    def when_done(self, fut: Future, slot: Callable[[Future], None]) -> None:
+        fut.add_done_callback(lambda f: self._done.emit(slot, f))
+
+    def close(self) -> None:
+        self.cancel_pending()
+        with self._cv:
+            self._running = False
+            self._cv.notify()
+        self._thread.join(timeout=5.0)
+
+    # ---------------- 私有工具 ----------------
+    def _put(self, cmd: _Cmd, priority: int) -> Future:
+        with self._cv:
+            self._push(cmd, priority)
+        return cmd.future
+
+    def _push(self, cmd: _Cmd, priority: int) -> None:
+        heapq.heappush(self._heap, (priority, next(self._seq), cmd))
+        self._cv.notify()
+
+    def _loop(self) -> None:
+        while True:
+            with self._cv:
+                while self._running and not self._heap:
+                    self._cv.wait()
+                if not self._running:
+                    return
+                _, _, cmd = heapq.heappop(self._heap)
+                if cmd is self._jog:
+                    self._jog = None              # 開始後不再合併
+                if not cmd.future.set_running_or_notify_cancel():
+                    continue
+                self._active = cmd
+            try:
+                if cmd.kind == "sync":
+                    self._motor.position = cmd.idx
+                else:
+                    self._motor.goto(cmd.idx, backlash=cmd.backlash)
+            except Exception as e:  # noqa: broad-except
+                cmd.future.set_exception(e)
+            else:
+                cmd.future.set_result(self._motor.position)
+            finally:
+                with self._cv:
+                    self._active = None
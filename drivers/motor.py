@@ -3,9 +3,18 @@
 #  Arduino 韌體協定：
 #    · G<pulse>  → 絕對脈衝定位，完成後回傳 "OK"
 #    · S<idx>    → 同步軟體 idx，不動作
+#    · 韌體回報 (逐行)：OK / ERR… / LIMIT <pulse> / POS <pulse>
+#      由背景 reader 執行緒解析：OK、ERR、LIMIT 進 ACK 佇列，
+#      LIMIT → hitLimit，POS → positionChanged
+#
+#  背隙補償：逆著 APPROACH_DIR 移動時先多走 backlash_idx 再折返，
+#            讓每個點都從同一側抵達
+#
+#  位置以脈衝為準 (pulse)；idx = pulse / PULSE_PER_IDX。goto(idx) 接受小數 idx
+#  (四捨五入到最近脈衝)，goto_pulse() 直接指定脈衝；position 仍回報整數 idx
 # ---------------------------------------------------------------------------
 
-import sys, subprocess, time, threading
+import sys, subprocess, time, threading, queue
 from typing import Optional
 
 # ---------- 自動確保 pyserial ----------
@@ -23,62 +32,87 @@ _ensure_serial()
 from serial.tools import list_ports
 # --------------------------------------
 
-try:
-    from PyQt5.QtCore import QObject, pyqtSignal
-except ImportError:
-    class QObject: pass                        # type: ignore
-    def pyqtSignal(*_a, **_k): return lambda f: f  # type: ignore
+from drivers.qt_compat import QObject, pyqtSignal   # 無 PyQt5 時用替身
 
 class MotorArduino(QObject):
     hitLimit        = pyqtSignal(int)
     positionChanged = pyqtSignal(int)
 
     BAUDRATE       = 115200
-    TIMEOUT_BUFFER = 1.0         # s，加在估算時間後 (提高容錯)
-    PULSE_PER_IDX  = 10          # 1 idx = 10 pulse
-    PULSE_TIME     = 0.003       # s，每脈衝驅動時間 (放慢估計避免 no ACK)
+    TIMEOUT_BUFFER = 1.0         # s，加在估算時間後 (提高容錯)
+    PULSE_PER_IDX  = 10          # 1 idx = 10 pulse
+    PULSE_TIME     = 0.003       # s，每脈衝驅動時間 (放慢估計避免 no ACK)
+    APPROACH_DIR   = +1          # 固定由 idx 遞增方向抵達目標
+    BACKLASH_IDX   = 0           # 預設不補償；可於實例改 backlash_idx
 
     _lock = threading.Lock()
 
-    def __init__(self, port: Optional[str] = None) -> None:
+    def __init__(self, port: Optional[str] = None, transport=None) -> None:
+        """transport：已開啟、介面同 serial.Serial 的物件 (例如 drivers.sim.SimSerial)"""
         super().__init__()
-        self._ser = serial.Serial(self._detect_port(port), self.BAUDRATE, timeout=0.1)
-        time.sleep(1)
+        if transport is not None:
+            self._ser = transport
+        else:
+            self._ser = serial.Serial(self._detect_port(port), self.BAUDRATE, timeout=0.1)
+            time.sleep(1)                        # 開埠會重置 Arduino，等開機
         self._ser.reset_input_buffer()
-        self._pos_idx = 0
+        self._pos_pulse = 0
+        self.backlash_idx = self.BACKLASH_IDX
+        self.last_ack_t = 0.0                    # 最近一次 ACK 的 perf_counter
+        self._acks: "queue.Queue[tuple]" = queue.Queue()
+        self._running = True
+        self._reader = threading.Thread(target=self._read_loop, name="motor-reader", daemon=True)
+        self._reader.start()
         print(f"[motor] Connected on {self._ser.port}")
 
     # ---------------- 公開屬性 ----------------
     @property
     def position(self) -> int:
-        return self._pos_idx
+        return self._pos_pulse // self.PULSE_PER_IDX
 
     @position.setter
     def position(self, idx: int) -> None:
-        self._pos_idx = int(idx)
+        self._pos_pulse = int(idx) * self.PULSE_PER_IDX
         self._write(f"S{idx}")
-        self.positionChanged.emit(self._pos_idx)
+        self.positionChanged.emit(self.position)
+
+    @property
+    def pulse(self) -> int:
+        return self._pos_pulse
 
     # ---------------- 主要動作 ----------------
-    def goto(self, idx: int) -> None:
+    def goto(self, idx: float, backlash: Optional[int] = None) -> None:
+        """idx 可為小數 (脈衝解析度)；backlash=None → 用 self.backlash_idx；0 → 直接走"""
+        self.goto_pulse(int(round(idx * self.PULSE_PER_IDX)), backlash)
+
+    def goto_pulse(self, pulse: int, backlash: Optional[int] = None) -> None:
+        """絕對脈衝定位；backlash 單位仍為 idx"""
+        backlash = self.backlash_idx if backlash is None else backlash
         with self._lock:
-            if idx == self._pos_idx:
+            if pulse == self._pos_pulse:
                 return
-            pulse = idx * self.PULSE_PER_IDX
-            delta = abs(pulse - self._pos_idx * self.PULSE_PER_IDX)
-            est   = delta * self.PULSE_TIME + self.TIMEOUT_BUFFER
-
-            self._write(f"G{pulse}")
-            self._wait_ok(est)
-
-            self._pos_idx = idx
-            self.positionChanged.emit(idx)
+            if backlash > 0 and (pulse - self._pos_pulse) * self.APPROACH_DIR < 0:
+                self._move(pulse - self.APPROACH_DIR * backlash * self.PULSE_PER_IDX)
+            self._move(pulse)
 
     def close(self) -> None:
+        self._running = False
+        if self._reader.is_alive():
+            self._reader.join(timeout=1.0)
         if self._ser and self._ser.is_open:
             self._ser.close()
 
     # ---------------- 私有工具 ----------------
+    def _move(self, pulse: int) -> None:
+        delta = abs(pulse - self._pos_pulse)
+        est   = delta * self.PULSE_TIME + self.TIMEOUT_BUFFER
+
+        self._write(f"G{pulse}")
+        self._wait_ok(est)
+
+        self._pos_pulse = pulse
+        self.positionChanged.emit(self.position)
+
     def _detect_port(self, p_hint: Optional[str]) -> str:
         if p_hint:
             return p_hint
@@ -90,21 +124,54 @@ class MotorArduino(QObject):
         return list_ports.comports()[0].device
 
     def _write(self, msg: str) -> None:
-        self._ser.reset_input_buffer()
+        # 丟掉上一個指令殘留的 ACK (輸入緩衝交給 reader，不在此清)
+        while True:
+            try:
+                self._acks.get_nowait()
+            except queue.Empty:
+                break
         self._ser.write(f"{msg}\n".encode())
 
     def _wait_ok(self, tmax: float) -> None:
-        deadline = time.time() + tmax
-        buf = b""
-        while time.time() < deadline:
-            if self._ser.in_waiting:
-                buf += self._ser.readline()
-                if b"OK" in buf:
-                    return
-                if b"ERR" in buf:
-                    raise RuntimeError("Motor report ERR")
-            time.sleep(0.01)
-        raise RuntimeError("Motor no ACK")
+        """阻塞到 reader 收到 ACK；ACK 一到立即返回"""
+        try:
+            kind, payload = self._acks.get(timeout=tmax)
+        except queue.Empty:
+            raise RuntimeError("Motor no ACK") from None
+        if kind == "ERR":
+            raise RuntimeError(f"Motor report {payload}")
+        if kind == "LIMIT":
+            self._pos_pulse = payload            # 韌體停在極限，軟體位置跟上
+            self.positionChanged.emit(self.position)
+            raise RuntimeError(f"Motor hit limit at idx {self.position}")
+        self.last_ack_t = payload
+
+    def _read_loop(self) -> None:
+        """背景執行緒：逐行讀韌體回報 (readline 遇換行即返回，逾時 0.1 s)"""
+        while self._running:
+            try:
+                raw = self._ser.readline()
+            except Exception as e:  # noqa: broad-except  (埠被拔除 / 關閉)
+                if self._running:
+                    self._acks.put(("ERR", f"serial: {e}"))
+                return
+            if raw:
+                self._dispatch(raw.decode(errors="replace").strip(), time.perf_counter())
+
+    def _dispatch(self, line: str, t: float) -> None:
+        head, _, arg = line.partition(" ")
+        if head == "OK":
+            self._acks.put(("OK", t))
+        elif head.startswith("ERR"):
+            self._acks.put(("ERR", line))
+        elif head == "LIMIT":
+            pulse = int(arg) if arg.lstrip("-").isdigit() else self._pos_pulse
+            self.hitLimit.emit(pulse // self.PULSE_PER_IDX)
+            self._acks.put(("LIMIT", pulse))
+        elif head == "POS" and arg.lstrip("-").isdigit():
+            self.positionChanged.emit(int(arg) // self.PULSE_PER_IDX)
+        elif line:
+            print(f"[motor] ? {line}")
 
     # ---------------- CLI 測試 ----------------
     @classmethod
@@ -0,0 +1,48 @@
+# drivers/qt_compat.py
+# ---------------------------------------------------------------------------
+#  驅動層的 Qt 相依性
+#  ------------------
+#  有 PyQt5 → 直接用 QObject / pyqtSignal (訊號可跨執行緒排隊到 GUI)。
+#  沒有 PyQt5 (無頭主機跑 scan_cli) → 極簡替身：每個實例各自一組
+#  connect / disconnect / emit，emit 在呼叫端執行緒同步呼叫所有 slot。
+# ---------------------------------------------------------------------------
+
+try:
+    from PyQt5.QtCore import QObject, pyqtSignal
+except ImportError:
+    class QObject:                                       # type: ignore
+        def __init__(self, *_a, **_k) -> None:
+            pass
+
+    class _BoundSignal:
+        def __init__(self) -> None:
+            self._slots = []
+
+        def connect(self, slot) -> None:
+            self._slots.append(slot)
+
+        def disconnect(self, slot=None) -> None:
+            self._slots = [] if slot is None else [s for s in self._slots if s != slot]
+
+        def emit(self, *args) -> None:
+            for s in list(self._slots):
+                s(*args)
+
+    class pyqtSignal:                                    # type: ignore
+        """類別屬性宣告，實例第一次存取時建立自己的 _BoundSignal"""
+
+        def __init__(self, *_types, **_k) -> None:
+            self._name = None
+
+        def __set_name__(self, owner, name) -> None:
+            self._name = "_sig_" + name
+
+        def __get__(self, obj, owner=None):
+            if obj is None:
+                return self
+            sig = obj.__dict__.get(self._name)
+            if sig is None:
+                sig = obj.__dict__[self._name] = _BoundSignal()
+            return sig
+
+__all__ = ["QObject", "pyqtSignal"]
@@ -0,0 +1,243 @@
+# drivers/sim.py
+# ---------------------------------------------------------------------------
+#  離線模擬器：不接硬體也能跑掃描 / 校正 / 效能量測
+#  ------------------------------------------------
+#  SimSerial：程序內 (in-process) 的 serial 替身，模擬 Arduino 韌體
+#    · 與 pyserial 相同的 write / readline / reset_input_buffer / close，
+#      直接當 MotorArduino(transport=SimSerial()) 使用
+#    · G<pulse>：每脈衝 pulse_time 等速移動，到位後 ack_latency 回 "OK"
+#    · S<idx>  ：同步計數器，不回應
+#    · 軟體極限 lo_pulse / hi_pulse：超出時停在極限並回 "LIMIT <pulse>"
+#    · err_rate：每個 G 指令以此機率回 "ERR sim"；inject() 可插入任意回報
+#    · pos_every > 0：移動中每走 pos_every 脈衝回報 "POS <pulse>"
+#    · time_scale：所有延遲乘上此值 (< 1 加速模擬)
+#    · last_arrival：最近一次到位時刻，效能量測用來拆開「移動」與「等 ACK」
+#
+#  LockInSim：ΔR/R 光譜 + 時間常數濾波 + 雜訊的 lock-in
+#    · 輸入訊號 = spectrum(eV) × EDC，eV 由 position_fn() (馬達 idx，
+#      移動中為內插值) 經 Mapper 換算；超出校正範圍訊號為 0
+#    · 濾波：slope_db / 6 級一階 RC 串接，τ 依 set_param 的 time_const
+#    · 雜訊：白雜訊 noise_v (V/√Hz) 進第一級濾波 (OU 過程)，
+#      相鄰讀值依 τ 相關，與實機相同
+#    · 每次讀取 sleep query_s 模擬 GPIB 往返
+# ---------------------------------------------------------------------------
+
+import math
+import queue
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+from drivers.lockin import LockInBase, LockInNF5610B
+
+HC_EV_NM = 1239.84193
+
+
+# ===========================================================================
+# 1. 馬達韌體
+# ===========================================================================
+class SimSerial:
+    timeout = 0.1                     # readline 逾時 (同 MotorArduino 的 Serial 設定)
+
+    def __init__(self, pulse_time: float = 0.003, ack_latency: float = 0.002,
+                 lo_pulse: int = 0, hi_pulse: int = 10000, err_rate: float = 0.0,
+                 pos_every: int = 0, pulse_per_idx: int = 10, time_scale: float = 1.0,
+                 seed: Optional[int] = None) -> None:
+        self.port = "SIM"
+        self.is_open = True
+        self.pulse_time = pulse_time
+        self.ack_latency = ack_latency
+        self.lo_pulse, self.hi_pulse = lo_pulse, hi_pulse
+        self.err_rate = err_rate
+        self.pos_every = pos_every
+        self.pulse_per_idx = pulse_per_idx
+        self.time_scale = time_scale
+        self._rng = random.Random(seed)
+        self._buf = b""
+        self._rx: "queue.Queue[bytes]" = queue.Queue()     # 韌體 → 主機
+        self._cmd: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._mv_lock = threading.Lock()
+        self._move = (0.0, 0.0, 0.0, 0.0)                  # p0, p1, t0, t1
+        self.last_arrival = 0.0                            # 最近一次實際到位的 perf_counter
+        self._fw = threading.Thread(target=self._firmware, name="sim-firmware", daemon=True)
+        self._fw.start()
+
+    # ---------------- pyserial 介面 ----------------
+    def write(self, data: bytes) -> int:
+        self._buf += data
+        *lines, self._buf = self._buf.split(b"\n")
+        for ln in lines:
+            self._cmd.put(ln.decode().strip())
+        return len(data)
+
+    def readline(self) -> bytes:
+        try:
+            return self._rx.get(timeout=self.timeout)
+        except queue.Empty:
+            return b""
+
+    def reset_input_buffer(self) -> None:
+        while True:
+            try:
+                self._rx.get_nowait()
+            except queue.Empty:
+                return
+
+    def close(self) -> None:
+        self.is_open = False
+        self._cmd.put(None)
+
+    # ---------------- 模擬器專用 ----------------
+    def pulse_now(self) -> float:
+        """目前脈衝位置 (移動中為等速內插)"""
+        with self._mv_lock:
+            p0, p1, t0, t1 = self._move
+        if t1 <= t0:
+            return p1
+        frac = min(max((time.perf_counter() - t0) / (t1 - t0), 0.0), 1.0)
+        return p0 + frac * (p1 - p0)
+
+    def idx_now(self) -> float:
+        return self.pulse_now() / self.pulse_per_idx
+
+    def inject(self, line: str) -> None:
+        """插入一行韌體回報 (測試 ERR / LIMIT / POS 處理)"""
+        self._rx.put(f"{line}\n".encode())
+
+    # ---------------- 韌體執行緒 ----------------
+    def _firmware(self) -> None:
+        while True:
+            line = self._cmd.get()
+            if line is None:
+                return
+            head, arg = line[:1], line[1:]
+            try:
+                val = int(arg)
+            except ValueError:
+                self.inject(f"ERR bad command {line!r}")
+                continue
+            if head == "S":
+                p = float(val * self.pulse_per_idx)
+                with self._mv_lock:
+                    self._move = (p, p, 0.0, 0.0)
+            elif head == "G":
+                self._goto(val)
+            else:
+                self.inject(f"ERR unknown {line!r}")
+
+    def _goto(self, target: int) -> None:
+        start = self.pulse_now()
+        end = float(min(max(target, self.lo_pulse), self.hi_pulse))
+        dur = abs(end - start) * self.pulse_time * self.time_scale
+        t0 = time.perf_counter()
+        with self._mv_lock:
+            self._move = (start, end, t0, t0 + dur)
+
+        if self.pos_every > 0 and dur > 0:
+            n = int(abs(end - start) // self.pos_every)
+            for k in range(1, n + 1):
+                self._sleep_until(t0 + dur * k * self.pos_every / abs(end - start))
+                self.inject(f"POS {int(round(self.pulse_now()))}")
+        self._sleep_until(t0 + dur)
+        self.last_arrival = time.perf_counter()
+
+        if self._rng.random() < self.err_rate:
+            self.inject("ERR sim")
+        elif end != target:
+            self.inject(f"LIMIT {int(end)}")
+        else:
+            time.sleep(self.ack_latency * self.time_scale)
+            self.inject("OK")
+
+    @staticmethod
+    def _sleep_until(t_end: float) -> None:
+        left = t_end - time.perf_counter()
+        if left > 0:
+            time.sleep(left)
+
+
+# ===========================================================================
+# 2. Lock-in
+# ===========================================================================
+def tdff(ev, e0: float = 1.42, gamma: float = 0.02, amp: float = 1e-4,
+         n: float = 3.0, theta: float = 0.0) -> np.ndarray:
+    """Aspnes 三階微分線型 ΔR/R = Re[C e^{iθ} (E - E0 + iΓ)^-n]；峰值約 amp"""
+    z = np.asarray(ev, dtype=float) - e0 + 1j * gamma
+    return np.real(amp * gamma ** n * np.exp(1j * theta) * z ** (-n))
+
+
+class LockInSim(LockInBase):
+    def __init__(self, mapper=None, position_fn: Callable[[], float] = lambda: 0.0,
+                 spectrum: Callable = tdff, edc: float = 1.0, phase_deg: float = 20.0,
+                 noise_v: float = 2e-8, query_s: float = 0.003,
+                 seed: Optional[int] = None) -> None:
+        self.mapper = mapper
+        self.position_fn = position_fn
+        self.spectrum = spectrum
+        self.edc = edc
+        self.phase = math.radians(phase_deg)
+        self.noise_v = noise_v
+        self.query_s = query_s
+        self._rng = np.random.default_rng(seed)
+        self._sent, self._params = {}, {}
+        self._stages = None                       # (k, 3)：各級 x, y, edc
+        self._t_last = None
+        self._lock = threading.Lock()
+
+    # ---------------- LockInBase ----------------
+    def set_param(self, **kw):
+        # 沿用 NF-5610B 的狀態快取與 τ / 斜率記錄
+        LockInNF5610B._commit(self, kw)
+        with self._lock:
+            if self._stages is not None and len(self._stages) != self._order():
+                self._stages = None               # 斜率改變 → 濾波器重新起算
+
+    def read_xyz(self):
+        if self.query_s > 0:
+            time.sleep(self.query_s)
+        with self._lock:
+            out = self._step(time.perf_counter())
+        return float(out[0]), float(out[1]), float(out[2])
+
+    def name(self):
+        return "Simulator (Offline)"
+
+    # ---------------- 模型 ----------------
+    def signal_at(self, idx: float) -> np.ndarray:
+        """未濾波的 [X, Y, EDC] (V)"""
+        s = 0.0
+        if self.mapper is not None:
+            try:
+                s = float(self.spectrum(HC_EV_NM / self.mapper.nm_from_idx(idx)))
+            except ValueError:                    # 未校正 / 超出校正範圍
+                s = 0.0
+        dv = s * self.edc
+        return np.array([dv * math.cos(self.phase), dv * math.sin(self.phase), self.edc])
+
+    def _order(self) -> int:
+        return max(1, int(self.slope_db) // 6)
+
+    def _step(self, now: float) -> np.ndarray:
+        target = self.signal_at(self.position_fn())
+        tau = self.tau_s
+        if self._stages is None:
+            self._stages = np.tile(target, (self._order(), 1))
+            self._t_last = now
+        dt = max(now - self._t_last, 0.0)
+        self._t_last = now
+        # 子步 ≤ τ/4 讓串接濾波對階躍的響應正確 (最多 50 步，間隔很長時已收斂)
+        n_sub = min(50, max(1, math.ceil(dt / (tau / 4))))
+        h = dt / n_sub
+        a = math.exp(-h / tau)
+        sig = self.noise_v * math.sqrt(1.0 / (4 * tau)) * math.sqrt(1 - a * a)
+        for _ in range(n_sub):
+            inp = target
+            for k in range(len(self._stages)):
+                self._stages[k] = a * self._stages[k] + (1 - a) * inp
+                if k == 0 and sig > 0:
+                    self._stages[0, :2] += sig * self._rng.standard_normal(2)
+                inp = self._stages[k]
+        return self._stages[-1].copy()
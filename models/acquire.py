@@ -0,0 +1,188 @@
+# acquire.py
+# ---------------------------------------------------------------------------
+#  單點量測工具
+#  ------------
+#  Settler：馬達到位後依 lock-in 目前 τ / 濾波斜率等待讀值穩定
+#           (last_query_s：上次 settle 期間單次讀值的平均延遲)
+#
+#    · 先等 min_ntau·τ；未指定時依斜率與 rel_tol 算 (ntau_settle)：n 級 RC
+#      (n = 斜率/6) 階躍響應剩下 e^{-t/τ}·Σ_{k<n} (t/τ)^k/k!，等到它 ≤ rel_tol
+#      (約 n·ln(1/rel_tol) 倍 τ)。只看相鄰讀值的變化不夠：高階濾波剛起步時
+#      變化很慢，小階躍會被誤判為已收斂
+#    · 之後每 poll_ntau·τ 讀一次 X/EDC、Y/EDC，相鄰兩次差值落在容差內才結束
+#      (確認訊號本身沒在漂)
+#    · 最長等待 max_ntau·τ；未指定時取 99 % 收斂倍數與最短等待 +1τ 的較大者
+#
+#  Dwell：穩定後在同一點重複取樣，直到 X/EDC、Y/EDC 的標準誤差都
+#         ≤ target_se，或累計停留超過 max_dwell_s
+#
+#    · 取樣間隔 interval_ntau·τ；間隔遠小於 τ 時樣本高度相關，SE 會低估
+#    · 以 lockin.read_xyz_block 成批讀取；批量依目前 SE 估計還需幾筆
+# ---------------------------------------------------------------------------
+
+import math
+import time
+from typing import Callable, Optional, Tuple
+from models.stats import RunningStat
+
+# 濾波斜率 (dB/oct) → 階躍響應收斂到 99 % 所需 τ 倍數
+NTAU_99 = {6: 5.0, 12: 7.0, 18: 9.0, 24: 10.0}
+MIN_POLL_S = 0.002        # 輪詢間隔下限 (GPIB 往返本身就要數 ms)
+
+
+def ntau_settle(slope_db: float, rel_tol: float) -> float:
+    """n 級一階 RC 串接的階躍響應，剩餘比例降到 rel_tol 所需的 τ 倍數"""
+    n = max(1, int(round(slope_db / 6)))
+    rel_tol = min(max(rel_tol, 1e-9), 0.5)
+
+    def left(t):
+        return math.exp(-t) * sum(t ** k / math.factorial(k) for k in range(n))
+
+    lo, hi = 0.0, 1.0
+    while left(hi) > rel_tol:
+        hi *= 2
+    for _ in range(40):                     # 二分到 ~1e-12 τ
+        mid = (lo + hi) / 2
+        lo, hi = (mid, hi) if left(mid) > rel_tol else (lo, mid)
+    return hi
+
+
+def ntau_max(slope_db: float, rel_tol: float) -> float:
+    """未指定 max_ntau 時的最長等待倍數"""
+    return max(NTAU_99.get(int(slope_db), NTAU_99[24]), ntau_settle(slope_db, rel_tol) + 1.0)
+
+
+class Settler:
+    """
+    · settle() 回傳 ((x, y, edc), settle_s)
+    · rel_tol：相對容差 (對 |X/EDC, Y/EDC| 幅值，也是最短等待要收斂到的階躍比例)；
+      abs_tol：幅值很小時的絕對容差
+    · min_ntau=None → ntau_settle(斜率, rel_tol)
+    """
+
+    def __init__(self, lockin, rel_tol: float = 0.01, abs_tol: float = 1e-7,
+                 max_ntau: Optional[float] = None, min_ntau: Optional[float] = None,
+                 poll_ntau: float = 0.5) -> None:
+        self.lockin = lockin
+        self.rel_tol = rel_tol
+        self.abs_tol = abs_tol
+        self.max_ntau = max_ntau
+        self.min_ntau = min_ntau
+        self.poll_ntau = poll_ntau
+        self.last_query_s = float("nan")
+        self._q_t = 0.0
+        self._q_n = 0
+
+    # -------------------------------- API ---------------------------------
+    def max_wait(self) -> float:
+        """目前 τ / 斜率下的最長等待秒數"""
+        ntau = self.max_ntau or ntau_max(self.lockin.slope_db, self.rel_tol)
+        return ntau * self.lockin.tau_s
+
+    def min_wait(self) -> float:
+        """第一次讀值前至少等待的秒數"""
+        ntau = self.min_ntau if self.min_ntau is not None \
+            else ntau_settle(self.lockin.slope_db, self.rel_tol)
+        return ntau * self.lockin.tau_s
+
+    def settle(self, stop: Callable[[], bool] = lambda: False
+               ) -> Tuple[Tuple[float, float, float], float]:
+        tau = self.lockin.tau_s
+        t_max = self.max_wait()
+        poll = max(self.poll_ntau * tau, MIN_POLL_S)
+        t0 = time.perf_counter()
+        self._q_t, self._q_n = 0.0, 0
+
+        self._sleep_until(t0 + min(self.min_wait(), t_max), stop)
+        prev = self._read()
+        while prev[2] != 0 and not stop():
+            if time.perf_counter() - t0 >= t_max:
+                break
+            time.sleep(poll)
+            cur = self._read()
+            done = self._converged(prev, cur)
+            prev = cur
+            if done:
+                break
+        self.last_query_s = self._q_t / self._q_n if self._q_n else float("nan")
+        return prev, time.perf_counter() - t0
+
+    # ------------------------------ internals -----------------------------
+    def _read(self):
+        t = time.perf_counter()
+        r = self.lockin.read_xyz()
+        self._q_t += time.perf_counter() - t
+        self._q_n += 1
+        return r
+
+    def _converged(self, a, b) -> bool:
+        if a[2] == 0 or b[2] == 0:
+            return True                       # EDC = 0 交給呼叫端處理
+        xa, ya = a[0] / a[2], a[1] / a[2]
+        xb, yb = b[0] / b[2], b[1] / b[2]
+        tol = self.rel_tol * (xb * xb + yb * yb) ** 0.5 + self.abs_tol
+        return abs(xb - xa) <= tol and abs(yb - ya) <= tol
+
+    @staticmethod
+    def _sleep_until(t_end: float, stop: Callable[[], bool]) -> None:
+        # 分段睡，長 τ 時也能即時回應中斷
+        while not stop():
+            left = t_end - time.perf_counter()
+            if left <= 0:
+                return
+            time.sleep(min(left, 0.05))
+
+
+class Dwell:
+    """
+    · measure(first) 以 settle 得到的讀值當第一筆，回傳 dict：
+      x, y (X/EDC、Y/EDC 平均)、edc (平均)、n、x_se、y_se、dwell_s
+    · 任一筆 EDC = 0 立即回傳 edc=0，交給呼叫端中止
+    """
+
+    def __init__(self, lockin, target_se: float, max_dwell_s: float = 10.0,
+                 min_samples: int = 3, interval_ntau: float = 1.0,
+                 block: int = 16) -> None:
+        self.lockin = lockin
+        self.target_se = target_se
+        self.max_dwell_s = max_dwell_s
+        self.min_samples = max(2, min_samples)
+        self.interval_ntau = interval_ntau
+        self.block = max(1, block)
+
+    def scaled(self, k: int) -> "Dwell":
+        """合併 k 個網格點的量測：停留上限與最少樣本 ×k、目標 SE ÷√k"""
+        if k <= 1:
+            return self
+        return Dwell(self.lockin, self.target_se / math.sqrt(k), self.max_dwell_s * k,
+                     self.min_samples * k, self.interval_ntau, self.block)
+
+    def measure(self, first: Tuple[float, float, float],
+                stop: Callable[[], bool] = lambda: False) -> dict:
+        sx, sy, se = RunningStat(), RunningStat(), RunningStat()
+        interval = max(self.interval_ntau * self.lockin.tau_s, MIN_POLL_S)
+        t0 = time.perf_counter()
+        pending = [first]
+        while True:
+            for x, y, edc in pending:
+                if edc == 0:
+                    return dict(x=0.0, y=0.0, edc=0.0, n=sx.n, x_se=math.inf,
+                                y_se=math.inf, dwell_s=time.perf_counter() - t0)
+                sx.push(x / edc); sy.push(y / edc); se.push(edc)
+            if sx.n >= self.min_samples and max(sx.sem, sy.sem) <= self.target_se:
+                break
+            left = self.max_dwell_s - (time.perf_counter() - t0)
+            if left < interval or stop():
+                break
+            pending = self.lockin.read_xyz_block(self._next_block(sx, sy, left / interval),
+                                                 interval)[:, 1:]
+        return dict(x=float(sx.mean), y=float(sy.mean), edc=float(se.mean), n=sx.n,
+                    x_se=float(sx.sem), y_se=float(sy.sem), dwell_s=time.perf_counter() - t0)
+
+    def _next_block(self, sx: RunningStat, sy: RunningStat, budget: float) -> int:
+        """依 SE ∝ 1/√n 估計還需幾筆，限制在 block 與剩餘時間內"""
+        need = self.min_samples - sx.n
+        if sx.n > 1:
+            ratio = max(sx.sem, sy.sem) / self.target_se
+            need = max(need, int(math.ceil(sx.n * ratio * ratio)) - sx.n)
+        return int(max(1, min(need, self.block, budget)))
@@ -0,0 +1,53 @@
+# asc_io.py
+# ---------------------------------------------------------------------------
+#  平均檔 .asc 格式 (二欄區塊)
+#  -------------------------
+#  energy<TAB>X/EDC
+#  <e>     <x>            (%.6e)
+#  ...
+#  (空行)
+#  energy<TAB>Y/EDC
+#  <e>     <y>
+#
+#  read_asc：整個區塊一次轉成 float 陣列 (不逐行 split / float)，
+#  大量載入見 models/catalog.py
+# ---------------------------------------------------------------------------
+
+import re
+
+import numpy as np
+
+_HEADER = re.compile(r"^energy[ \t]+(\S+).*$", re.M)
+
+
+def write_asc(path, ev, x, y) -> None:
+    ev = np.asarray(ev, dtype=float)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("energy\tX/EDC\n")
+        np.savetxt(f, np.column_stack([ev, x]), fmt="%.6e", delimiter="\t")
+        f.write("\n")
+        f.write("energy\tY/EDC\n")
+        np.savetxt(f, np.column_stack([ev, y]), fmt="%.6e", delimiter="\t")
+
+
+def read_asc(path):
+    """write_asc 的檔案 → (ev, x, y)；格式不符 raise ValueError"""
+    with open(path, encoding="utf-8") as f:
+        parts = _HEADER.split(f.read())
+    # parts = [前言, 標頭 1, 區塊 1, 標頭 2, 區塊 2]
+    blocks = {}
+    for label, body in zip(parts[1::2], parts[2::2]):
+        blocks["Y" if "Y" in label else "X"] = _block(body, path)
+    if "X" not in blocks or "Y" not in blocks:
+        raise ValueError(f"不是 X/Y 二欄區塊的 .asc：{path}")
+    xs, ys = blocks["X"], blocks["Y"]
+    if xs.shape != ys.shape:
+        raise ValueError(f"X / Y 區塊點數不同 ({len(xs)} / {len(ys)})：{path}")
+    return xs[:, 0], xs[:, 1], ys[:, 1]
+
+
+def _block(text: str, path) -> np.ndarray:
+    a = np.array(text.split(), dtype=float)
+    if a.size % 2:
+        raise ValueError(f"資料欄數不是 2：{path}")
+    return a.reshape(-1, 2)
@@ -0,0 +1,277 @@
+# catalog.py
+# ---------------------------------------------------------------------------
+#  .asc 平均檔目錄索引 (SQLite)
+#  ---------------------------
+#  · Catalog(db)：登記根目錄 (例如各次實驗的 backup 資料夾)，索引底下所有 .asc：
+#      能量範圍、點數、掃描次數 (檔名 <N>.asc)、參數、mtime
+#    參數取自同資料夾中該檔之前最後建立的 .trraw 標頭 (配方 / lock-in 設定)
+#  · refresh()：只重讀 mtime / 大小變了的檔，已不存在的刪除；解析以執行緒池平行
+#    (瓶頸多在網路磁碟延遲，執行緒即可)
+#  · query()：依資料夾、能量範圍 (有重疊)、時間、掃描次數篩選
+#  · load_stack(paths)：平行讀入多個檔 → (ev, X, Y)，X / Y 形狀 (檔數, 點數)；
+#    能量軸不同時內插到共同網格 (預設第一個檔的網格，範圍外 NaN)
+#
+#  命令列 (repo 根目錄)：
+#    python -m models.catalog refresh backup D:/data/2025
+#    python -m models.catalog list [--dir 2025] [--ev 1.9:2.1] [--since 2025-01-01]
+#    python -m models.catalog stack out.npz [篩選同 list]
+# ---------------------------------------------------------------------------
+
+import glob
+import json
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models.asc_io import read_asc
+from models.raw_store import SUFFIX as RAW_SUFFIX, read_header
+
+DEFAULT_DB = "asc_catalog.sqlite"
+WORKERS = 8
+_SCANS = re.compile(r"(\d+)\.asc$", re.I)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (path TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS spectra (
+    path     TEXT PRIMARY KEY,
+    dir      TEXT NOT NULL,
+    name     TEXT NOT NULL,
+    mtime    REAL NOT NULL,
+    size     INTEGER NOT NULL,
+    n_points INTEGER,
+    ev_min   REAL,
+    ev_max   REAL,
+    scans    INTEGER,
+    params   TEXT,
+    error    TEXT
+);
+CREATE INDEX IF NOT EXISTS spectra_dir   ON spectra(dir);
+CREATE INDEX IF NOT EXISTS spectra_mtime ON spectra(mtime);
+"""
+
+
+class Catalog:
+    def __init__(self, path: str = DEFAULT_DB) -> None:
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    # ------------------------------- 根目錄 --------------------------------
+    @property
+    def roots(self) -> List[str]:
+        return [r["path"] for r in self._db.execute("SELECT path FROM roots ORDER BY path")]
+
+    def add_root(self, path: str) -> None:
+        with self._db:
+            self._db.execute("INSERT OR IGNORE INTO roots VALUES (?)", (os.path.abspath(path),))
+
+    def remove_root(self, path: str) -> None:
+        path = os.path.abspath(path)
+        with self._db:
+            self._db.execute("DELETE FROM roots WHERE path = ?", (path,))
+            gone = [r["path"] for r in self._db.execute("SELECT path FROM spectra")
+                    if _under(r["path"], [path]) and not _under(r["path"], self.roots)]
+            self._db.executemany("DELETE FROM spectra WHERE path = ?", [(p,) for p in gone])
+
+    # ------------------------------- 索引 ---------------------------------
+    def refresh(self, roots: Optional[Iterable[str]] = None,
+                workers: int = WORKERS) -> Tuple[int, int, int]:
+        """roots=None → 已登記的根目錄 (傳入的會一併登記)；回傳 (新增 / 更新, 未變, 刪除)"""
+        if roots is not None:
+            for r in roots:
+                self.add_root(r)
+        roots = self.roots
+        known = {r["path"]: (r["mtime"], r["size"])
+                 for r in self._db.execute("SELECT path, mtime, size FROM spectra")}
+        seen, todo = set(), []
+        for root in roots:
+            for dirpath, _, files in os.walk(root):
+                for fn in files:
+                    if not fn.lower().endswith(".asc"):
+                        continue
+                    p = os.path.join(dirpath, fn)
+                    try:
+                        st = os.stat(p)
+                    except OSError:                     # 剛好被 FIFO 刪掉
+                        continue
+                    seen.add(p)
+                    if known.get(p) != (st.st_mtime, st.st_size):
+                        todo.append((p, st.st_mtime, st.st_size))
+        gone = [p for p in known if p not in seen]
+
+        with ThreadPoolExecutor(workers) as ex:
+            rows = list(ex.map(_index_file, todo))
+        raws = {}                                       # 資料夾 → .trraw 標頭 (同一次只讀一遍)
+        for row in rows:
+            if row["error"] is None:
+                row["params"] = _params(row["dir"], row["mtime"], raws)
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO spectra VALUES (:path, :dir, :name, :mtime, :size, "
+                ":n_points, :ev_min, :ev_max, :scans, :params, :error)", rows)
+            self._db.executemany("DELETE FROM spectra WHERE path = ?", [(p,) for p in gone])
+        return len(todo), len(seen) - len(todo), len(gone)
+
+    # ------------------------------- 查詢 ---------------------------------
+    def query(self, dir: Optional[str] = None, ev: Optional[Tuple[float, float]] = None,
+              since: Optional[float] = None, until: Optional[float] = None,
+              min_scans: Optional[int] = None) -> List[dict]:
+        """dir：資料夾路徑含此字串；ev=(lo, hi)：能量範圍有重疊；since / until：mtime (epoch s)"""
+        where, args = ["error IS NULL"], []
+        if dir:
+            where.append("dir LIKE ?"); args.append(f"%{dir}%")
+        if ev is not None:
+            lo, hi = sorted(ev)
+            where.append("ev_max >= ? AND ev_min <= ?"); args += [lo, hi]
+        if since is not None:
+            where.append("mtime >= ?"); args.append(since)
+        if until is not None:
+            where.append("mtime <= ?"); args.append(until)
+        if min_scans is not None:
+            where.append("scans >= ?"); args.append(min_scans)
+        cur = self._db.execute(
+            f"SELECT * FROM spectra WHERE {' AND '.join(where)} ORDER BY dir, mtime", args)
+        return [_row(r) for r in cur]
+
+    def errors(self) -> List[Tuple[str, str]]:
+        """讀不進來的檔 (path, 錯誤訊息)"""
+        return [(r["path"], r["error"])
+                for r in self._db.execute("SELECT path, error FROM spectra WHERE error IS NOT NULL")]
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM spectra").fetchone()[0]
+
+
+def load_stack(paths: Sequence[str], ev=None, workers: int = WORKERS):
+    """平行讀入 → (ev, X, Y)；ev=None 且各檔網格相同時直接堆疊，否則內插到 ev"""
+    with ThreadPoolExecutor(workers) as ex:
+        data = list(ex.map(read_asc, paths))
+    if not data:
+        return np.zeros(0), np.zeros((0, 0)), np.zeros((0, 0))
+    if ev is None:
+        ev = data[0][0]
+        if all(np.array_equal(e, ev) for e, _, _ in data):
+            return ev, np.vstack([x for _, x, _ in data]), np.vstack([y for _, _, y in data])
+    ev = np.asarray(ev, dtype=float)
+    return (ev, np.vstack([_interp(ev, e, x) for e, x, _ in data]),
+            np.vstack([_interp(ev, e, y) for e, _, y in data]))
+
+
+# ------------------------------ internals ---------------------------------
+def _index_file(job) -> dict:
+    path, mtime, size = job
+    m = _SCANS.search(os.path.basename(path))
+    row = dict(path=path, dir=os.path.dirname(path), name=os.path.basename(path),
+               mtime=mtime, size=size, n_points=None, ev_min=None, ev_max=None,
+               scans=int(m.group(1)) if m else None, params=None, error=None)
+    try:
+        ev, _, _ = read_asc(path)
+    except (OSError, ValueError) as e:
+        row["error"] = str(e)
+        return row
+    row["n_points"] = int(ev.size)
+    if not ev.size:
+        row["error"] = "沒有資料點"
+        return row
+    row["ev_min"], row["ev_max"] = float(ev.min()), float(ev.max())
+    return row
+
+
+def _params(d: str, mtime: float, cache: dict) -> Optional[str]:
+    """同資料夾中 mtime 之前最後建立的 .trraw 標頭 → JSON"""
+    if d not in cache:
+        hdrs = []
+        for p in glob.glob(os.path.join(d, "*" + RAW_SUFFIX)):
+            try:
+                h = read_header(p)
+            except (OSError, ValueError):
+                continue
+            hdrs.append((h.get("created", 0.0), os.path.basename(p), h))
+        cache[d] = sorted(hdrs, key=lambda t: t[0])
+    best = None
+    for created, name, h in cache[d]:
+        if created <= mtime + 1.0:
+            best = dict(raw=name, recipe=h.get("recipe"), lockin=h.get("lockin"))
+    return json.dumps(best, ensure_ascii=False) if best else None
+
+
+def _row(r: sqlite3.Row) -> dict:
+    d = dict(r)
+    d["params"] = json.loads(d["params"]) if d["params"] else None
+    return d
+
+
+def _under(path: str, root_list: Iterable[str]) -> bool:
+    for r in root_list:
+        try:
+            if os.path.commonpath([path, r]) == r:
+                return True
+        except ValueError:                              # Windows 不同磁碟機
+            pass
+    return False
+
+
+def _interp(ev: np.ndarray, e: np.ndarray, v: np.ndarray) -> np.ndarray:
+    order = np.argsort(e)                               # 掃描方向可能是遞減
+    return np.interp(ev, e[order], v[order], left=np.nan, right=np.nan)
+
+
+def _range(s: Optional[str]):
+    if not s:
+        return None
+    a, _, b = s.partition(":")
+    return float(a), float(b)
+
+
+def _date(s: Optional[str]) -> Optional[float]:
+    return time.mktime(time.strptime(s, "%Y-%m-%d")) if s else None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description=".asc 平均檔目錄索引")
+    ap.add_argument("cmd", choices=("refresh", "list", "stack"))
+    ap.add_argument("args", nargs="*", help="refresh：根目錄；stack：輸出 .npz")
+    ap.add_argument("--db", default=DEFAULT_DB)
+    ap.add_argument("--dir", help="資料夾路徑含此字串")
+    ap.add_argument("--ev", help="能量範圍，例如 1.9:2.1 (有重疊即列入)")
+    ap.add_argument("--since", help="YYYY-MM-DD")
+    ap.add_argument("--until", help="YYYY-MM-DD")
+    ap.add_argument("--min-scans", type=int)
+    args = ap.parse_args()
+    cat = Catalog(args.db)
+    if args.cmd == "refresh":
+        t0 = time.perf_counter()
+        n_new, n_same, n_gone = cat.refresh(args.args or None)
+        print(f"[catalog] 更新 {n_new}、未變 {n_same}、刪除 {n_gone} "
+              f"({time.perf_counter() - t0:.2f} s，共 {len(cat)} 檔)")
+        for p, err in cat.errors():
+            print(f"[catalog] 讀取失敗 {p}: {err}")
+    else:
+        rows = cat.query(args.dir, _range(args.ev), _date(args.since), _date(args.until),
+                         args.min_scans)
+        if args.cmd == "list":
+            for r in rows:
+                print(f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(r['mtime']))}  "
+                      f"{r['ev_min']:.4f}–{r['ev_max']:.4f} eV  {r['n_points']:5d} 點  "
+                      f"{r['scans'] if r['scans'] is not None else '-':>5}  {r['path']}")
+            print(f"[catalog] {len(rows)} 檔")
+        else:
+            if not args.args:
+                ap.error("stack 需要輸出檔名")
+            paths = [r["path"] for r in rows]
+            t0 = time.perf_counter()
+            ev, x, y = load_stack(paths)
+            np.savez(args.args[0], ev=ev, x=x, y=y, paths=np.array(paths))
+            print(f"[SAVE] {args.args[0]} ({len(paths)} 檔 × {ev.size} 點，"
+                  f"{time.perf_counter() - t0:.2f} s)")
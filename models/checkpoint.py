@@ -0,0 +1,179 @@
+# checkpoint.py
+# ---------------------------------------------------------------------------
+#  掃描 write-ahead checkpoint (<save_dir>/checkpoint.jsonl)
+#  ----------------------------------------------------
+#  每行一筆 JSON，只 append：
+#    {"t": "plan",   recipe, lockin, raw_path, ev_arr, idx_arr, weight, repeat, serpentine}
+#    {"t": "resume"}                     續掃接在同一檔後面
+#    {"t": "move",   "to": idx}          即將移動 (之後沒有 pt → 中斷時馬達在半路)
+#    {"t": "pt",     run, k, idx, ev, x, y, edc, n, x_se, y_se, weight}
+#    {"t": "grid",   ev_arr, idx_arr, weight}   自適應第 1 輪完成後的網格
+#    {"t": "run",    run, ev, x, y}      整輪完成 (能量順序)
+#    {"t": "end",    completed, pos}     正常結束 / 中斷 / 錯誤，pos = 馬達 idx
+#
+#  · 每筆 flush；plan / grid / run / end 與距上次超過 FSYNC_S 時 fsync
+#  · ScanCheckpoint(path) 讀回：已完成的輪、目前這輪量過的點、馬達最後位置；
+#    最後一行寫到一半 (當機) 直接忽略
+#  · 續掃時 ScanEngine(start_run=ck.start_run, done=ck.partial) 從下一點接著量
+#  · 馬達位置只能以 S<idx> 同步到整數 idx；停在脈衝 (小數 idx) 上時續掃會有
+#    不到 0.5 idx 的偏移，呼叫端應提示
+# ---------------------------------------------------------------------------
+
+import json
+import os
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+from models.engine import ScanPlan, ScanSink
+from models.raw_store import json_default
+
+CKPT_NAME = "checkpoint.jsonl"
+FSYNC_S = 1.0
+
+
+def checkpoint_path(save_dir: str) -> str:
+    return os.path.join(save_dir, CKPT_NAME)
+
+
+def motor_idx(motor) -> float:
+    """馬達目前位置 (脈衝解析度的小數 idx)"""
+    pulse = getattr(motor, "pulse", None)
+    return pulse / motor.PULSE_PER_IDX if pulse is not None else motor.position
+
+
+class CheckpointSink(ScanSink):
+    """
+    · header：另外寫進 plan 紀錄的鍵 (recipe、lockin、raw_path…)
+    · resume=True → 接在既有檔後面，不重寫 plan
+    · position_fn：結束時讀馬達位置 (None = 不記錄)
+    """
+
+    def __init__(self, path: str, plan: ScanPlan, header: Optional[dict] = None,
+                 resume: bool = False, position_fn: Optional[Callable[[], float]] = None) -> None:
+        self.plan = plan
+        self.position_fn = position_fn
+        self._grid_n = len(plan)
+        self._run = None
+        self._t_sync = 0.0
+        self._f = open(path, "a" if resume else "w", encoding="utf-8")
+        if resume:
+            self._write({"t": "resume"}, sync=True)
+        else:
+            self._write(dict(t="plan", **(header or {}), **_grid(plan),
+                             repeat=plan.repeat, serpentine=plan.serpentine), sync=True)
+
+    # ------------------------------ ScanSink ------------------------------
+    def on_move(self, idx) -> None:
+        self._write({"t": "move", "to": idx})
+
+    def on_point(self, item) -> None:
+        ev, x_n, y_n, edc, meta = item
+        self._run = meta.get("run", 0)
+        self._write(dict(t="pt", run=self._run, k=meta.get("k"), idx=meta.get("idx"),
+                         ev=ev, x=x_n, y=y_n, edc=edc, n=meta.get("n", 1),
+                         x_se=meta.get("x_se"), y_se=meta.get("y_se"), weight=meta.get("weight", 1)))
+
+    def on_run(self, ev_arr, x_arr, y_arr) -> None:
+        if len(self.plan) != self._grid_n:                  # 自適應輪把網格縮小了
+            self._grid_n = len(self.plan)
+            self._write(dict(t="grid", **_grid(self.plan)))
+        self._write(dict(t="run", run=self._run, ev=ev_arr, x=x_arr, y=y_arr), sync=True)
+
+    def on_finish(self, completed: bool) -> None:
+        pos = None
+        if self.position_fn is not None:
+            try:
+                pos = self.position_fn()
+            except Exception:  # noqa: broad-except
+                pass
+        self._write({"t": "end", "completed": completed, "pos": pos}, sync=True)
+        self._f.close()
+
+    # ------------------------------ internals -----------------------------
+    def _write(self, rec: dict, sync: bool = False) -> None:
+        self._f.write(json.dumps(rec, default=json_default) + "\n")
+        self._f.flush()
+        now = time.monotonic()
+        if sync or now - self._t_sync >= FSYNC_S:
+            os.fsync(self._f.fileno())
+            self._t_sync = now
+
+
+class ScanCheckpoint:
+    """
+    · header   ：plan 紀錄 (recipe、lockin、raw_path…)
+    · plan     ：最新網格的 ScanPlan
+    · runs     ：已完成各輪 [(ev, x, y), …]；start_run = len(runs)
+    · partial  ：第 start_run 輪已量過的 {k: (x/edc, y/edc)}
+    · position ：馬達最後確定的 idx；中斷於移動途中則為 None，moving = (從, 到)
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.header = None
+        self.runs = []
+        self.partial = {}
+        self.position = None
+        self.moving = None
+        self.completed = False
+        grid = None
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    r = json.loads(line)
+                except ValueError:
+                    break                               # 寫到一半的最後一行
+                t = r.get("t")
+                if t == "plan":
+                    self.header, grid = r, r
+                elif t == "grid":
+                    grid = r
+                elif t == "resume":
+                    self.completed = False
+                elif t == "move":
+                    self.moving = (self.position, r["to"])
+                elif t == "pt":
+                    self.position, self.moving = r["idx"], None
+                    if r["run"] == len(self.runs):
+                        self.partial[r["k"]] = (r["x"], r["y"])
+                elif t == "run":
+                    self.runs.append((np.asarray(r["ev"]), np.asarray(r["x"]), np.asarray(r["y"])))
+                    self.partial = {}
+                elif t == "end":
+                    self.completed = bool(r["completed"])
+                    if r.get("pos") is not None:
+                        self.position, self.moving = r["pos"], None
+        if self.header is None:
+            raise ValueError(f"checkpoint 缺少 plan 紀錄：{path}")
+        if self.moving is not None:
+            self.position = None
+        self.plan = ScanPlan(grid["ev_arr"], grid["idx_arr"], self.header["repeat"],
+                             self.header["serpentine"], grid["weight"])
+
+    @property
+    def start_run(self) -> int:
+        return len(self.runs)
+
+    @property
+    def resumable(self) -> bool:
+        return not self.completed and self.start_run < self.plan.repeat
+
+    def summary(self) -> str:
+        left = len(self.plan) - len(self.partial)
+        return (f"已完成 {self.start_run}/{self.plan.repeat} 輪，"
+                f"第 {self.start_run + 1} 輪已量 {len(self.partial)} 點、剩 {left} 點")
+
+
+def load_checkpoint(save_dir: str) -> Optional[ScanCheckpoint]:
+    """save_dir 內可續掃的 checkpoint；沒有 / 已完成回傳 None (格式錯誤 raise ValueError)"""
+    path = checkpoint_path(save_dir)
+    if not os.path.exists(path):
+        return None
+    ck = ScanCheckpoint(path)
+    return ck if ck.resumable else None
+
+
+def _grid(plan: ScanPlan) -> dict:
+    return dict(ev_arr=plan.ev_arr, idx_arr=plan.idx_arr, weight=plan.weight)
@@ -0,0 +1,251 @@
+# engine.py
+# ---------------------------------------------------------------------------
+#  逐點掃描引擎 (不依賴 Qt)
+#  ----------------------
+#  ScanPlan (能量 / idx 網格、輪數) 進，點與整輪結果出；輸出交給 sink：
+#
+#    sink.on_move(idx)                   即將移動 (checkpoint 用來判斷中斷時馬達位置)
+#    sink.on_point(item)                 item = (ev, x/edc, y/edc, edc, meta)
+#    sink.on_run(ev_arr, x_arr, y_arr)   一輪完成 (已排回能量順序)
+#    sink.on_error(msg)                  EDC = 0 / 馬達錯誤，掃描隨即中止
+#    sink.on_finish(completed)           結束 (completed=False：中斷或錯誤)
+#
+#  ScanSink 提供空實作，子類只覆寫需要的方法。
+#
+#  網格以馬達脈衝為解析度 (idx 可為小數)，ev_arr 是該脈衝的實際能量；
+#  步距小於一個脈衝時多個網格點會落在同一位置 → 合併 (weight > 1，停留加長)
+#  或錯開到相鄰脈衝，見 ScanPlan.from_energy / snap_pulses。
+#  GUI 由 workers.ScanWorker 包裝 (QThread + PointBuffer)，
+#  無頭掃描見 views/scan_cli.py。
+# ---------------------------------------------------------------------------
+
+import time
+from concurrent.futures import CancelledError
+from typing import Callable, Iterable, Optional, Sequence
+
+import numpy as np
+
+from models.acquire import MIN_POLL_S, Dwell, Settler
+from models.planner import AdaptivePlanner
+
+HC_EV_NM = 1239.84193
+PULSE_PER_IDX = 10            # 同 MotorArduino.PULSE_PER_IDX
+COLLAPSE_MODES = ("merge", "shift")
+
+
+def snap_pulses(pulse, collapse: str = "merge"):
+    """單調的目標脈衝序列 → (不重複的脈衝, weight)
+    · merge：連續相同的脈衝併成一點，weight = 併入的網格點數
+    · shift：沿掃描方向把重複的點往後推到下一個空脈衝 (weight 全為 1)"""
+    pulse = np.asarray(pulse, dtype=np.int64)
+    if collapse == "merge":
+        keep = np.r_[True, np.diff(pulse) != 0]
+        starts = np.flatnonzero(keep)
+        return pulse[keep], np.diff(np.r_[starts, pulse.size])
+    if collapse == "shift":
+        d = 1 if pulse[-1] >= pulse[0] else -1
+        k = np.arange(pulse.size)
+        q = np.maximum.accumulate(d * pulse - k) + k      # 最小平移使嚴格遞增
+        return d * q, np.ones(pulse.size, dtype=int)
+    raise ValueError(f"collapse 需為 {' / '.join(COLLAPSE_MODES)}：{collapse!r}")
+
+
+class ScanPlan:
+    """能量網格與對應馬達 idx (可為小數)；serpentine=True 時奇數輪反向走
+    weight：每點代表幾個原始網格點 (合併時 > 1，該點停留時間依此加長)"""
+
+    def __init__(self, ev_arr, idx_arr: Sequence[float], repeat: int = 1,
+                 serpentine: bool = False, weight=None) -> None:
+        self.ev_arr = np.asarray(ev_arr, dtype=float)
+        self.idx_arr = list(idx_arr)
+        if len(self.idx_arr) != self.ev_arr.size:
+            raise ValueError("ev_arr 與 idx_arr 長度不同")
+        self.weight = (np.ones(self.ev_arr.size, dtype=int) if weight is None
+                       else np.asarray(weight, dtype=int))
+        if self.weight.size != self.ev_arr.size:
+            raise ValueError("weight 與 ev_arr 長度不同")
+        self.repeat = int(repeat)
+        self.serpentine = serpentine
+
+    @classmethod
+    def from_energy(cls, mapper, ev_start: float, ev_end: float, step: float,
+                    repeat: int = 1, serpentine: bool = False, collapse: str = "merge",
+                    pulse_per_idx: int = PULSE_PER_IDX) -> "ScanPlan":
+        """與控制頁 start_scan 相同的網格規則，定位到最近的脈衝，ev_arr 為該脈衝的
+        實際能量；重疊點依 collapse 處理 (snap_pulses)。超出校正範圍 raise ValueError"""
+        step = abs(step) or 0.01
+        if ev_end < ev_start:
+            step = -step
+        ev_arr = np.arange(ev_start, ev_end + step / 2, step)
+        if ev_arr.size == 0:
+            raise ValueError("請確認起迄能量與步距")
+        pulse = np.rint(mapper.idx_from_nm(HC_EV_NM / ev_arr) * pulse_per_idx)
+        pulse, weight = snap_pulses(pulse, collapse)
+        idx = pulse / pulse_per_idx
+        try:
+            ev_true = HC_EV_NM / mapper.nm_from_idx(idx)
+        except ValueError as e:                 # 只有 shift 會推出範圍
+            raise ValueError(f"錯開重疊點後超出校正範圍 (步距小於脈衝解析度，請改用合併)：{e}") from None
+        return cls(ev_true, idx.tolist(), repeat, serpentine, weight)
+
+    @property
+    def merged(self) -> int:
+        """被併掉的網格點數"""
+        return int(self.weight.sum() - self.weight.size)
+
+    def __len__(self) -> int:
+        return self.ev_arr.size
+
+
+class ScanSink:
+    def on_move(self, idx) -> None: ...
+    def on_point(self, item) -> None: ...
+    def on_run(self, ev_arr, x_arr, y_arr) -> None: ...
+    def on_error(self, msg: str) -> None: ...
+    def on_finish(self, completed: bool) -> None: ...
+
+
+class ScanEngine:
+    """
+    · run() 阻塞執行整個計畫，回傳 True = 全部輪數完成
+    · stop()：回傳 True 即中止 (QThread.isInterruptionRequested / Event.is_set)
+    · planner 不為 None 時第 1 輪自適應細化，之後各輪沿用細化後的網格
+      (self.plan 會被縮成實際量過的點)
+    · 續掃：start_run = 從第幾輪開始 (輪號照舊)，done = 該輪已量過的
+      {網格索引 k: (x/edc, y/edc)}，只補量其餘的點；自適應輪中斷則整輪重來
+    """
+
+    def __init__(self, lockin, motor, plan: ScanPlan, settler: Optional[Settler] = None,
+                 dwell: Optional[Dwell] = None, planner: Optional[AdaptivePlanner] = None,
+                 sinks: Iterable[ScanSink] = (), stop: Callable[[], bool] = lambda: False,
+                 start_run: int = 0, done: Optional[dict] = None) -> None:
+        self.lockin = lockin
+        self.motor = motor
+        self.plan = plan
+        self.settler = settler or Settler(lockin)
+        self.dwell = dwell             # None = 每點單次讀值
+        self.planner = planner         # None = 均勻網格
+        self.sinks = list(sinks)
+        self.stop = stop
+        self.start_run = start_run
+        self.done = dict(done or {})
+        self._t0 = time.perf_counter()
+        self._run = start_run
+
+    def run(self) -> bool:
+        done = self._run_all()
+        for s in self.sinks:
+            s.on_finish(done)
+        return done
+
+    # ------------------------------ internals -----------------------------
+    def _run_all(self) -> bool:
+        self._t0 = time.perf_counter()      # 計時欄位的零點
+        for run in range(self.start_run, self.plan.repeat):
+            if self.stop():
+                return False
+            self._run = run
+            if run == 0 and self.planner is not None:
+                if not self._adaptive_pass():
+                    return False
+                continue
+            order = list(range(len(self.plan)))
+            if self.plan.serpentine and run % 2:
+                order.reverse()
+            got = self.done if run == self.start_run else {}
+            todo = [k for k in order if k not in got]
+            res = self._scan(todo)
+            if res is None:
+                return False
+            got = {**got, **dict(zip(todo, zip(*res)))}
+            # 依網格索引排回原能量順序 (反向輪 / 續掃補量的點)，平均時才能逐點對齊
+            self._emit_run(self.plan.ev_arr.copy(), np.array([got[k][0] for k in range(len(self.plan))]),
+                           np.array([got[k][1] for k in range(len(self.plan))]))
+        return True
+
+    def _adaptive_pass(self) -> bool:
+        """粗掃 + 逐次細化；完成後把網格縮成實際量過的點，後續各輪沿用"""
+        got = {}
+        batch = self.planner.coarse()
+        while batch:
+            res = self._scan(batch)
+            if res is None:
+                return False
+            got.update(zip(batch, zip(*res)))
+            keys = sorted(got)
+            batch = self.planner.refine(keys, [got[k][0] for k in keys], [got[k][1] for k in keys])
+        keys = sorted(got)
+        self.plan.idx_arr = [self.plan.idx_arr[k] for k in keys]
+        self.plan.ev_arr = self.plan.ev_arr[keys]
+        self.plan.weight = self.plan.weight[keys]
+        self._emit_run(self.plan.ev_arr.copy(), np.asarray([got[k][0] for k in keys]),
+                       np.asarray([got[k][1] for k in keys]))
+        return True
+
+    def _scan(self, order):
+        """依 order (網格索引) 逐點量測；回傳 (xs, ys) 依走訪順序，中斷 / 錯誤回傳 None"""
+        xs, ys = [], []
+        for k in order:
+            idx, ev, w = self.plan.idx_arr[k], self.plan.ev_arr[k], int(self.plan.weight[k])
+            for s in self.sinks:
+                s.on_move(idx)
+            tm0 = time.perf_counter()
+            try:
+                self.motor.goto(idx)
+            except CancelledError:          # stop_scan 取消了排隊中的移動
+                return None
+            except Exception as e:  # noqa: broad-except
+                self._error(f"{ev:.3f} eV: {e}; aborted")
+                return None
+            tm1 = time.perf_counter()
+            t_ack = getattr(self.motor, "last_ack_t", 0.0)
+            if self.stop():
+                return None
+            first, settle_s = self.settler.settle(self.stop)
+            if self.stop():
+                return None
+            meta = {"ev": ev, "idx": idx, "k": k, "settle_s": settle_s, "run": self._run,
+                    "t_move0": tm0 - self._t0, "t_move1": tm1 - self._t0,
+                    "t_ack": t_ack - self._t0 if t_ack >= tm0 else float("nan"),
+                    "query_s": self.settler.last_query_s, "weight": w}
+            if self.dwell is not None:
+                m = self.dwell.scaled(w).measure(first, self.stop)
+                x_n, y_n, edc = m.pop("x"), m.pop("y"), m.pop("edc")
+                meta.update(m)
+            elif w > 1:
+                x_n, y_n, edc, m = self._repeat_reads(first, w)
+                meta.update(m)
+            else:
+                x, y, edc = first
+                x_n, y_n = (x / edc, y / edc) if edc else (0.0, 0.0)
+                meta.update(n=1, x_se=float("nan"), y_se=float("nan"))
+            if edc == 0:
+                self._error(f"{ev:.3f} eV: EDC = 0; aborted")
+                return None
+            xs.append(x_n)
+            ys.append(y_n)
+            meta["t_wall"] = time.time()
+            item = (ev, x_n, y_n, edc, meta)
+            for s in self.sinks:
+                s.on_point(item)
+        return xs, ys
+
+    def _repeat_reads(self, first, w: int):
+        """無 Dwell 的合併點：再讀 w-1 筆 (間隔 τ) 一起平均"""
+        t0 = time.perf_counter()
+        blk = self.lockin.read_xyz_block(w - 1, max(self.lockin.tau_s, MIN_POLL_S))[:, 1:]
+        r = np.vstack([first, blk])
+        m = dict(n=w, dwell_s=time.perf_counter() - t0)
+        if (r[:, 2] == 0).any():
+            return 0.0, 0.0, 0.0, m
+        xn, yn = r[:, 0] / r[:, 2], r[:, 1] / r[:, 2]
+        m.update(x_se=float(xn.std(ddof=1) / np.sqrt(w)), y_se=float(yn.std(ddof=1) / np.sqrt(w)))
+        return float(xn.mean()), float(yn.mean()), float(r[:, 2].mean()), m
+
+    def _emit_run(self, ev_arr, x_arr, y_arr) -> None:
+        for s in self.sinks:
+            s.on_run(ev_arr, x_arr, y_arr)
+
+    def _error(self, msg: str) -> None:
+        for s in self.sinks:
+            s.on_error(msg)
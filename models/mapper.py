@@ -23,6 +23,7 @@ class Mapper:
     """
     · 載入 / 更新校正點 (idx ↔ nm)
     · 內部使用 numpy 內插；點 <2 會 raise ValueError
+    · nm_from_idx / idx_from_nm 接受純量或陣列；範圍與反查表載入時快取
     """
 
     def __init__(self, csv_path: pathlib.Path = DEFAULT_PATH) -> None:
@@ -46,19 +47,29 @@ class Mapper:
         self._save_csv()
 
     # -------------------------------- API ---------------------------------
-    def nm_from_idx(self, idx: float) -> float:
-        """輸入 idx (float 可)，回傳波長 nm；範圍外 raise ValueError"""
+    def nm_from_idx(self, idx):
+        """輸入 idx (純量或陣列)，回傳 nm (同形狀)；任一點超出範圍 raise ValueError"""
         self._assert_ready()
-        if idx < self.idx_arr.min() or idx > self.idx_arr.max():
-            raise ValueError("idx 超出校正範圍")
-        return float(np.interp(idx, self.idx_arr, self.nm_arr))
+        x = np.asarray(idx, dtype=float)
+        self._check_range(x, self._idx_lo, self._idx_hi, "idx")
+        return self._out(np.interp(x, self.idx_arr, self.nm_arr))
 
-    def idx_from_nm(self, nm: float) -> float:
-        """輸入波長 nm，回傳 idx；範圍外 raise ValueError"""
+    def idx_from_nm(self, nm):
+        """輸入 nm (純量或陣列)，回傳 idx (同形狀)；任一點超出範圍 raise ValueError"""
         self._assert_ready()
-        if nm < self.nm_arr.min() or nm > self.nm_arr.max():
-            raise ValueError("nm 超出校正範圍")
-        return float(np.interp(nm, self.nm_arr, self.idx_arr))
+        if not self._monotone:
+            raise ValueError("校正表 nm 隨 idx 非單調 (有折返或重複)，無法由 nm 反查 idx")
+        x = np.asarray(nm, dtype=float)
+        self._check_range(x, self._nm_lo, self._nm_hi, "nm")
+        return self._out(np.interp(x, self._nm_sorted, self._idx_by_nm))
+
+    @property
+    def idx_range(self):
+        return self._idx_lo, self._idx_hi
+
+    @property
+    def nm_range(self):
+        return self._nm_lo, self._nm_hi
 
     def add_point(self, idx: int, nm: float) -> None:
         """新增一點，再排序存檔"""
@@ -68,6 +79,7 @@ class Mapper:
         sort = self.idx_arr.argsort()
         self.idx_arr = self.idx_arr[sort]
         self.nm_arr = self.nm_arr[sort]
+        self._rebuild()
         self._save_csv()
         self.loaded = True
 
@@ -81,6 +93,7 @@ class Mapper:
             self.idx_arr = np.array([], dtype=float)
             self.nm_arr = np.array([], dtype=float)
             self.loaded = False
+            self._rebuild()
             return
         idx_list: List[float] = []
         nm_list: List[float] = []
@@ -92,9 +105,11 @@ class Mapper:
                     nm_list.append(float(row["nm"]))
                 except (KeyError, ValueError):
                     continue
-        self.idx_arr = np.array(idx_list, dtype=float)
-        self.nm_arr = np.array(nm_list, dtype=float)
+        sort = np.argsort(idx_list, kind="stable")     # 檔案不一定依 idx 排序
+        self.idx_arr = np.array(idx_list, dtype=float)[sort]
+        self.nm_arr = np.array(nm_list, dtype=float)[sort]
         self.loaded = self.point_count() >= MIN_POINTS
+        self._rebuild()
 
     def _save_csv(self) -> None:
         with self.csv_path.open("w", newline="") as f:
@@ -102,6 +117,35 @@ class Mapper:
             writer.writerow(["idx", "nm"])
             writer.writerows(zip(self.idx_arr, self.nm_arr))
 
+    def _rebuild(self) -> None:
+        """快取範圍與反查表 (nm 遞增排序)；校正點變動後呼叫"""
+        if self.point_count() == 0:
+            self._idx_lo = self._idx_hi = self._nm_lo = self._nm_hi = np.nan
+            self._nm_sorted = self._idx_by_nm = self.nm_arr
+            self._monotone = False
+            return
+        self._idx_lo, self._idx_hi = float(self.idx_arr[0]), float(self.idx_arr[-1])
+        self._nm_lo, self._nm_hi = float(self.nm_arr.min()), float(self.nm_arr.max())
+        d = np.diff(self.nm_arr)
+        self._monotone = bool(np.all(d > 0) or np.all(d < 0))
+        order = np.argsort(self.nm_arr)
+        self._nm_sorted = self.nm_arr[order]
+        self._idx_by_nm = self.idx_arr[order]
+
+    @staticmethod
+    def _check_range(x: np.ndarray, lo: float, hi: float, what: str) -> None:
+        bad = ~((x >= lo) & (x <= hi))                # NaN 也算超出
+        if bad.any():
+            vals = np.atleast_1d(x)[np.atleast_1d(bad)]
+            shown = ", ".join(f"{v:g}" for v in vals[:8])
+            if vals.size > 8:
+                shown += f" … (共 {vals.size} 點)"
+            raise ValueError(f"{what} 超出校正範圍 [{lo:g}, {hi:g}]：{shown}")
+
+    @staticmethod
+    def _out(a: np.ndarray):
+        return float(a) if a.ndim == 0 else a
+
     def _assert_ready(self) -> None:
         if self.point_count() < MIN_POINTS:
             raise ValueError("校正點不足 (至少需要 2 點)")
@@ -0,0 +1,203 @@
+# persist.py
+# ---------------------------------------------------------------------------
+#  背景寫檔執行緒
+#  --------------
+#  GUI / 掃描執行緒只把工作丟進有界佇列，格式化、寫檔、刪舊檔都在這裡做：
+#
+#    · save_asc(path, ev, x, y, keep)：先寫 <path>.tmp，再 os.replace 成正式檔
+#      (中途當機只會留下 .tmp，不會有寫一半的 .asc)；keep > 0 時加入 FIFO，
+#      超過 keep 個就刪最舊的 (同控制頁「保留自動存檔數量」)
+#    · track(paths)：續掃時把資料夾裡已存在的 <N>.asc (numbered_asc) 排進 FIFO，
+#      之後照常輪替，舊檔不會永遠留著
+#    · call(fn, *args, sync=f, merge=False)：任意工作 (例如 RawWriter.append)；
+#      sync 為有 fileno() 的物件時，該批結束一起 fsync
+#    · 批次 fsync：一次取出佇列內所有工作，全部寫完後才逐一 fsync + rename，
+#      最後 fsync 資料夾一次；慢速網路磁碟上一批只等一次
+#    · 佇列滿 → 不阻塞呼叫端 (GUI 執行緒會凍結)：工作改排在溢位清單，寫檔執行緒
+#      下一批一起取走，順序不變、不丟資料；on_backpressure(排隊數) 通知。
+#      merge=True 的 call (fn(items) 形式，例如 raw / timing append) 在溢位中
+#      與前一筆同 fn 的工作併成一次呼叫，磁碟很慢時清單也不會一筆筆變長
+#    · 完成 / 錯誤只以 callback 通知 (on_saved / on_deleted / on_error)，
+#      在寫檔執行緒呼叫；Qt 端見 workers.WriterSignals
+# ---------------------------------------------------------------------------
+
+import os
+import queue
+import re
+import threading
+from collections import deque
+from typing import Callable, Iterable, List, Optional
+
+import numpy as np
+
+from models.asc_io import write_asc
+
+_STOP = object()
+_NUMBERED = re.compile(r"(\d+)\.asc$", re.I)
+
+
+def _noop(*_a) -> None:
+    pass
+
+
+class FileWriter:
+    def __init__(self, maxsize: int = 32,
+                 on_saved: Callable[[str], None] = _noop,
+                 on_deleted: Callable[[str], None] = _noop,
+                 on_error: Callable[[str], None] = _noop,
+                 on_backpressure: Callable[[int], None] = _noop) -> None:
+        self.on_saved, self.on_deleted = on_saved, on_deleted
+        self.on_error, self.on_backpressure = on_error, on_backpressure
+        self.saved_files = deque()          # FIFO (只在寫檔執行緒存取)
+        self.n_backpressure = 0
+        self._overflow = deque()            # 佇列滿時的後續工作 (依序)
+        self._lock = threading.Lock()
+        self._q: "queue.Queue" = queue.Queue(maxsize)
+        self._thread = threading.Thread(target=self._loop, name="file-writer", daemon=True)
+        self._thread.start()
+
+    # -------------------------------- API ---------------------------------
+    def save_asc(self, path: str, ev, x, y, keep: int = 0) -> None:
+        # 先複製：呼叫端的累積器之後還會更新
+        self._put(("asc", path, np.array(ev, dtype=float), np.array(x, dtype=float),
+                   np.array(y, dtype=float), keep))
+
+    def track(self, paths: Iterable[str]) -> None:
+        """已在磁碟上的自動存檔 (舊 → 新) 排到 FIFO 最前面"""
+        self.call(self._track, list(paths))
+
+    def call(self, fn: Callable, *args, sync=None, merge: bool = False) -> None:
+        """merge=True：fn 只收一個 list，溢位時可與前一筆同 fn 的工作合併"""
+        self._put(("call", fn, args, sync, merge))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等目前排隊的工作都寫完；回傳 False = 逾時 (會阻塞，勿在 GUI 執行緒呼叫)"""
+        done = threading.Event()
+        self.call(done.set)
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 10.0) -> None:
+        if self._thread.is_alive():
+            self._put(_STOP)
+            self._thread.join(timeout)
+
+    # ------------------------------ internals -----------------------------
+    def _put(self, job) -> None:
+        with self._lock:
+            if not self._overflow:                      # 有溢位時後續一律排溢位 (保持順序)
+                try:
+                    self._q.put_nowait(job)
+                    return
+                except queue.Full:
+                    pass
+            last = self._overflow[-1] if self._overflow else None
+            if (job is not _STOP and job[0] == "call" and job[4] and last is not None
+                    and last is not _STOP and last[0] == "call" and last[4]
+                    and last[1] == job[1] and last[3] == job[3]):
+                self._overflow[-1] = last[:2] + ((list(last[2][0]) + list(job[2][0]),),) + last[3:]
+            else:
+                self._overflow.append(job)
+            n = self._q.qsize() + len(self._overflow)
+        self.n_backpressure += 1
+        self.on_backpressure(n)
+
+    def _loop(self) -> None:
+        while True:
+            batch = [self._q.get()]
+            while True:                                 # 一次取完已排隊的工作
+                try:
+                    batch.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+            with self._lock:                            # 溢位的工作都比佇列裡的晚
+                batch.extend(self._overflow)
+                self._overflow.clear()
+            stop = any(j is _STOP for j in batch)
+            self._run_batch([j for j in batch if j is not _STOP])
+            if stop:
+                return
+
+    def _run_batch(self, batch) -> None:
+        pending, syncs = [], []                         # (tmp, path, keep)、待 fsync 的檔
+        for job in batch:
+            try:
+                if job[0] == "asc":
+                    _, path, ev, x, y, keep = job
+                    tmp = path + ".tmp"
+                    write_asc(tmp, ev, x, y)
+                    pending.append((tmp, path, keep))
+                else:
+                    _, fn, args, sync, _ = job
+                    fn(*args)
+                    if sync is not None and sync not in syncs:
+                        syncs.append(sync)
+            except Exception as e:  # noqa: broad-except
+                what = job[1] if job[0] == "asc" else getattr(job[1], "__qualname__", repr(job[1]))
+                self.on_error(f"{what}: {e}")
+        dirs = set()
+        for tmp, path, keep in pending:
+            try:
+                with open(tmp, "rb+") as f:
+                    os.fsync(f.fileno())
+                os.replace(tmp, path)
+            except OSError as e:
+                self.on_error(f"{path}: {e}")
+                continue
+            dirs.add(os.path.dirname(os.path.abspath(path)))
+            self.on_saved(path)
+            if keep > 0:
+                self._rotate(path, keep)
+        for s in syncs:
+            try:
+                os.fsync(s.fileno())
+            except (OSError, ValueError):               # 已關閉
+                pass
+        for d in dirs:
+            _fsync_dir(d)
+
+    def _track(self, paths: List[str]) -> None:
+        self.saved_files.extendleft(reversed([p for p in paths if p not in self.saved_files]))
+
+    def _rotate(self, path: str, keep: int) -> None:
+        if path in self.saved_files:                    # 同名覆寫不重複計
+            self.saved_files.remove(path)
+        self.saved_files.append(path)
+        while len(self.saved_files) > keep:
+            old = self.saved_files.popleft()
+            try:
+                os.remove(old)
+                self.on_deleted(old)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                self.on_error(f"{old}: {e}")
+
+
+def numbered_asc(d: str, upto: Optional[int] = None) -> List[str]:
+    """d 裡的自動存檔 <N>.asc，依 N 由小到大；upto：只取 N <= upto"""
+    try:
+        names = os.listdir(d)
+    except OSError:
+        return []
+    found = []
+    for fn in names:
+        m = _NUMBERED.fullmatch(fn)
+        if m and (upto is None or int(m.group(1)) <= upto):
+            found.append((int(m.group(1)), os.path.join(d, fn)))
+    return [p for _, p in sorted(found)]
+
+
+def _fsync_dir(d: str) -> None:
+    """rename 本身也要落盤；Windows 無法開資料夾 fsync，略過"""
+    if os.name == "nt":
+        return
+    try:
+        fd = os.open(d, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -0,0 +1,58 @@
+# planner.py
+# ---------------------------------------------------------------------------
+#  自適應能量網格
+#  --------------
+#  以使用者設定的最小步距建立細網格 (索引 0…n-1)，只量其中一部分：
+#
+#    1. coarse()：每 coarse_every 個細點取一點 (含頭尾) 先掃一遍
+#    2. refine()：相鄰已量點之間若 ΔR/R 變化量或曲率超過門檻，插入中點
+#    3. 重複 2 直到沒有需要細化的區間，或區間已是最小步距
+#
+#  門檻 = tol × 粗掃時的訊號跨度 (固定，不隨細化縮小，細化必定收斂)
+# ---------------------------------------------------------------------------
+
+import numpy as np
+from typing import List, Sequence
+
+
+class AdaptivePlanner:
+    """
+    · 只處理細網格上的「索引」，能量 / idx 對應由呼叫端保留
+    · refine() 回傳下一批要量的索引 (已排序)；空 list 表示完成
+    """
+
+    def __init__(self, n_points: int, coarse_every: int, tol: float = 0.05) -> None:
+        self.n_points = int(n_points)
+        self.coarse_every = max(1, int(coarse_every))
+        self.tol = tol
+        self._span0 = None
+
+    def coarse(self) -> List[int]:
+        sel = list(range(0, self.n_points, self.coarse_every))
+        if sel[-1] != self.n_points - 1:
+            sel.append(self.n_points - 1)
+        return sel
+
+    def refine(self, keys: Sequence[int], xs: Sequence[float],
+               ys: Sequence[float]) -> List[int]:
+        """keys：已量索引 (遞增)；xs / ys：對應 X/EDC、Y/EDC"""
+        k = np.asarray(keys, dtype=int)
+        if k.size < 2:
+            return []
+        gaps = np.diff(k)
+        sig = [np.asarray(xs, dtype=float), np.asarray(ys, dtype=float)]
+        if self._span0 is None:
+            self._span0 = [np.ptp(s) or 1.0 for s in sig]
+
+        score = np.zeros(gaps.size)
+        for s, span in zip(sig, self._span0):
+            delta = np.abs(np.diff(s))                      # 區間內變化量 (一階)
+            curv = np.zeros(s.size)                         # 端點曲率 (二階)
+            if s.size > 2:
+                slope = np.diff(s) / gaps
+                curv[1:-1] = np.abs(np.diff(slope)) * (gaps[:-1] + gaps[1:]) / 2
+            score = np.maximum(score, (delta + 0.5 * (curv[:-1] + curv[1:])) / span)
+
+        pick = (gaps >= 2) & (score > self.tol)
+        mid = (k[:-1][pick] + k[1:][pick]) // 2
+        return sorted(set(mid.tolist()))
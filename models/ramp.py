@@ -0,0 +1,63 @@
+# ramp.py
+# ---------------------------------------------------------------------------
+#  OLV (內部振盪器輸出) 漸進調整
+#  ----------------------------
+#  加熱功率 ∝ OLV，直接跳到目標會造成溫度突變；改成分 steps 步，
+#  以 slew_mv_s (mV/s) 的平均斜率走到目標。
+#
+#    · OLV 碼值 × OLV_MV_PER_CODE[range] = mV
+#    · 目前 range 與目標不同 (start_rng)：先在舊 range 漸進到兩個 range 都能
+#      精確表示的位準，在那裡換 range，再於新 range 漸進到目標 (ramp_legs)，
+#      換檔本身不跳變
+#    · 不依賴 Qt：GUI 由 workers.OlvRampWorker 包裝，腳本 / 排程可直接呼叫
+# ---------------------------------------------------------------------------
+
+import time
+from typing import Callable, List, Optional, Tuple
+
+OLV_MV_PER_CODE = (0.1, 1.0, 10.0)      # 0–25.5 mV / 0–255 mV / 0–2.55 V
+OLV_MAX_CODE = 255
+_TENTH_MV = (1, 10, 100)                # 同上，以 0.1 mV 為單位 (整數運算)
+
+
+def ramp_plan(start: int, target: int, rng: int, slew_mv_s: float,
+              steps: int) -> Tuple[List[int], float]:
+    """回傳 (各步 OLV 碼值, 每步間隔 s)；最後一步必為 target"""
+    steps = max(1, int(steps))
+    levels = [round(start + (target - start) * i / steps) for i in range(1, steps + 1)]
+    span_mv = abs(target - start) * OLV_MV_PER_CODE[rng]
+    dt = span_mv / slew_mv_s / steps if slew_mv_s > 0 else 0.0
+    return levels, dt
+
+
+def ramp_legs(start: int, start_rng: int, target: int, rng: int) -> List[Tuple[int, int, int]]:
+    """漸進分段 [(起, 迄, range), …]；換 range 時在兩邊都能精確表示的位準換檔
+    (取最接近起點、且不超過較小 range 滿刻度的粗刻度位準)"""
+    if start_rng == rng:
+        return [(start, target, rng)]
+    a, b = _TENTH_MV[start_rng], _TENTH_MV[rng]
+    coarse, cap = max(a, b), OLV_MAX_CODE * min(a, b)
+    m = min(round(start * a / coarse) * coarse, cap // coarse * coarse)
+    return [(start, m // a, start_rng), (m // b, target, rng)]
+
+
+def ramp_olv(lockin, start: int, target: int, rng: int, slew_mv_s: float = 10.0,
+             steps: int = 10, stop: Callable[[], bool] = lambda: False,
+             progress: Callable[[float], None] = lambda frac: None,
+             start_rng: Optional[int] = None) -> bool:
+    """逐步 set_param(int_osc_level)；被 stop() 中斷回傳 False (停在當下位準)。
+    start_rng：start 所在的 range (None = 與 rng 相同)"""
+    legs = ramp_legs(start, rng if start_rng is None else start_rng, target, rng)
+    for j, (a, b, r) in enumerate(legs):
+        levels, dt = ramp_plan(a, b, r, slew_mv_s, steps)
+        for i, v in enumerate(levels, 1):
+            if stop():
+                return False
+            lockin.set_param(int_osc_level=v, int_osc_level_range=r)
+            progress((j + i / len(levels)) / len(legs))
+            t_end = time.perf_counter() + dt
+            while i < len(levels) and time.perf_counter() < t_end:
+                if stop():
+                    return False
+                time.sleep(min(0.05, max(0.0, t_end - time.perf_counter())))
+    return True
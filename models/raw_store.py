@@ -0,0 +1,217 @@
+# raw_store.py
+# ---------------------------------------------------------------------------
+#  原始掃描資料檔 (.trraw)：每輪每點都留，量到就 append
+#  --------------------------------------------------
+#  檔案結構：
+#    MAGIC (8 bytes) | 標頭長度 (uint32 LE) | JSON 標頭 (空白補齊到 64 的倍數)
+#    | 固定長度紀錄 RECORD × N (little-endian，numpy structured dtype)
+#
+#  · 只 append，不改舊資料；當機最多少最後一批，尾端不完整的紀錄讀取時忽略
+#  · RawReader 以 np.memmap 讀回 (不整檔載入)，cube() 排成 (輪, 能量) 陣列
+#  · .asc 平均檔改由這裡匯出 (export_asc)，數值同 RunAccumulator 逐點平均
+#
+#  標頭：version、created、fields、ev_arr (計畫網格)、repeat，以及呼叫端
+#        另外放的鍵 (配方、lock-in 參數…)
+#
+#  命令列 (repo 根目錄)：
+#    python -m models.raw_store info   raw_20250101_120000.trraw
+#    python -m models.raw_store export raw_….trraw avg.asc [--runs 0:6]
+# ---------------------------------------------------------------------------
+
+import json
+import os
+import struct
+import sys
+import time
+from typing import Iterable, Optional
+
+import numpy as np
+
+from models.asc_io import write_asc
+
+MAGIC = b"TRRAW001"
+SUFFIX = ".trraw"
+RECORD = np.dtype([
+    ("run", "<u4"), ("n", "<u4"), ("weight", "<u4"), ("_pad", "<u4"),
+    ("ev", "<f8"), ("idx", "<f8"),                # 實際能量、馬達位置 (小數 = 脈衝)
+    ("x", "<f8"), ("y", "<f8"), ("edc", "<f8"),   # X/EDC、Y/EDC、EDC
+    ("x_se", "<f8"), ("y_se", "<f8"),             # Dwell 標準誤差 (單次讀值 = NaN)
+    ("t", "<f8"),                                 # 該點完成的系統時間 (epoch s)
+])
+
+
+def new_path(save_dir: str) -> str:
+    return os.path.join(save_dir, time.strftime("raw_%Y%m%d_%H%M%S") + SUFFIX)
+
+
+class RawWriter:
+    """
+    · path 已存在 → 接在後面 (續掃)；run_offset 加到每點的輪號
+    · append(items)：items = ScanEngine 的 (ev, x/edc, y/edc, edc, meta)，一批一次 write
+    · defer=True：第一次 append / close 時才開檔 (例如在寫檔執行緒裡，排在上一個
+      檔的 close 之後)，建構本身不做 I/O
+    """
+
+    def __init__(self, path: str, header: Optional[dict] = None, run_offset: int = 0,
+                 defer: bool = False) -> None:
+        self.path = path
+        self.header = header
+        self.run_offset = run_offset
+        self.n_written = 0
+        self._f = None
+        if not defer:
+            self._open()
+
+    def _open(self) -> None:
+        path = self.path
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            off = _read_header(path)[1]
+            self._f = open(path, "r+b")
+            # 截掉尾端不完整的紀錄 (上次當機寫到一半)
+            n = (os.path.getsize(path) - off) // RECORD.itemsize
+            self._f.truncate(off + n * RECORD.itemsize)
+            self._f.seek(0, os.SEEK_END)
+        else:
+            hdr = dict(version=1, created=time.time(), fields=list(RECORD.names), **(self.header or {}))
+            blob = json.dumps(hdr, ensure_ascii=False, default=json_default).encode("utf-8")
+            pad = -(len(MAGIC) + 4 + len(blob)) % 64
+            self._f = open(path, "wb")
+            self._f.write(MAGIC + struct.pack("<I", len(blob) + pad) + blob + b" " * pad)
+            self._f.flush()
+            os.fsync(self._f.fileno())
+
+    def append(self, items: Iterable) -> None:
+        items = list(items)
+        if not items:
+            return
+        if self._f is None:
+            self._open()
+        rec = np.zeros(len(items), dtype=RECORD)
+        for i, (ev, x_n, y_n, edc, meta) in enumerate(items):
+            rec[i] = (meta.get("run", 0) + self.run_offset, meta.get("n", 1), meta.get("weight", 1), 0,
+                      ev, meta.get("idx", np.nan), x_n, y_n, edc,
+                      meta.get("x_se", np.nan), meta.get("y_se", np.nan), meta.get("t_wall", time.time()))
+        self._f.write(rec.tobytes())
+        self._f.flush()
+        self.n_written += len(items)
+
+    def fileno(self) -> int:
+        if self._f is None:
+            self._open()
+        return self._f.fileno()
+
+    def close(self) -> None:
+        if self._f is None:
+            self._open()                                # 沒有任何點也留下標頭
+        if not self._f.closed:
+            self._f.flush()
+            os.fsync(self._f.fileno())
+            self._f.close()
+
+
+def read_header(path: str) -> dict:
+    """只讀標頭 (不 memmap 資料)"""
+    return _read_header(path)[0]
+
+
+class RawReader:
+    """唯讀 memmap；records 為 structured 陣列 (欄位見 RECORD)"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.header, off = _read_header(path)
+        n = (os.path.getsize(path) - off) // RECORD.itemsize
+        self.records = (np.memmap(path, dtype=RECORD, mode="r", offset=off, shape=(n,))
+                        if n else np.zeros(0, dtype=RECORD))
+
+    def __len__(self) -> int:
+        return self.records.shape[0]
+
+    @property
+    def n_runs(self) -> int:
+        return int(self.records["run"].max()) + 1 if len(self) else 0
+
+    @property
+    def ev(self) -> np.ndarray:
+        """能量軸：出現過的能量，方向同計畫網格"""
+        ev = np.unique(self.records["ev"])
+        plan = self.header.get("ev_arr")
+        if plan and len(plan) > 1 and plan[0] > plan[-1]:
+            ev = ev[::-1]
+        return ev
+
+    def cube(self, field: str = "x") -> np.ndarray:
+        """(n_runs, len(ev)) 陣列，沒量到的位置為 NaN；同一輪同一點重複時取最後一筆"""
+        ev = self.ev
+        out = np.full((self.n_runs, ev.size), np.nan)
+        if len(self):
+            r = self.records
+            col = np.searchsorted(ev, r["ev"]) if ev.size < 2 or ev[0] < ev[-1] \
+                else ev.size - 1 - np.searchsorted(ev[::-1], r["ev"])
+            out[r["run"].astype(np.intp), col] = r[field]
+        return out
+
+    def complete_runs(self) -> np.ndarray:
+        """每個能量點都有值的輪號"""
+        return np.flatnonzero(~np.isnan(self.cube("x")).any(axis=1))
+
+    def average(self, runs=None):
+        """回傳 (ev, x_mean, y_mean)；runs=None → 所有完整的輪"""
+        runs = self.complete_runs() if runs is None else np.arange(self.n_runs)[runs]
+        if len(runs) == 0:
+            raise ValueError("沒有完整的輪可平均")
+        return self.ev, self.cube("x")[runs].mean(axis=0), self.cube("y")[runs].mean(axis=0)
+
+    def export_asc(self, path: str, runs=None) -> int:
+        """寫 .asc 平均檔，回傳平均了幾輪"""
+        runs = self.complete_runs() if runs is None else np.arange(self.n_runs)[runs]
+        ev, x, y = self.average(runs)
+        write_asc(path, ev, x, y)
+        return len(runs)
+
+
+# ------------------------------ internals ---------------------------------
+def _read_header(path: str):
+    with open(path, "rb") as f:
+        head = f.read(len(MAGIC) + 4)
+        if len(head) < len(MAGIC) + 4 or head[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"不是 .trraw 檔：{path}")
+        (n,) = struct.unpack("<I", head[len(MAGIC):])
+        hdr = json.loads(f.read(n).decode("utf-8"))
+    return hdr, len(MAGIC) + 4 + n
+
+
+def json_default(o):
+    """json.dumps 的 default：numpy 陣列 / 純量轉成 Python 型別 (checkpoint 共用)"""
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    if isinstance(o, np.generic):
+        return o.item()
+    raise TypeError(type(o).__name__)
+
+
+def _slice(s: Optional[str]):
+    if not s:
+        return None
+    a, _, b = s.partition(":")
+    return slice(int(a) if a else None, int(b) if b else None)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description=".trraw 原始掃描檔")
+    ap.add_argument("cmd", choices=("info", "export"))
+    ap.add_argument("path")
+    ap.add_argument("out", nargs="?")
+    ap.add_argument("--runs", help="例如 0:6 (預設：所有完整的輪)")
+    args = ap.parse_args()
+    rd = RawReader(args.path)
+    if args.cmd == "info":
+        print(f"{len(rd)} 點  {rd.n_runs} 輪 (完整 {len(rd.complete_runs())})  "
+              f"{rd.ev.size} 個能量  {rd.ev[0] if rd.ev.size else 0:.4f} → "
+              f"{rd.ev[-1] if rd.ev.size else 0:.4f} eV")
+    else:
+        if not args.out:
+            sys.exit("export 需要輸出檔名")
+        print(f"[SAVE] {args.out} ({rd.export_asc(args.out, _slice(args.runs))} runs)")
@@ -0,0 +1,141 @@
+# recipe.py
+# ---------------------------------------------------------------------------
+#  掃描配方 (JSON)
+#  --------------
+#  {
+#    "ev_start": 1.30, "ev_end": 1.55, "ev_step": 0.002, "repeat": 20,
+#    "serpentine": true, "backlash_idx": 0, "collapse": "merge",
+#    "calibration": "calibration.csv", "position_idx": 512,
+#    "lockin": {"time_const": "100 ms", "sensitivity": "1 mV", ...},   ← set_param 參數
+#    "olv_ramp": {"target": 120, "range": 1, "slew_mv_s": 10, "steps": 10},
+#    "settle":   {"rel_tol": 0.01, "max_ntau": null},
+#    "dwell":    {"target_se": 1e-6, "max_dwell_s": 10},               ← null = 單次讀值
+#    "adaptive": {"coarse_step": 0.01, "tol": 0.05},                   ← null = 均勻網格
+#    "save_dir": "./backup", "save_every": 1, "keep_files": 20
+#  }
+#
+#  · 未列出的鍵用 DEFAULTS；不認得的鍵 raise ValueError (避免拼錯默默被忽略)
+#  · collapse：步距小於馬達脈衝時，落在同一脈衝的點 "merge" 合併 (停留加長)
+#    或 "shift" 錯開到相鄰脈衝 (見 engine.snap_pulses)
+#  · position_idx：馬達目前計數器讀值 (同控制頁「目前 idx」)，實機必填
+#  · run_recipe()：套用 lock-in 參數 / OLV 漸進後執行一份配方 (CLI 與排程共用)；
+#    另寫 <save_dir>/checkpoint.jsonl，resume=ScanCheckpoint 時從中斷的下一點接著量；
+#    進度與錯誤 (馬達 ERR / LIMIT、EDC = 0 中止…) 由 ConsoleSink 印到終端
+# ---------------------------------------------------------------------------
+
+import copy
+import json
+import os
+import time
+from typing import Callable, Iterable, Optional
+
+from models.acquire import Dwell, Settler
+from models.checkpoint import CheckpointSink, ScanCheckpoint, checkpoint_path, motor_idx
+from models.engine import ScanEngine, ScanPlan, ScanSink
+from models.planner import AdaptivePlanner
+from models.ramp import ramp_olv
+from models.raw_store import new_path as new_raw_path
+from models.sinks import AverageSink, ConsoleSink, RawSink, TimingSink
+
+DEFAULTS = {
+    "ev_start": None, "ev_end": None, "ev_step": None,
+    "repeat": 1, "serpentine": False, "backlash_idx": 0, "collapse": "merge",
+    "calibration": "calibration.csv", "position_idx": None,
+    "motor_port": None, "lockin_resource": "GPIB0::2::INSTR", "simulate": False,
+    "lockin": {}, "olv_ramp": None,
+    "settle": {"rel_tol": 0.01, "max_ntau": None},
+    "dwell": None, "adaptive": None,
+    "save_dir": "./backup", "save_every": 1, "keep_files": 20,
+}
+REQUIRED = ("ev_start", "ev_end", "ev_step")
+
+
+def parse_recipe(data: dict) -> dict:
+    unknown = set(data) - set(DEFAULTS)
+    if unknown:
+        raise ValueError(f"未知的配方欄位：{', '.join(sorted(unknown))}")
+    rec = copy.deepcopy(DEFAULTS)
+    for k, v in data.items():
+        if isinstance(rec[k], dict) and isinstance(v, dict):
+            rec[k].update(v)
+        else:
+            rec[k] = v
+    missing = [k for k in REQUIRED if rec[k] is None]
+    if missing:
+        raise ValueError(f"配方缺少：{', '.join(missing)}")
+    return rec
+
+
+def load_recipe(path) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return parse_recipe(json.load(f))
+
+
+# ---------------------------------------------------------------------------
+#  配方 → 引擎元件
+# ---------------------------------------------------------------------------
+def build_plan(rec: dict, mapper) -> ScanPlan:
+    return ScanPlan.from_energy(mapper, rec["ev_start"], rec["ev_end"], rec["ev_step"],
+                                rec["repeat"], rec["serpentine"], rec["collapse"])
+
+
+def build_settler(rec: dict, lockin) -> Settler:
+    return Settler(lockin, **rec["settle"])
+
+
+def build_dwell(rec: dict, lockin) -> Optional[Dwell]:
+    return Dwell(lockin, **rec["dwell"]) if rec["dwell"] else None
+
+
+def build_planner(rec: dict, n_points: int) -> Optional[AdaptivePlanner]:
+    ad = rec["adaptive"]
+    if not ad:
+        return None
+    every = int(round(ad["coarse_step"] / abs(rec["ev_step"])))
+    return AdaptivePlanner(n_points, every, tol=ad.get("tol", 0.05))
+
+
+def run_recipe(rec: dict, motor, lockin, mapper, stop: Callable[[], bool] = lambda: False,
+               sinks: Iterable[ScanSink] = (), resume: Optional[ScanCheckpoint] = None) -> bool:
+    """阻塞執行；回傳 True = 全部輪數完成。存檔 / 計時 CSV / 原始 .trraw 寫到 rec["save_dir"]
+    resume：沿用 checkpoint 的網格與已量的點 (馬達位置由呼叫端先同步)"""
+    plan = resume.plan if resume is not None else build_plan(rec, mapper)
+    motor.backlash_idx = rec["backlash_idx"]
+    if rec["lockin"]:
+        lockin.set_param(**rec["lockin"])
+    ramp = rec["olv_ramp"]
+    if ramp:
+        if "from" in ramp:
+            start, start_rng = ramp["from"], None
+        else:                                   # 目前位準可能在另一個 range
+            start = lockin.state.get("int_osc_level", 0)
+            start_rng = lockin.state.get("int_osc_level_range")
+        print(f"[scan] OLV {start} → {ramp['target']}")
+        if not ramp_olv(lockin, start, ramp["target"], ramp["range"],
+                        ramp.get("slew_mv_s", 10.0), ramp.get("steps", 10), stop=stop,
+                        start_rng=start_rng):
+            return False
+    save_dir = rec["save_dir"]
+    avg = AverageSink(save_dir, rec["save_every"], rec["keep_files"])
+    raw_path = resume.header.get("raw_path") if resume is not None else None
+    if not raw_path or not os.path.exists(raw_path):
+        raw_path = new_raw_path(save_dir)
+    ckpt = CheckpointSink(checkpoint_path(save_dir), plan,
+                          dict(recipe=rec, lockin=dict(lockin.state), raw_path=raw_path),
+                          resume=resume is not None, position_fn=lambda: motor_idx(motor))
+    start_run, done = 0, None
+    if resume is not None:
+        avg.restore(resume.runs)
+        start_run, done = resume.start_run, resume.partial
+        print(f"[scan] 續掃：{resume.summary()}")
+    # 自適應網格只在第 1 輪；已過第 1 輪的續掃沿用 checkpoint 的網格
+    planner = build_planner(rec, len(plan)) if start_run == 0 else None
+    sinks = [ConsoleSink(len(plan), plan.repeat), ckpt, avg,
+             TimingSink(os.path.join(save_dir, time.strftime("timing_%Y%m%d_%H%M%S.csv"))),
+             RawSink(raw_path, dict(ev_arr=plan.ev_arr, repeat=plan.repeat,
+                                    recipe=rec, lockin=dict(lockin.state))),
+             *sinks]
+    engine = ScanEngine(lockin, motor, plan, build_settler(rec, lockin),
+                        build_dwell(rec, lockin), planner,
+                        sinks=sinks, stop=stop, start_run=start_run, done=done)
+    return engine.run()
@@ -0,0 +1,207 @@
+# scan_queue.py
+# ---------------------------------------------------------------------------
+#  無人值守掃描排程
+#  ----------------
+#  · ScanQueue：配方清單 + 狀態，每次變動都寫回 JSON (暫存檔 + os.replace，
+#    寫到一半斷電也不會留下半個檔)
+#      status：pending → running → done / failed / aborted
+#      重新載入時 running 視為被中斷 → 改回 pending；run_queue 會從該配方
+#      save_dir 的 checkpoint 接著量 (checkpoint 不符或馬達位置不確定則重新開始)
+#  · estimate_s()：依網格、τ / 斜率、settle / dwell 設定與馬達脈衝時間估計
+#    單份配方耗時 (自適應網格以完整細網格計，屬上限)
+#  · run_queue()：無頭依序執行 (scan_cli --queue)；GUI 版見 widgets/queue_widget.py
+# ---------------------------------------------------------------------------
+
+import json
+import os
+import time
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from drivers.lockin import LockInBase, LockInNF5610B
+from models.acquire import ntau_max, ntau_settle
+from models.checkpoint import ScanCheckpoint, load_checkpoint
+from models.ramp import ramp_plan
+from models.recipe import build_plan, parse_recipe, run_recipe
+
+DEFAULT_PATH = "scan_queue.json"
+QUERY_S = 0.005           # 單次 GPIB 讀值估計
+
+
+def estimate_s(rec: dict, mapper, pulse_time: float = 0.003, pulse_per_idx: int = 10,
+               ack_s: float = 0.01, from_idx: Optional[int] = None) -> float:
+    """單份配方預估秒數；pulse_time / pulse_per_idx 同 MotorArduino，
+    from_idx：馬達目前位置 (計入走到起點的時間)"""
+    plan = build_plan(rec, mapper)
+    lk = rec["lockin"]
+    tau = LockInNF5610B._TIME_CONST_S.get(lk.get("time_const"), LockInBase.tau_s)
+    slope = LockInNF5610B._SLOPE.get(lk.get("filter_slope"), LockInBase.slope_db)
+
+    st = rec["settle"]
+    rel_tol = st.get("rel_tol", 0.01)
+    max_ntau = st.get("max_ntau") or ntau_max(slope, rel_tol)
+    min_ntau = st.get("min_ntau")
+    if min_ntau is None:
+        min_ntau = ntau_settle(slope, rel_tol)
+    # Settler：先等 min_ntau·τ，之後至少再比較一次 (poll_ntau·τ)
+    ntau = min(min_ntau + st.get("poll_ntau", 0.5), max_ntau)
+    per_stop = ntau * tau + 2 * QUERY_S + ack_s             # 每個停點只 settle 一次
+    # 取樣部分才依 weight 加長：Dwell.scaled(w) 上限 ×w；沒有 Dwell 時再讀 w-1 筆 (間隔 τ)
+    if rec["dwell"]:
+        sample = plan.weight.sum() * rec["dwell"].get("max_dwell_s", 10.0)
+    else:
+        sample = (plan.weight - 1).sum() * (tau + QUERY_S)
+
+    steps = np.abs(np.diff(plan.idx_arr)).sum() * pulse_per_idx * pulse_time
+    span = abs(plan.idx_arr[-1] - plan.idx_arr[0]) * pulse_per_idx * pulse_time
+    back = 0.0 if plan.serpentine else span                 # 非來回掃描每輪要走回起點
+    total = (plan.repeat * (len(plan.idx_arr) * per_stop + sample + steps)
+             + (plan.repeat - 1) * back)
+    if from_idx is not None:
+        total += abs(plan.idx_arr[0] - from_idx) * pulse_per_idx * pulse_time
+
+    ramp = rec["olv_ramp"]
+    if ramp:
+        levels, dt = ramp_plan(ramp.get("from", 0), ramp["target"], ramp["range"],
+                               ramp.get("slew_mv_s", 10.0), ramp.get("steps", 10))
+        total += dt * (len(levels) - 1)
+    return float(total)
+
+
+class ScanQueue:
+    STATUSES = ("pending", "running", "done", "failed", "aborted")
+
+    def __init__(self, path: str = DEFAULT_PATH) -> None:
+        self.path = path
+        self.entries: List[dict] = []
+        self._next_id = 1
+        if os.path.exists(path):
+            self.load()
+
+    # ------------------------------ file I/O -------------------------------
+    def load(self) -> None:
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.entries = data.get("entries", [])
+        self._next_id = max([e["id"] for e in self.entries], default=0) + 1
+        for e in self.entries:
+            if e["status"] == "running":          # 上次執行到一半
+                e["status"] = "pending"
+                e["message"] = "中斷後重新排入"
+                e["resume"] = True
+
+    def save(self) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"entries": self.entries}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.path)
+
+    # -------------------------------- API ---------------------------------
+    def add(self, recipe: dict, name: Optional[str] = None) -> dict:
+        """recipe 為原始配方 dict (未套預設值)；格式錯誤 raise ValueError"""
+        rec = parse_recipe(recipe)
+        e = dict(id=self._next_id, recipe=recipe, status="pending", message="",
+                 started=None, finished=None,
+                 name=name or f"{rec['ev_start']:.3f}–{rec['ev_end']:.3f} eV ×{rec['repeat']}")
+        self._next_id += 1
+        self.entries.append(e)
+        self.save()
+        return e
+
+    def get(self, eid: int) -> dict:
+        for e in self.entries:
+            if e["id"] == eid:
+                return e
+        raise KeyError(eid)
+
+    def remove(self, eid: int) -> None:
+        self.entries.remove(self.get(eid))
+        self.save()
+
+    def move(self, eid: int, delta: int) -> None:
+        e = self.get(eid)
+        i = self.entries.index(e)
+        j = min(max(i + delta, 0), len(self.entries) - 1)
+        self.entries.insert(j, self.entries.pop(i))
+        self.save()
+
+    def requeue(self, eid: int) -> None:
+        self.mark(eid, "pending")
+
+    def next_pending(self) -> Optional[dict]:
+        return next((e for e in self.entries if e["status"] == "pending"), None)
+
+    def mark(self, eid: int, status: str, message: str = "") -> None:
+        if status not in self.STATUSES:
+            raise ValueError(status)
+        e = self.get(eid)
+        e["status"], e["message"] = status, message
+        if status != "pending":
+            e.pop("resume", None)
+        if status == "running":
+            e["started"], e["finished"] = time.time(), None
+        elif status != "pending":
+            e["finished"] = time.time()
+        self.save()
+
+    def estimate_pending(self, mapper, from_idx: Optional[int] = None, **kw) -> float:
+        """所有 pending / running 配方預估總秒數 (無法估計的略過)；
+        from_idx 只用於第一份，之後各份的起點移動不計"""
+        total = 0.0
+        for e in self.entries:
+            if e["status"] in ("pending", "running"):
+                try:
+                    total += estimate_s(parse_recipe(e["recipe"]), mapper, from_idx=from_idx, **kw)
+                    from_idx = None
+                except ValueError:
+                    pass
+        return total
+
+
+_GRID_KEYS = ("ev_start", "ev_end", "ev_step", "repeat", "serpentine", "collapse", "save_dir")
+
+
+def matching_checkpoint(rec: dict) -> Optional[ScanCheckpoint]:
+    """rec 的 save_dir 內未完成、且網格設定與 rec 相同的 checkpoint；否則 None
+    (控制頁的配方經過 spinbox，能量只到 0.001 eV，所以浮點欄位容許 5e-4 誤差)"""
+    ck = load_checkpoint(rec["save_dir"])
+    if ck is None:
+        return None
+    try:
+        old = parse_recipe(ck.header.get("recipe") or {})
+    except ValueError:
+        return None
+    for k in _GRID_KEYS:
+        a, b = old[k], rec[k]
+        if isinstance(a, float) or isinstance(b, float):
+            if not np.isclose(abs(a), abs(b), rtol=0, atol=5e-4):
+                return None
+        elif a != b:
+            return None
+    return ck
+
+
+def run_queue(queue: ScanQueue, motor, lockin, mapper,
+              stop: Callable[[], bool] = lambda: False) -> bool:
+    """依序執行 pending 配方；回傳 True = 排程跑完 (單份失敗會記錄並繼續下一份)"""
+    while not stop():
+        e = queue.next_pending()
+        if e is None:
+            return True
+        print(f"[queue] #{e['id']} {e['name']}")
+        resume = e.get("resume", False)
+        queue.mark(e["id"], "running")
+        try:
+            rec = parse_recipe(e["recipe"])
+            ck = matching_checkpoint(rec) if resume else None
+            if ck is not None and ck.position is None:
+                ck = None
+            if ck is not None:
+                motor.position = int(round(ck.position))
+            ok = run_recipe(rec, motor, lockin, mapper, stop, resume=ck)
+        except Exception as ex:  # noqa: broad-except
+            queue.mark(e["id"], "failed", str(ex))
+            continue
+        queue.mark(e["id"], "done" if ok else ("aborted" if stop() else "failed"))
+    return False
@@ -0,0 +1,110 @@
+# sinks.py
+# ---------------------------------------------------------------------------
+#  ScanEngine 的常用輸出 (無頭掃描用；GUI 走 workers.ScanWorker)
+#    · AverageSink：每 save_every 輪把該批平均寫成 <累計輪數>.asc，
+#                   FIFO 只留 keep 個 (規則同控制頁自動存檔)；
+#                   結束時另寫全部輪的平均 avg_all.asc
+#                   寫檔 / 刪檔都交給 models.persist.FileWriter 執行緒
+#    · TimingSink ：每點計時寫 timing CSV (models.telemetry)
+#    · RawSink    ：每點原始值 append 到 .trraw (models.raw_store)
+#    · ConsoleSink：進度 / 錯誤印到終端
+# ---------------------------------------------------------------------------
+
+import os
+import sys
+import time
+
+from models.engine import ScanSink
+from models.persist import FileWriter, numbered_asc
+from models.raw_store import RawWriter
+from models.stats import RunAccumulator
+from models.telemetry import TimingLog
+
+
+class AverageSink(ScanSink):
+    def __init__(self, save_dir: str, save_every: int = 1, keep: int = 20) -> None:
+        self.save_dir = save_dir
+        os.makedirs(save_dir, exist_ok=True)
+        self.save_every = max(1, int(save_every))
+        self.keep = keep
+        self.acc_all = RunAccumulator()
+        self.acc_batch = RunAccumulator()
+        self.batch_counter = 0
+        self.writer = FileWriter(on_saved=lambda p: print(f"[SAVE] {p}"),
+                                 on_deleted=lambda p: print(f"[DEL ] {p}"),
+                                 on_error=lambda m: print(f"[SAVE] 失敗 {m}", file=sys.stderr))
+
+    def restore(self, runs) -> None:
+        """續掃：把 checkpoint 已完成的輪放回累積器 (批次計數照舊)；
+        資料夾裡之前存的 <N>.asc 重新排進 FIFO"""
+        for ev, x, y in runs:
+            self.acc_all.push(ev, x, y)
+        self.batch_counter = len(runs) // self.save_every
+        for ev, x, y in runs[self.batch_counter * self.save_every:]:
+            self.acc_batch.push(ev, x, y)
+        self.writer.track(numbered_asc(self.save_dir, self.batch_counter * self.save_every))
+
+    def on_run(self, ev_arr, x_arr, y_arr) -> None:
+        self.acc_all.push(ev_arr, x_arr, y_arr)
+        self.acc_batch.push(ev_arr, x_arr, y_arr)
+        if self.acc_batch.n >= self.save_every:
+            self._save_batch()
+            self.acc_batch.reset()
+
+    def on_finish(self, completed: bool) -> None:
+        if self.acc_all.n:
+            path = os.path.join(self.save_dir, "avg_all.asc")
+            self.writer.save_asc(path, self.acc_all.ev, *self.acc_all.mean)
+            print(f"[scan] avg_all = {self.acc_all.n} runs")
+        self.writer.close()                 # 等佇列寫完
+
+    def _save_batch(self) -> None:
+        self.batch_counter += 1
+        fpath = os.path.join(self.save_dir, f"{self.batch_counter * self.save_every}.asc")
+        self.writer.save_asc(fpath, self.acc_batch.ev, *self.acc_batch.mean, keep=self.keep)
+
+
+class TimingSink(ScanSink):
+    def __init__(self, path) -> None:
+        self.log = TimingLog(path)
+
+    def on_point(self, item) -> None:
+        self.log.write([item[4]])
+
+    def on_finish(self, completed: bool) -> None:
+        self.log.close()
+
+
+class RawSink(ScanSink):
+    def __init__(self, path, header=None) -> None:
+        self.writer = RawWriter(path, header)
+
+    def on_point(self, item) -> None:
+        self.writer.append([item])
+
+    def on_finish(self, completed: bool) -> None:
+        self.writer.close()
+
+
+class ConsoleSink(ScanSink):
+    def __init__(self, n_points: int, repeat: int, every: int = 1) -> None:
+        self.n_points, self.repeat = n_points, repeat
+        self.every = max(1, every)
+        self._k = 0
+        self._t0 = time.time()
+
+    def on_point(self, item) -> None:
+        ev, x_n, y_n, edc, meta = item
+        self._k += 1
+        if self._k % self.every == 0:
+            print(f"[scan] run {meta.get('run', 0) + 1}/{self.repeat}  #{self._k}  "
+                  f"{ev:.4f} eV  X/EDC={x_n:.3e}  Y/EDC={y_n:.3e}  EDC={edc:.3e}")
+
+    def on_run(self, ev_arr, x_arr, y_arr) -> None:
+        print(f"[scan] run done ({len(ev_arr)} pts, {time.time() - self._t0:.1f} s)")
+
+    def on_error(self, msg: str) -> None:
+        print(f"[scan] ERROR {msg}", file=sys.stderr)
+
+    def on_finish(self, completed: bool) -> None:
+        print(f"[scan] {'completed' if completed else 'aborted'} after {time.time() - self._t0:.1f} s")
@@ -0,0 +1,80 @@
+# stats.py
+# ---------------------------------------------------------------------------
+#  線上統計 (Welford)：逐筆更新平均 / 變異數，不必保留原始樣本
+#    · RunningStat   ：單一量 (每點多次取樣)
+#    · RunAccumulator：整條光譜逐點累積 (多輪平均 + 標準誤差帶)
+# ---------------------------------------------------------------------------
+
+import math
+import numpy as np
+
+
+class RunningStat:
+    """單一量的 running mean / variance"""
+
+    def __init__(self) -> None:
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def push(self, v: float) -> None:
+        self.n += 1
+        d = v - self.mean
+        self.mean += d / self.n
+        self._m2 += d * (v - self.mean)
+
+    @property
+    def var(self) -> float:
+        """樣本變異數 (n-1)；n<2 回傳 inf"""
+        return self._m2 / (self.n - 1) if self.n > 1 else math.inf
+
+    @property
+    def sem(self) -> float:
+        """平均值的標準誤差"""
+        return math.sqrt(self.var / self.n) if self.n > 1 else math.inf
+
+
+class RunAccumulator:
+    """
+    · 每個能量點各自的 Welford 統計；push() 一輪 O(N)，記憶體與輪數無關
+    · 所有輪必須在同一能量軸上 (長度不同 raise ValueError)
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.ev = None
+        self.n = 0
+        self._mean = None       # shape (2, N)：X/EDC、Y/EDC
+        self._m2 = None
+
+    def push(self, ev_arr, x_arr, y_arr) -> None:
+        v = np.vstack([np.asarray(x_arr, dtype=float), np.asarray(y_arr, dtype=float)])
+        if self.ev is None:
+            self.ev = np.asarray(ev_arr, dtype=float).copy()
+            self._mean = np.zeros_like(v)
+            self._m2 = np.zeros_like(v)
+        elif v.shape != self._mean.shape:
+            raise ValueError("能量軸與先前各輪不一致")
+        self.n += 1
+        d = v - self._mean
+        self._mean += d / self.n
+        self._m2 += d * (v - self._mean)
+
+    @property
+    def mean(self):
+        """(x_mean, y_mean)"""
+        return self._mean[0], self._mean[1]
+
+    @property
+    def sem(self):
+        """(x_se, y_se)；n<2 時為 inf"""
+        if self.n < 2:
+            inf = np.full(self._mean.shape[1], np.inf)
+            return inf, inf
+        se = np.sqrt(self._m2 / (self.n - 1) / self.n)
+        return se[0], se[1]
+
+    def __len__(self) -> int:
+        return self.n
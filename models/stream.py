@@ -0,0 +1,34 @@
+# stream.py
+# ---------------------------------------------------------------------------
+#  worker → GUI 的點資料通道
+#  ------------------------
+#  量測執行緒只 push，GUI 以 QTimer 定期 drain 一整批再畫一次圖：
+#    · deque.append / popleft 在 CPython 為原子操作，不需要鎖
+#    · 量測端永遠不等待繪圖；畫圖成本與點速率無關，只與畫面更新率有關
+# ---------------------------------------------------------------------------
+
+from collections import deque
+from typing import List, Optional
+
+
+class PointBuffer:
+    """單一生產者 / 單一消費者的點緩衝；item = (ev, x/edc, y/edc, edc, meta)"""
+
+    def __init__(self) -> None:
+        self._q = deque()
+
+    def push(self, item) -> None:
+        self._q.append(item)
+
+    def drain(self, limit: Optional[int] = None) -> List[tuple]:
+        out = []
+        pop = self._q.popleft
+        try:
+            while limit is None or len(out) < limit:
+                out.append(pop())
+        except IndexError:
+            pass
+        return out
+
+    def __len__(self) -> int:
+        return len(self._q)
@@ -0,0 +1,144 @@
+# sweep.py
+# ---------------------------------------------------------------------------
+#  連續掃描 (continuous sweep)
+#  --------------------------
+#  馬達以韌體固定脈衝速率一路從 idx0 走到 idx1，同時另一條執行緒以固定
+#  週期讀 lock-in (read_xyz_block 成批) 並記下高解析時間戳。結束後：
+#
+#    1. MotionModel：以「送出 G 指令 → 收到 OK」的實測時間把脈衝線性
+#       對應到時間 (等速模型)，ack_latency 為 OK 回傳延遲的估計
+#    2. 每筆樣本的時間先減掉 lock-in 輸出濾波的群延遲 (slope/6 級 RC ≈ n·τ)，
+#       再 → 脈衝 → idx → Mapper.nm_from_idx → eV。濾波在延遲期間掃過的能量
+#       超過 max_smear 個步距時開始前就拒絕 (譜會被抹平，來回兩趟也疊不起來)，
+#       請降低 τ 或改用步進掃描
+#    3. bin_samples()：依能量把樣本分配到要求的網格 (bin 邊界取相鄰
+#       網格點中點)，同一 bin 取平均；沒有樣本落在網格內 raise ValueError
+# ---------------------------------------------------------------------------
+
+import threading
+import time
+import numpy as np
+from typing import Callable, Optional
+
+HC_EV_NM = 1239.84193
+
+
+class MotionModel:
+    """等速運動模型：t_start 時位於 p0 脈衝，t_end 時抵達 p1"""
+
+    def __init__(self, p0: float, p1: float, t_start: float, t_end: float,
+                 ack_latency: float = 0.0) -> None:
+        self.p0 = float(p0)
+        self.p1 = float(p1)
+        self.t_start = t_start
+        self.t_end = max(t_end - ack_latency, t_start + 1e-9)
+
+    @property
+    def pulse_rate(self) -> float:
+        """實測脈衝速率 (pulse/s，帶方向)"""
+        return (self.p1 - self.p0) / (self.t_end - self.t_start)
+
+    def pulse_at(self, t) -> np.ndarray:
+        frac = np.clip((np.asarray(t, dtype=float) - self.t_start)
+                       / (self.t_end - self.t_start), 0.0, 1.0)
+        return self.p0 + frac * (self.p1 - self.p0)
+
+
+def filter_delay_s(tau_s: float, slope_db: float) -> float:
+    """lock-in 輸出濾波的低頻群延遲：slope_db / 6 級相同 RC，每級 τ"""
+    return max(int(round(slope_db / 6)), 1) * tau_s
+
+
+def bin_samples(ev: np.ndarray, values, ev_grid: np.ndarray):
+    """
+    · ev：每筆樣本能量；values：同長度陣列的 list (例如 [x/edc, y/edc, edc])
+    · 回傳 (means, counts)：means 與 values 同序，每個 shape = ev_grid.shape
+    · 空 bin 以相鄰有值 bin 線性內插，counts 對應為 0
+    """
+    grid = np.asarray(ev_grid, dtype=float)
+    order = np.argsort(grid)
+    g = grid[order]
+    edges = (g[1:] + g[:-1]) / 2
+    half = (g[-1] - g[0]) / max(len(g) - 1, 1) / 2
+    inside = (ev >= g[0] - half) & (ev <= g[-1] + half)
+    b = np.searchsorted(edges, ev[inside])
+    counts = np.bincount(b, minlength=g.size)
+    filled = counts > 0
+    if not filled.any():
+        raise ValueError(f"沒有樣本落在能量網格 {g[0]:.4f}–{g[-1]:.4f} eV 內")
+    means = []
+    for v in values:
+        m = np.bincount(b, weights=np.asarray(v)[inside], minlength=g.size)
+        m = np.divide(m, counts, out=np.full(g.size, np.nan), where=filled)
+        if not filled.all():
+            m[~filled] = np.interp(g[~filled], g[filled], m[filled])
+        out = np.empty_like(m); out[order] = m
+        means.append(out)
+    cnt = np.empty_like(counts); cnt[order] = counts
+    return means, cnt
+
+
+def sweep(motor, lockin, mapper, idx0: int, idx1: int, ev_grid: np.ndarray,
+          cadence_s: float = 0.01, ack_latency: float = 0.0,
+          stop: Callable[[], bool] = lambda: False, block: int = 8,
+          max_smear: float = 1.0) -> Optional[dict]:
+    """
+    走一趟 idx0 → idx1 並回傳 dict：
+      x, y, edc (依 ev_grid 順序)、counts、n_samples、duration_s、pulse_rate、lag_s
+    中斷立即回傳 None (移動中的那一趟在背景走完，之後的移動會排在它後面)；
+    所有樣本 EDC = 0 時 raise RuntimeError；
+    τ 對掃描速度太長 (見檔頭) 時開始前就 raise ValueError
+    """
+    ppi = motor.PULSE_PER_IDX
+    lag = filter_delay_s(lockin.tau_s, lockin.slope_db)
+    grid = np.asarray(ev_grid, dtype=float)
+    pulse_time = getattr(motor, "PULSE_TIME", None)
+    if pulse_time and grid.size > 1 and idx1 != idx0:
+        span = abs(grid[-1] - grid[0])
+        smear = span * lag / (abs(idx1 - idx0) * ppi * pulse_time)   # 延遲期間掃過的能量
+        step = span / (grid.size - 1)
+        if smear > max_smear * step:
+            raise ValueError(
+                f"時間常數太長：濾波延遲 {lag:.3g} s 內能量移動 {smear * 1e3:.2f} meV，"
+                f"超過 {max_smear:g} 個步距 ({step * 1e3:.2f} meV)；請降低 τ 或改用步進掃描")
+
+    motor.goto(idx0)
+    if stop():
+        return None
+
+    move = {}
+
+    def _run():
+        move["t_start"] = time.perf_counter()
+        try:
+            motor.goto(idx1, backlash=0)
+        except Exception as e:  # noqa: broad-except
+            move["error"] = e
+        move["t_end"] = time.perf_counter()
+
+    th = threading.Thread(target=_run, name="sweep-move", daemon=True)
+    blocks = []
+    th.start()
+    while th.is_alive():
+        if stop():
+            return None                       # 不等這一趟走完：由馬達 (MotionService) 自行走完
+        blocks.append(lockin.read_xyz_block(block, cadence_s))
+        time.sleep(cadence_s)                 # 批與批之間同樣保持週期
+    th.join()
+    if "error" in move:
+        raise move["error"]
+
+    model = MotionModel(idx0 * ppi, idx1 * ppi, move["t_start"], move["t_end"], ack_latency)
+    ts, xs, ys, es = np.vstack(blocks).T if blocks else np.empty((4, 0))
+    ok = es != 0
+    if not ok.any():
+        raise RuntimeError("EDC = 0 (全部樣本)")
+    idx = model.pulse_at(ts[ok] - lag) / ppi             # 輸出反映的是 lag 之前的位置
+    lo, hi = mapper.idx_range
+    keep = (idx >= lo) & (idx <= hi)
+    nm = mapper.nm_from_idx(idx[keep])
+    ev = HC_EV_NM / nm
+    xn = (xs[ok] / es[ok])[keep]; yn = (ys[ok] / es[ok])[keep]
+    (x_m, y_m, e_m), counts = bin_samples(ev, [xn, yn, es[ok][keep]], ev_grid)
+    return dict(x=x_m, y=y_m, edc=e_m, counts=counts, n_samples=int(ts.size),
+                duration_s=model.t_end - model.t_start, pulse_rate=model.pulse_rate, lag_s=lag)
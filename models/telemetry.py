@@ -0,0 +1,51 @@
+# telemetry.py
+# ---------------------------------------------------------------------------
+#  每點計時紀錄 (timing_<時間>.csv，與 .asc 同一存檔資料夾)
+#  -----------------------------------------------------
+#  欄位 (時間點皆為相對本次掃描開始的秒數，perf_counter)：
+#    run       ：第幾輪 (0 起算)
+#    ev        ：能量
+#    t_wall    ：該點完成的系統時間 (epoch s)
+#    t_move0/1 ：goto() 呼叫 / 返回 (含 MotionService 排隊)
+#    t_ack     ：reader 收到韌體 OK 的時間；同一 idx 不動時為空
+#    settle_s  ：Settler 等待；query_s：settle 期間單次讀值平均延遲 (GPIB)
+#    n, dwell_s：Dwell 取樣數與停留時間
+#    weight    ：該點合併了幾個網格點 (同一脈衝，見 engine.snap_pulses)
+#    gui_ms    ：GUI 把該批畫上去的時間平均到每點
+#
+#  馬達慢 → t_move1 - t_move0 / t_ack 變大；GPIB 慢 → query_s；GUI → gui_ms
+# ---------------------------------------------------------------------------
+
+import csv
+from typing import Iterable
+
+TIMING_FIELDS = ("run", "ev", "t_wall", "t_move0", "t_move1", "t_ack",
+                 "settle_s", "query_s", "n", "dwell_s", "weight", "gui_ms")
+
+
+class TimingLog:
+    """逐批 append 的 CSV；每批 flush，掃描中斷也保留已寫的部分
+    defer=True：第一次 write / close 時才開檔 (GUI 交給 FileWriter 執行緒寫，同 RawWriter)"""
+
+    def __init__(self, path, defer: bool = False) -> None:
+        self.path = path
+        self._f = self._w = None
+        if not defer:
+            self._open()
+
+    def _open(self) -> None:
+        self._f = open(self.path, "w", newline="", encoding="utf-8")
+        self._w = csv.DictWriter(self._f, TIMING_FIELDS, restval="", extrasaction="ignore")
+        self._w.writeheader()
+
+    def write(self, metas: Iterable[dict]) -> None:
+        if self._f is None:
+            self._open()
+        self._w.writerows({k: ("" if v != v else v) for k, v in m.items()} for m in metas)
+        self._f.flush()
+
+    def close(self) -> None:
+        if self._f is None:
+            self._open()                    # 沒有任何點也留下標頭列
+        if not self._f.closed:
+            self._f.close()
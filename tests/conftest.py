@@ -0,0 +1,10 @@
+# conftest.py
+# ---------------------------------------------------------------------------
+#  repo 根目錄放進 sys.path (沒有安裝成套件，模組以 models.xxx 匯入)
+#  只測 Qt-free 的 models/*；執行：repo 根目錄下 python -m pytest -q
+# ---------------------------------------------------------------------------
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
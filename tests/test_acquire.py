@@ -0,0 +1,104 @@
+# test_acquire.py — Settler 最短等待 (依斜率 / 容差) 與 LockInSim 實際收斂比例；
+#                   Dwell 達到目標 SE 即停、停留上限與 EDC = 0
+
+import math
+import time
+
+import numpy as np
+import pytest
+
+from drivers.sim import LockInSim
+from models.acquire import Dwell, Settler, ntau_settle
+from models.mapper import Mapper
+
+
+def left(t, n):
+    return math.exp(-t) * sum(t ** k / math.factorial(k) for k in range(n))
+
+
+@pytest.mark.parametrize("slope", [6, 12, 18, 24])
+@pytest.mark.parametrize("tol", [0.01, 0.001])
+def test_ntau_settle_solves_step_response(slope, tol):
+    t = ntau_settle(slope, tol)
+    assert left(t, slope // 6) == pytest.approx(tol, rel=1e-6)
+    assert t >= (slope // 6 - 1) + math.log(1 / tol) - 1e-9     # 高階比 ln(1/tol) 長
+
+
+@pytest.fixture
+def mapper(tmp_path):
+    p = tmp_path / "calibration.csv"
+    p.write_text("idx,nm\n0,800\n900,950\n")
+    return Mapper(p)
+
+
+@pytest.mark.parametrize("slope", ["6 dB/oct", "12 dB/oct", "24 dB/oct"])
+@pytest.mark.parametrize("step", [0.05, 1.0])
+def test_settled_fraction(mapper, slope, step):
+    level = [1e-4]
+    lk = LockInSim(mapper, lambda: 100.0, spectrum=lambda ev: level[0], noise_v=0.0,
+                   query_s=0.0, seed=0)
+    lk.set_param(time_const="10 ms", filter_slope=slope)
+    x0 = lk.read_xyz()[0]                                   # 濾波器停在舊值
+    level[0] *= 1 + step                                    # 馬達到位：訊號階躍
+    x1 = x0 * (1 + step)
+    st = Settler(lk, rel_tol=0.01)
+    (x, _, edc), settle_s = st.settle()
+    frac = (x / edc * lk.edc - x0) / (x1 - x0)
+    assert settle_s >= st.min_wait()
+    assert frac >= 0.99                                     # 不能只看讀值變化慢就收工
+
+
+# ------------------------------ Dwell ------------------------------
+class NoisyLockin:
+    """x/edc = 1e-4 + 高斯雜訊 sigma；sleep=True 時每筆真的花 interval_s"""
+    tau_s = 1e-3
+
+    def __init__(self, sigma, sleep=False, edc=1.0):
+        self.sigma, self.sleep, self.edc = sigma, sleep, edc
+        self.rng = np.random.default_rng(0)
+        self.n = 0
+
+    def read_xyz_block(self, n, interval_s=0.0):
+        if self.sleep:
+            time.sleep(n * interval_s)
+        self.n += n
+        v = 1e-4 + self.rng.normal(0.0, self.sigma, (n, 2))
+        return np.column_stack([np.zeros(n), v * self.edc, np.full(n, self.edc)])
+
+
+def first(lk):
+    return tuple(lk.read_xyz_block(1)[0, 1:])
+
+
+def test_dwell_stops_at_target_se():
+    lk = NoisyLockin(sigma=1e-5)
+    r = Dwell(lk, target_se=1e-6, max_dwell_s=60.0, block=1000).measure(first(lk))
+    assert max(r["x_se"], r["y_se"]) <= 1e-6
+    assert 60 <= r["n"] <= 200                              # SE ∝ σ/√n → 約 100 筆，不多讀
+    assert r["n"] == lk.n and r["x"] == pytest.approx(1e-4, abs=5e-6)
+
+
+def test_dwell_quiet_signal_takes_min_samples():
+    lk = NoisyLockin(sigma=0.0)
+    r = Dwell(lk, target_se=1e-6, min_samples=3).measure(first(lk))
+    assert r["n"] == 3 and r["x_se"] == 0.0
+
+
+def test_dwell_time_cap_and_stop():
+    lk = NoisyLockin(sigma=1e-5, sleep=True)
+    r = Dwell(lk, target_se=1e-9, max_dwell_s=0.2).measure(first(lk))
+    assert r["dwell_s"] < 0.3 and r["x_se"] > 1e-9          # 達不到目標 → 時間到就停
+    r = Dwell(lk, target_se=1e-9, max_dwell_s=10.0).measure(first(lk), stop=lambda: True)
+    assert r["n"] == 1 and r["dwell_s"] < 0.1
+
+
+def test_dwell_edc_zero_aborts():
+    lk = NoisyLockin(sigma=1e-5, edc=0.0)
+    r = Dwell(lk, target_se=1e-6).measure((1e-4, 0.0, 1.0))
+    assert r["edc"] == 0.0 and r["n"] == 1
+
+
+def test_dwell_scaled_for_merged_points():
+    d = Dwell(None, target_se=1e-6, max_dwell_s=2.0, min_samples=3).scaled(4)
+    assert d.target_se == pytest.approx(5e-7)               # 合併 4 點：SE ÷ √4
+    assert d.max_dwell_s == 8.0 and d.min_samples == 12
@@ -0,0 +1,121 @@
+# test_aio.py — asyncio 協調層：awaitable 驅動、移動中輪詢、Auto-Check、Qt bridge
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from drivers.aio import AsyncDevice, AsyncLockIn, AsyncMotor, Orchestrator, poll_during
+from drivers.motion import MotionService
+from drivers.motor import MotorArduino
+from drivers.sim import LockInSim, SimSerial
+from workers import auto_check
+
+
+@pytest.fixture
+def motion():
+    motor = MotorArduino(transport=SimSerial(pulse_time=0.0002, seed=0))
+    svc = MotionService(motor)
+    yield svc
+    svc.close()
+    motor.close()
+
+
+@pytest.fixture
+def orch():
+    o = Orchestrator()
+    yield o
+    o.close()
+
+
+class _Dark:
+    """EDC = 0 的 lock-in (例如光被擋住)"""
+    def read_xyz(self):
+        return 0.0, 0.0, 0.0
+
+
+def test_goto_and_lockin_overlap(orch, motion):
+    amotor, alk = AsyncMotor(motion), AsyncLockIn(LockInSim(query_s=0.001, seed=0))
+
+    async def go():
+        await alk.set_param(time_const="3 ms")
+        return await poll_during(amotor.goto(50), alk.read_xyz, 0.005)
+
+    pos, samples = orch.submit(go()).result(timeout=10)
+    assert pos == 50 == motion.position
+    assert len(samples) > 1                                 # 移動期間 lock-in 照常讀值
+    assert all(len(v) == 3 for _, v in samples)
+    assert alk.tau_s == pytest.approx(3e-3)
+    amotor.close(); alk.close()
+
+
+def test_device_calls_run_on_own_thread(orch):
+    names = []
+    dev = AsyncDevice(object(), "thermo")
+
+    async def go():
+        await dev.call(lambda: names.append(threading.current_thread().name))
+
+    orch.submit(go()).result(timeout=5)
+    assert names[0].startswith("aio-thermo")
+    dev.close()
+
+
+def test_poll_failure_cancels_move(orch):
+    async def slow():
+        await asyncio.sleep(10)
+
+    async def bad():
+        raise OSError("sensor gone")
+
+    async def go():
+        task = asyncio.ensure_future(slow())
+        with pytest.raises(OSError):
+            await poll_during(task, bad, 0.01)
+        await asyncio.sleep(0)
+        return task.cancelled()
+
+    assert orch.submit(go()).result(timeout=5)
+
+
+def test_auto_check_walks_range(orch, motion):
+    seen = []
+    msg = orch.submit(auto_check(AsyncMotor(motion), 0, 10, seen.append)).result(timeout=10)
+    assert msg == "" and motion.position == 10
+    assert seen[-1] == 100 and len(seen) == 11
+
+
+def test_auto_check_reports_dark_edc(orch, motion):
+    msg = orch.submit(auto_check(AsyncMotor(motion), 0, 20, alockin=AsyncLockIn(_Dark()),
+                                 poll_s=0.001)).result(timeout=10)
+    assert "EDC = 0" in msg
+
+
+def test_close_cancels_running_coroutines():
+    o = Orchestrator()
+    fut = o.submit(asyncio.sleep(10))
+    t0 = time.perf_counter()
+    o.close()
+    assert fut.cancelled() and time.perf_counter() - t0 < 5
+
+
+def test_bridge_delivers_on_gui_thread(orch):
+    QtCore = pytest.importorskip("PyQt5.QtCore")
+    from drivers.aio import QtBridge
+
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    bridge = QtBridge(orch)
+    got = []
+
+    async def work():
+        bridge.post(lambda: got.append(("post", threading.current_thread())))
+        return 42
+
+    bridge.run(work(), lambda f: got.append((f.result(), threading.current_thread())))
+    t0 = time.time()
+    while len(got) < 2 and time.time() - t0 < 5:
+        app.processEvents()
+        time.sleep(0.005)
+    assert [g[0] for g in got] == ["post", 42]
+    assert all(t is threading.main_thread() for _, t in got)
@@ -0,0 +1,121 @@
+# test_catalog.py — read_asc 與 .asc 目錄索引 (增量更新、查詢、參數、疊圖)
+
+import os
+
+import numpy as np
+import pytest
+
+from models.asc_io import read_asc, write_asc
+from models.catalog import Catalog, load_stack
+from models.raw_store import RawWriter
+
+EV = np.linspace(2.0, 1.9, 11)
+
+
+# ------------------------------- read_asc ---------------------------------
+def test_read_asc_round_trip(tmp_path):
+    p = tmp_path / "1.asc"
+    x, y = np.sin(EV), np.cos(EV)
+    write_asc(str(p), EV, x, y)
+    ev, xr, yr = read_asc(str(p))
+    np.testing.assert_allclose(ev, EV, rtol=1e-6)
+    np.testing.assert_allclose(xr, x, rtol=1e-6)
+    np.testing.assert_allclose(yr, y, rtol=1e-6)
+
+
+@pytest.mark.parametrize("text", [
+    "",                                                      # 空檔
+    "energy\tX/EDC\n1.0\t2.0\n",                             # 少了 Y 區塊
+    "energy\tX/EDC\n1.0\t2.0\n\nenergy\tY/EDC\n1.0\n",       # 欄數不對
+    "energy\tX/EDC\n1.0\t2.0\n\nenergy\tY/EDC\n1.0\t2.0\n1.1\t2.0\n",   # 點數不同
+])
+def test_read_asc_rejects(tmp_path, text):
+    p = tmp_path / "bad.asc"
+    p.write_text(text)
+    with pytest.raises(ValueError):
+        read_asc(str(p))
+
+
+# ------------------------------- Catalog ----------------------------------
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "backup"
+    (root / "a").mkdir(parents=True)
+    (root / "b").mkdir()
+    write_asc(str(root / "a" / "1.asc"), EV, EV, -EV)
+    write_asc(str(root / "b" / "5.asc"), EV + 1.0, EV, -EV)
+    return root
+
+
+def test_incremental_refresh(tmp_path, tree):
+    cat = Catalog(str(tmp_path / "cat.sqlite"))
+    assert cat.refresh([str(tree)], workers=2) == (2, 0, 0)
+    assert cat.refresh() == (0, 2, 0)                        # 沒變的不重讀
+
+    p = tree / "a" / "1.asc"
+    write_asc(str(p), EV[:5], EV[:5], -EV[:5])               # 改寫 (大小變了)
+    write_asc(str(tree / "a" / "2.asc"), EV, EV, -EV)
+    os.remove(tree / "b" / "5.asc")
+    assert cat.refresh() == (2, 0, 1)                        # 1 改寫、2 新增、5 刪除
+    assert cat.refresh() == (0, 2, 0)
+    assert len(cat) == 2
+    row = {r["name"]: r for r in cat.query()}["1.asc"]
+    assert row["n_points"] == 5 and row["scans"] == 1
+    cat.close()
+
+
+def test_query_filters(tmp_path, tree):
+    cat = Catalog(str(tmp_path / "cat.sqlite"))
+    cat.refresh([str(tree)])
+    assert [r["name"] for r in cat.query(ev=(2.95, 3.5))] == ["5.asc"]
+    assert [r["name"] for r in cat.query(dir="backup" + os.sep + "a")] == ["1.asc"]
+    assert [r["name"] for r in cat.query(min_scans=2)] == ["5.asc"]
+    row = cat.query(dir="a")[0]
+    assert row["ev_min"] == pytest.approx(1.9) and row["ev_max"] == pytest.approx(2.0)
+    cat.close()
+
+
+def test_bad_and_empty_files_are_errors(tmp_path, tree):
+    (tree / "a" / "junk.asc").write_text("hello")
+    (tree / "a" / "7.asc").write_text("energy\tX/EDC\n\nenergy\tY/EDC\n")   # 沒有資料點
+    cat = Catalog(str(tmp_path / "cat.sqlite"))
+    cat.refresh([str(tree)])
+    bad = dict(cat.errors())
+    assert set(os.path.basename(p) for p in bad) == {"junk.asc", "7.asc"}
+    assert bad[str(tree / "a" / "7.asc")] == "沒有資料點"
+    assert len(cat.query()) == 2                             # 查詢不列出讀不進來的檔
+    cat.close()
+
+
+def test_params_from_raw_header(tmp_path, tree):
+    w = RawWriter(str(tree / "a" / "raw_1.trraw"), dict(recipe={"ev_step": -0.01},
+                                                          lockin={"time_const": "100 ms"}))
+    w.close()
+    os.utime(tree / "a" / "1.asc")                           # .asc 在 .trraw 之後才存
+    cat = Catalog(str(tmp_path / "cat.sqlite"))
+    cat.refresh([str(tree)])
+    rows = {r["name"]: r for r in cat.query()}
+    assert rows["1.asc"]["params"] == dict(raw="raw_1.trraw", recipe={"ev_step": -0.01},
+                                           lockin={"time_const": "100 ms"})
+    assert rows["5.asc"]["params"] is None
+    cat.close()
+
+
+def test_remove_root(tmp_path, tree):
+    cat = Catalog(str(tmp_path / "cat.sqlite"))
+    cat.refresh([str(tree / "a"), str(tree / "b")])
+    cat.remove_root(str(tree / "b"))
+    assert [r["name"] for r in cat.query()] == ["1.asc"]
+    cat.close()
+
+
+def test_load_stack_interpolates(tmp_path):
+    a, b = str(tmp_path / "1.asc"), str(tmp_path / "2.asc")
+    write_asc(a, EV, EV, -EV)
+    write_asc(b, EV[::2], EV[::2], -EV[::2])                 # 較粗的網格
+    ev, x, y = load_stack([a, b], workers=2)
+    np.testing.assert_allclose(ev, EV, rtol=1e-6)
+    assert x.shape == y.shape == (2, EV.size)
+    np.testing.assert_allclose(x[1], EV, rtol=1e-6)          # 線性資料內插回原值
+    ev, x, y = load_stack([a, a])
+    np.testing.assert_array_equal(x[0], x[1])
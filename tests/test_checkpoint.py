@@ -0,0 +1,119 @@
+# test_checkpoint.py — checkpoint.jsonl 讀回 (中斷 / 寫到一半 / 完成) 與引擎續掃
+
+import json
+
+import numpy as np
+import pytest
+
+from drivers.motor import MotorArduino
+from drivers.sim import LockInSim, SimSerial
+from models.checkpoint import (CheckpointSink, ScanCheckpoint, checkpoint_path,
+                               load_checkpoint)
+from models.engine import ScanEngine, ScanPlan, ScanSink
+from models.mapper import Mapper
+
+EV = np.array([2.0, 1.98, 1.96, 1.94])
+
+
+def point(run, k, x):
+    return (EV[k], x, -x, 1.0, {"run": run, "k": k, "idx": 10 + k, "n": 1})
+
+
+def interrupted(path, n_pts):
+    """第 0 輪完成、第 1 輪量了 n_pts 點後當機 (沒有 end 紀錄)"""
+    plan = ScanPlan(EV, [10, 11, 12, 13], repeat=3)
+    ck = CheckpointSink(str(path), plan, header={"recipe": {"ev_step": -0.02}})
+    for k in range(4):
+        ck.on_move(10 + k); ck.on_point(point(0, k, float(k)))
+    ck.on_run(EV, np.arange(4.0), -np.arange(4.0))
+    for k in range(n_pts):
+        ck.on_move(10 + k); ck.on_point(point(1, k, 10.0 + k))
+    ck._f.close()
+    return plan
+
+
+def test_interrupted_scan(tmp_path):
+    interrupted(checkpoint_path(str(tmp_path)), 2)
+    ck = load_checkpoint(str(tmp_path))
+    assert ck.header["recipe"] == {"ev_step": -0.02}
+    assert ck.start_run == 1 and ck.resumable
+    np.testing.assert_allclose(ck.runs[0][1], np.arange(4.0))
+    assert ck.partial == {0: (10.0, -10.0), 1: (11.0, -11.0)}
+    assert ck.position == 11 and ck.moving is None
+    np.testing.assert_allclose(ck.plan.ev_arr, EV)
+    assert ck.plan.repeat == 3
+
+
+def test_stopped_while_moving_and_torn_line(tmp_path):
+    p = checkpoint_path(str(tmp_path))
+    interrupted(p, 2)
+    with open(p, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"t": "move", "to": 12}) + "\n")
+        f.write('{"t": "pt", "run": 1, "k"')                  # 當機時寫到一半
+    ck = ScanCheckpoint(p)
+    assert len(ck.partial) == 2
+    assert ck.position is None and ck.moving == (11, 12)     # 馬達停在半路
+
+
+def test_completed_is_not_resumable(tmp_path):
+    p = checkpoint_path(str(tmp_path))
+    plan = ScanPlan(EV, [10, 11, 12, 13])
+    ck = CheckpointSink(p, plan, position_fn=lambda: 13)
+    for k in range(4):
+        ck.on_point(point(0, k, float(k)))
+    ck.on_run(EV, np.arange(4.0), -np.arange(4.0))
+    ck.on_finish(True)
+    assert load_checkpoint(str(tmp_path)) is None
+    assert ScanCheckpoint(p).position == 13
+    assert load_checkpoint(str(tmp_path / "nowhere")) is None
+
+
+def test_missing_plan(tmp_path):
+    p = checkpoint_path(str(tmp_path))
+    with open(p, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"t": "resume"}) + "\n")
+    with pytest.raises(ValueError):
+        ScanCheckpoint(p)
+
+
+class _Points(ScanSink):
+    def __init__(self, stop_after=None):
+        self.seen, self.stop_after = [], stop_after
+
+    def on_point(self, item):
+        self.seen.append((item[4]["run"], item[4]["k"]))
+
+    def stop(self):
+        return self.stop_after is not None and len(self.seen) >= self.stop_after
+
+
+def test_engine_resumes_from_next_point(tmp_path):
+    cal = tmp_path / "calibration.csv"
+    cal.write_text("idx,nm\n0,800\n900,950\n")
+    m = Mapper(cal)
+    ser = SimSerial(pulse_time=0.0002, seed=0)
+    motor = MotorArduino(transport=ser)
+    lockin = LockInSim(m, ser.idx_now, query_s=0.0005, seed=0)
+    lockin.set_param(time_const="0.1 ms")
+    p = checkpoint_path(str(tmp_path))
+    try:
+        plan = ScanPlan.from_energy(m, 1.40, 1.44, 0.01, repeat=3, serpentine=True)
+        first = _Points(stop_after=7)
+        ck = CheckpointSink(p, plan)
+        assert not ScanEngine(lockin, motor, plan, sinks=[first, ck], stop=first.stop).run()
+
+        ck = load_checkpoint(str(tmp_path))
+        assert ck.start_run == 1 and len(ck.partial) == 2
+        second = _Points()
+        sink = CheckpointSink(p, ck.plan, resume=True)
+        assert ScanEngine(lockin, motor, ck.plan, sinks=[second, sink],
+                          start_run=ck.start_run, done=ck.partial).run()
+    finally:
+        motor.close()
+    n = len(plan)
+    seen = first.seen + second.seen
+    assert sorted(seen) == [(r, k) for r in range(3) for k in range(n)]   # 每點剛好一次
+    done = ScanCheckpoint(p)
+    assert done.completed and done.start_run == 3
+    for ev, _, _ in done.runs:
+        np.testing.assert_allclose(ev, plan.ev_arr)
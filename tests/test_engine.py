@@ -0,0 +1,51 @@
+# test_engine.py — snap_pulses 合併 / 平移、ScanPlan 的合併網格
+
+import numpy as np
+import pytest
+
+from models.engine import ScanPlan, snap_pulses
+from models.mapper import Mapper
+
+
+def test_merge_counts_duplicates():
+    p, w = snap_pulses([10, 10, 11, 12, 12, 12, 15])
+    np.testing.assert_array_equal(p, [10, 11, 12, 15])
+    np.testing.assert_array_equal(w, [2, 1, 3, 1])
+    assert w.sum() == 7
+
+
+def test_merge_descending():
+    p, w = snap_pulses([20, 20, 19, 17, 17])
+    np.testing.assert_array_equal(p, [20, 19, 17])
+    np.testing.assert_array_equal(w, [2, 1, 2])
+
+
+def test_shift_pushes_forward():
+    p, w = snap_pulses([10, 10, 10, 14, 14], "shift")
+    np.testing.assert_array_equal(p, [10, 11, 12, 14, 15])
+    np.testing.assert_array_equal(w, np.ones(5))
+
+
+def test_shift_descending_and_minimal():
+    p, _ = snap_pulses([20, 20, 19, 15], "shift")
+    np.testing.assert_array_equal(p, [20, 19, 18, 15])
+    p, _ = snap_pulses([1, 2, 3], "shift")                   # 本來就不重複 → 不動
+    np.testing.assert_array_equal(p, [1, 2, 3])
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        snap_pulses([1, 1], "drop")
+
+
+def test_plan_merge_keeps_grid_weight(tmp_path):
+    cal = tmp_path / "calibration.csv"
+    cal.write_text("idx,nm\n0,800\n900,950\n")
+    m = Mapper(cal)
+    n_grid = int(round(0.0001 / 0.00001)) + 1
+    plan = ScanPlan.from_energy(m, 1.40, 1.4001, 0.00001)
+    assert plan.weight.sum() == n_grid
+    assert plan.merged == n_grid - len(plan.idx_arr) > 0
+    shifted = ScanPlan.from_energy(m, 1.40, 1.4001, 0.00001, collapse="shift")
+    assert len(shifted.idx_arr) == n_grid
+    assert len(set(shifted.idx_arr)) == n_grid
@@ -0,0 +1,113 @@
+# test_lockin.py — NF 5610B 驅動 (不接儀器：假的 pyvisa resource)：
+#                  set_param 只送變動的指令、管線化讀值與逾時退回
+
+import numpy as np
+import pytest
+
+pyvisa = pytest.importorskip("pyvisa")
+from pyvisa import constants                                # noqa: E402
+
+from drivers.lockin import LockInNF5610B                    # noqa: E402
+
+
+class FakeInst:
+    """記錄 write；?ODT 回一組 x,y,e；burst=False 時多重查詢逾時 (VisaIOError)"""
+
+    def __init__(self, burst=True):
+        self.burst = burst
+        self.writes, self.n_clear, self._pending = [], 0, None
+        self.n = 0
+
+    def _odt(self):
+        self.n += 1
+        return f"{self.n}e-6,{-self.n}e-6,1.0"
+
+    def write(self, msg):
+        self.writes.append(msg)
+        self._pending = msg
+
+    def read(self):
+        k = self._pending.count("?ODT")
+        if k > 1 and not self.burst:
+            raise pyvisa.errors.VisaIOError(constants.StatusCode.error_timeout)
+        return ";".join(self._odt() for _ in range(k))
+
+    def query(self, msg):
+        self.writes.append(msg)
+        return self._odt()
+
+    def clear(self):
+        self.n_clear += 1
+
+
+def make(inst):
+    lk = LockInNF5610B.__new__(LockInNF5610B)               # 不開 VISA
+    lk.inst, lk._burst_ok, lk._sent, lk._params = inst, True, {}, {}
+    return lk
+
+
+# ------------------------------ set_param 快取 ------------------------------
+def test_only_changed_commands_in_one_write():
+    inst = FakeInst()
+    lk = make(inst)
+    lk.set_param(sensitivity="1 mV", time_const="100 ms", int_osc_freq=80, int_osc_range=1)
+    assert inst.writes == ["BSS6;BTC4;OFQ80,2;DDT434"]      # DDT 只在首次
+    lk.set_param(sensitivity="1 mV", time_const="300 ms")
+    assert inst.writes[-1] == "BTC5"
+    n = len(inst.writes)
+    lk.set_param(sensitivity="1 mV", time_const="300 ms")    # 全部相同 → 不送
+    assert len(inst.writes) == n
+    assert lk.tau_s == 0.3
+
+
+def test_olv_range_goes_with_level():
+    inst = FakeInst()
+    lk = make(inst)
+    lk.set_param(int_osc_level=500, int_osc_level_range=1)
+    assert inst.writes[-1] == "OLV500,1;DDT434"
+    lk.set_param(int_osc_level=600)                           # 沒給 range → 沿用快取
+    assert inst.writes[-1] == "OLV600,1"
+    lk.set_param(int_osc_level=60, int_osc_level_range=2)    # 換 range：同一道指令，不會先以舊 range 送位準
+    assert inst.writes[-1] == "OLV60,2"
+
+
+def test_failed_write_resends_everything():
+    inst = FakeInst()
+    lk = make(inst)
+    lk.set_param(sensitivity="1 mV")
+    inst.write = lambda msg: (_ for _ in ()).throw(pyvisa.errors.VisaIOError(
+        constants.StatusCode.error_timeout))
+    with pytest.raises(pyvisa.errors.VisaIOError):
+        lk.set_param(time_const="1 s")
+    del inst.write                                          # 恢復
+    lk.set_param(sensitivity="1 mV", time_const="1 s")
+    assert inst.writes[-1] == "BSS6;BTC6;DDT434"            # 儀器狀態不確定 → 全部重送
+
+
+# ------------------------------ 管線化讀值 ------------------------------
+def test_burst_reads_in_chunks():
+    inst = FakeInst()
+    lk = make(inst)
+    out = lk.read_xyz_block(20)
+    assert out.shape == (20, 4)
+    np.testing.assert_allclose(out[:, 1], np.arange(1, 21) * 1e-6)
+    assert [w.count("?ODT") for w in inst.writes] == [16, 4]   # BURST_CHUNK = 16
+    assert np.all(np.diff(out[:, 0]) >= 0)
+
+
+def test_burst_timeout_falls_back_to_single_reads():
+    inst = FakeInst(burst=False)
+    lk = make(inst)
+    out = lk.read_xyz_block(5)                              # 不能讓逾時中止掃描
+    np.testing.assert_allclose(out[:, 1], np.arange(1, 6) * 1e-6)
+    assert not lk._burst_ok and inst.n_clear == 1
+    inst.writes.clear()
+    lk.read_xyz_block(3)                                    # 之後直接逐筆，不再等逾時
+    assert inst.writes == ["?ODT"] * 3 and inst.n_clear == 1
+
+
+def test_long_interval_uses_single_reads():
+    inst = FakeInst()
+    lk = make(inst)
+    lk.read_xyz_block(2, interval_s=0.01)
+    assert inst.writes == ["?ODT", "?ODT"] and lk._burst_ok
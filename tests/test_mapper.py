@@ -0,0 +1,60 @@
+# test_mapper.py — Mapper 陣列查表：未排序 / nm 遞減的校正表、範圍一次回報、大網格
+
+import time
+
+import numpy as np
+import pytest
+
+from models.mapper import Mapper
+
+
+def make(tmp_path, rows):
+    p = tmp_path / "calibration.csv"
+    p.write_text("idx,nm\n" + "".join(f"{i},{nm}\n" for i, nm in rows))
+    return Mapper(p)
+
+
+def test_unsorted_file_and_descending_nm(tmp_path):
+    m = make(tmp_path, [(900, 700.0), (0, 800.0), (450, 760.0)])   # nm 隨 idx 遞減
+    np.testing.assert_array_equal(m.idx_arr, [0, 450, 900])
+    assert m.idx_range == (0.0, 900.0) and m.nm_range == (700.0, 800.0)
+    assert m.idx_from_nm(760.0) == pytest.approx(450.0)
+    assert m.idx_from_nm(780.0) == pytest.approx(225.0)
+    assert isinstance(m.nm_from_idx(450), float)
+    idx = np.array([[0, 100], [450, 900]])
+    np.testing.assert_allclose(m.idx_from_nm(m.nm_from_idx(idx)), idx)   # 形狀不變
+
+
+def test_out_of_range_reports_all_points(tmp_path):
+    m = make(tmp_path, [(0, 600.0), (1000, 700.0)])
+    with pytest.raises(ValueError) as e:
+        m.idx_from_nm(np.r_[650.0, 599.0, 701.0, np.nan])
+    msg = str(e.value)
+    assert "599" in msg and "701" in msg and "nan" in msg and "650" not in msg
+    with pytest.raises(ValueError, match=r"共 20 點"):
+        m.nm_from_idx(np.arange(-20, 0))
+
+
+def test_non_monotone_refuses_inverse(tmp_path):
+    m = make(tmp_path, [(0, 600.0), (500, 700.0), (1000, 650.0)])
+    assert m.nm_from_idx(250) == pytest.approx(650.0)
+    with pytest.raises(ValueError, match="非單調"):
+        m.idx_from_nm(640.0)
+
+
+def test_add_point_rebuilds_cache(tmp_path):
+    m = make(tmp_path, [(0, 600.0), (1000, 700.0)])
+    m.add_point(2000, 900.0)
+    assert m.idx_range == (0.0, 2000.0)
+    assert m.idx_from_nm(800.0) == pytest.approx(1500.0)
+
+
+def test_fine_grid_is_vectorised(tmp_path):
+    m = make(tmp_path, [(i, 600.0 + 0.1 * i + 1e-5 * i * i) for i in range(0, 1001, 50)])
+    nm = np.linspace(601.0, 699.0, 100_000)
+    t0 = time.perf_counter()
+    idx = m.idx_from_nm(nm)
+    assert time.perf_counter() - t0 < 0.5
+    sample = nm[::9973]
+    np.testing.assert_allclose(idx[::9973], [m.idx_from_nm(v) for v in sample])
+    np.testing.assert_allclose(m.nm_from_idx(idx), nm)
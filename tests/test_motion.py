@@ -0,0 +1,67 @@
+# test_motion.py — MotionService：優先序、同優先序先進先出、jog 合併、取消未開始的指令
+
+import threading
+
+import pytest
+
+from drivers.motion import PRIO_GOTO, PRIO_JOG, PRIO_SCAN, MotionService
+
+
+class GateMotor:
+    """第一趟移動卡在 gate，讓之後送出的指令都先排進佇列"""
+    PULSE_PER_IDX = 10
+
+    def __init__(self):
+        self.position, self.moves, self.froms = 0, [], []
+        self.gate, self.started = threading.Event(), threading.Event()
+
+    def goto(self, idx, backlash=None):
+        self.started.set()
+        self.gate.wait(5.0)
+        self.froms.append(self.position)
+        self.moves.append(idx)
+        self.position = idx
+
+
+@pytest.fixture
+def svc():
+    motor = GateMotor()
+    s = MotionService(motor)
+    s.submit(1, PRIO_GOTO)
+    assert motor.started.wait(2.0)
+    yield s, motor
+    motor.gate.set()
+    s.close()
+
+
+def test_priority_then_fifo(svc):
+    s, motor = svc
+    futs = [s.submit(50, PRIO_JOG), s.submit(30, PRIO_GOTO), s.submit(10, PRIO_SCAN),
+            s.submit(11, PRIO_SCAN)]
+    s.position = 7                                      # S<idx> 同步最後送出、最先執行
+    motor.gate.set()
+    assert [f.result(2.0) for f in futs] == [50, 30, 10, 11]
+    assert motor.moves == [1, 10, 11, 30, 50]
+    assert motor.froms == [0, 7, 10, 11, 30]            # sync 只改計數器，不移動
+
+
+def test_jogs_coalesce(svc):
+    s, motor = svc
+    f1 = s.jog_by(+5)                                   # 以執行中的目標 1 為基準
+    f2 = s.jog_by(+5)
+    f3 = s.jog_by(-2, lo=0, hi=20)
+    assert f1 is f2 is f3
+    motor.gate.set()
+    assert f1.result(2.0) == 9
+    assert motor.moves == [1, 9]                        # 連點三下只走一趟
+    assert s.jog_by(+100, hi=20).result(2.0) == 20      # 開始後的 jog 另起一趟，並夾在範圍內
+
+
+def test_cancel_pending(svc):
+    s, motor = svc
+    futs = [s.submit(i, PRIO_SCAN) for i in (10, 11)] + [s.jog_by(3)]
+    assert s.cancel_pending() == 3
+    motor.gate.set()
+    assert all(f.cancelled() for f in futs)
+    assert s.submit(12, PRIO_SCAN).result(2.0) == 12
+    assert motor.moves == [1, 12]
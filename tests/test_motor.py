@@ -0,0 +1,79 @@
+# test_motor.py — MotorArduino 背景 reader：OK / ERR / LIMIT / POS 分派、雜訊行、殘留 ACK (SimSerial)
+
+import time
+
+import pytest
+
+from drivers.motor import MotorArduino
+from drivers.sim import SimSerial
+
+
+try:                                                      # 有 PyQt5：reader 執行緒的訊號排隊到這條執行緒
+    from PyQt5 import QtCore
+    _app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    pump = _app.processEvents
+except ImportError:                                       # qt_compat 替身：emit 同步呼叫
+    pump = lambda: None
+
+
+def make(**kw):
+    ser = SimSerial(pulse_time=0.0002, seed=0, **kw)
+    motor = MotorArduino(transport=ser)
+    pos, lim = [], []
+    motor.positionChanged.connect(pos.append)
+    motor.hitLimit.connect(lim.append)
+    return motor, ser, pos, lim
+
+
+def settle_reader():
+    time.sleep(0.3)                                       # reader 逾時 0.1 s，讓注入的行先被分派
+
+
+def test_ok_and_pos_reports():
+    motor, ser, pos, lim = make(pos_every=200)
+    try:
+        motor.goto(100)
+        pump()
+        assert motor.position == 100 and motor.last_ack_t >= ser.last_arrival
+        # 到位 (goto 執行緒直接 emit) + 移動中 POS 每 200 脈衝一次 (reader 執行緒，排隊送達)
+        assert 100 in pos and [p for p in pos if p != 100] == [20, 40, 60, 80]
+        assert not lim
+    finally:
+        motor.close()
+
+
+def test_err_raises_and_keeps_position():
+    motor, ser, pos, lim = make(err_rate=1.0)
+    try:
+        with pytest.raises(RuntimeError, match="ERR sim"):
+            motor.goto(30)
+        assert motor.position == 0
+    finally:
+        motor.close()
+
+
+def test_limit_moves_software_position():
+    motor, ser, pos, lim = make(hi_pulse=500)
+    try:
+        with pytest.raises(RuntimeError, match="limit"):
+            motor.goto(100)
+        pump()
+        assert lim == [50] and motor.position == 50 and pos[-1] == 50
+    finally:
+        motor.close()
+
+
+def test_stray_lines_and_stale_ack_ignored(capsys):
+    motor, ser, pos, lim = make()
+    try:
+        for line in ("hello", "POS abc", "OK"):          # 雜訊、壞 POS、上一個指令殘留的 OK
+            ser.inject(line)
+        settle_reader()
+        motor.goto(200)                                   # 不能被殘留的 OK 提早放行
+        pump()
+        assert motor.last_ack_t >= ser.last_arrival
+        assert motor.position == 200 and pos == [200]     # 壞 POS 不發訊號
+        out = capsys.readouterr().out
+        assert "? hello" in out and "? POS abc" in out
+    finally:
+        motor.close()
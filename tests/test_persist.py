@@ -0,0 +1,81 @@
+# test_persist.py — FileWriter：原子寫檔、FIFO 輪替 / 續掃接回、佇列滿時不阻塞
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from models.asc_io import read_asc
+from models.persist import FileWriter, numbered_asc
+from models.telemetry import TimingLog
+
+EV = np.linspace(2.0, 1.9, 5)
+
+
+def test_save_asc_and_fifo(tmp_path):
+    deleted = []
+    w = FileWriter(on_deleted=deleted.append)
+    paths = [str(tmp_path / f"{n}.asc") for n in (1, 2, 3, 4)]
+    for p in paths:
+        w.save_asc(p, EV, EV, -EV, keep=2)
+    w.close()
+    assert deleted == paths[:2]
+    assert sorted(os.listdir(tmp_path)) == ["3.asc", "4.asc"]   # 沒有殘留 .tmp
+    np.testing.assert_allclose(read_asc(paths[-1])[1], EV)
+
+
+def test_track_puts_old_files_first(tmp_path):
+    for n in (10, 2, 1):
+        (tmp_path / f"{n}.asc").write_text("x")
+    (tmp_path / "avg_all.asc").write_text("x")
+    old = numbered_asc(str(tmp_path), upto=2)
+    assert [os.path.basename(p) for p in old] == ["1.asc", "2.asc"]
+    w = FileWriter()
+    w.track(old)
+    w.save_asc(str(tmp_path / "3.asc"), EV, EV, -EV, keep=2)
+    w.close()
+    assert sorted(os.listdir(tmp_path)) == ["10.asc", "2.asc", "3.asc", "avg_all.asc"]
+
+
+def test_full_queue_does_not_block(tmp_path):
+    gate, seen, pressure = threading.Event(), [], []
+    w = FileWriter(maxsize=2, on_backpressure=pressure.append)
+    w.call(gate.wait)                                       # 磁碟卡住
+    time.sleep(0.05)
+    t0 = time.perf_counter()
+    for i in range(50):
+        w.call(seen.extend, [i], merge=True)
+    w.call(seen.append, "end")
+    assert time.perf_counter() - t0 < 0.5                   # 呼叫端 (GUI) 不等
+    assert pressure and w.n_backpressure > 0
+    gate.set()
+    w.close()
+    assert seen == list(range(50)) + ["end"]                # 合併後順序不變、不丟
+
+
+def test_merge_only_same_function(tmp_path):
+    gate, calls = threading.Event(), []
+    w = FileWriter(maxsize=1)
+    w.call(gate.wait)
+    time.sleep(0.05)
+    w.call(lambda items: calls.append(("q", items)), [0], merge=True)   # 進佇列
+    a = lambda items: calls.append(("a", items))
+    b = lambda items: calls.append(("b", items))
+    for f, i in ((a, 1), (a, 2), (b, 3), (a, 4), (a, 5)):
+        w.call(f, [i], merge=True)
+    gate.set()
+    w.close()
+    assert calls == [("q", [0]), ("a", [1, 2]), ("b", [3]), ("a", [4, 5])]
+
+
+def test_timing_log_on_writer_thread(tmp_path):
+    p = tmp_path / "timing.csv"
+    log = TimingLog(str(p), defer=True)
+    assert not p.exists()
+    w = FileWriter()
+    w.call(log.write, [{"run": 0, "ev": 2.0, "settle_s": float("nan")}], merge=True)
+    w.call(log.close)
+    w.close()
+    lines = p.read_text().splitlines()
+    assert lines[0].startswith("run,ev,") and lines[1].startswith("0,2.0,")
@@ -0,0 +1,94 @@
+# test_planner.py — 自適應網格：特徵附近細化到最小步距、平坦處維持粗網格；
+#                   之後各輪沿用細化網格，非均勻能量軸的平均與 .asc 讀寫
+
+import numpy as np
+
+from models.asc_io import read_asc, write_asc
+from models.engine import ScanEngine, ScanPlan, ScanSink
+from models.planner import AdaptivePlanner
+from models.stats import RunAccumulator
+
+N = 401
+EV = np.linspace(1.90, 2.10, N)
+
+
+def peak(ev):
+    return 1e-4 / (1 + ((ev - 2.0) / 0.004) ** 2)
+
+
+def run_planner(planner, f):
+    got = {}
+    batch = planner.coarse()
+    while batch:
+        got.update((k, f(EV[k])) for k in batch)
+        keys = sorted(got)
+        batch = planner.refine(keys, [got[k] for k in keys], [0.0] * len(keys))
+    return np.array(sorted(got))
+
+
+def test_refines_only_near_feature():
+    keys = run_planner(AdaptivePlanner(N, coarse_every=16, tol=0.05), peak)
+    assert keys[0] == 0 and keys[-1] == N - 1
+    assert len(keys) < N // 3
+    gaps = np.diff(keys)
+    near = np.abs(EV[keys[:-1]] - 2.0) < 0.005
+    assert gaps[near].max() <= 2                            # 峰附近接近最小步距
+    assert gaps[EV[keys[:-1]] < 1.95].min() == 16           # 基線維持粗網格
+
+
+def test_flat_signal_stays_coarse():
+    keys = run_planner(AdaptivePlanner(N, coarse_every=16), lambda ev: 1e-6 * ev)
+    np.testing.assert_array_equal(keys, AdaptivePlanner(N, 16).coarse())
+
+
+class Motor:
+    PULSE_PER_IDX = 10
+
+    def __init__(self):
+        self.position = 0
+
+    def goto(self, idx, backlash=None):
+        self.position = idx
+
+
+class Lockin:
+    tau_s, slope_db = 1e-5, 6
+
+    def __init__(self, motor):
+        self.motor = motor
+
+    def read_xyz(self):
+        ev = EV[int(round(self.motor.position))]
+        return peak(ev), -peak(ev), 1.0
+
+
+class Runs(ScanSink):
+    def __init__(self):
+        self.runs = []
+
+    def on_run(self, ev_arr, x_arr, y_arr):
+        self.runs.append((ev_arr, x_arr, y_arr))
+
+
+def test_later_runs_reuse_grid_and_average(tmp_path):
+    motor = Motor()
+    plan = ScanPlan(EV, list(range(N)), repeat=3)
+    sink = Runs()
+    assert ScanEngine(Lockin(motor), motor, plan, planner=AdaptivePlanner(N, 16),
+                      sinks=[sink]).run()
+    ev = sink.runs[0][0]
+    assert len(sink.runs) == 3 and len(ev) < N
+    for e, _, _ in sink.runs[1:]:
+        np.testing.assert_array_equal(e, ev)                # 第 2、3 輪沿用細化網格
+    assert np.ptp(np.diff(ev)) > 0                          # 非均勻
+
+    acc = RunAccumulator()
+    for run in sink.runs:
+        acc.push(*run)
+    x, y = acc.mean
+    np.testing.assert_allclose(x, peak(ev))
+    p = tmp_path / "avg.asc"
+    write_asc(p, acc.ev, x, y)
+    ev2, x2, y2 = read_asc(p)
+    np.testing.assert_allclose(ev2, ev, rtol=1e-6)
+    np.testing.assert_allclose(y2, -peak(ev), rtol=1e-6)
@@ -0,0 +1,52 @@
+# test_ramp.py — OLV 漸進：步階、換 range 不跳變、中斷
+
+import pytest
+
+from models.ramp import OLV_MV_PER_CODE, ramp_legs, ramp_olv, ramp_plan
+
+
+class _Recorder:
+    def __init__(self):
+        self.sent = []
+
+    def set_param(self, **kw):
+        self.sent.append((kw["int_osc_level"], kw["int_osc_level_range"]))
+
+
+def mv(level, rng):
+    return level * OLV_MV_PER_CODE[rng]
+
+
+def test_plan_steps_and_interval():
+    levels, dt = ramp_plan(0, 100, 1, slew_mv_s=50.0, steps=4)
+    assert levels == [25, 50, 75, 100]
+    assert dt == pytest.approx(100 / 50 / 4)
+
+
+@pytest.mark.parametrize("start, start_rng, target, rng", [
+    (100, 2, 100, 1),           # 1 V → 100 mV
+    (255, 2, 0, 0),             # 2.55 V → 0
+    (30, 0, 200, 2),            # 3 mV → 2 V
+    (37, 1, 40, 2),             # 換檔位準要四捨五入
+])
+def test_legs_switch_where_both_ranges_agree(start, start_rng, target, rng):
+    (a0, a1, r0), (b0, b1, r1) = ramp_legs(start, start_rng, target, rng)
+    assert (a0, r0, b1, r1) == (start, start_rng, target, rng)
+    assert mv(a1, r0) == pytest.approx(mv(b0, r1))          # 換檔不跳變
+    assert 0 <= a1 <= 255 and 0 <= b0 <= 255
+
+
+def test_ramp_across_ranges_has_no_jump():
+    lk = _Recorder()
+    assert ramp_olv(lk, 100, 100, 1, slew_mv_s=0, steps=5, start_rng=2)
+    assert lk.sent[-1] == (100, 1)
+    out = [mv(100, 2)] + [mv(v, r) for v, r in lk.sent]      # 起點 1000 mV
+    assert out[5] == pytest.approx(250.0)                   # 舊 range 走到 250 mV 換檔
+    steps = [abs(b - a) for a, b in zip(out, out[1:])]
+    assert max(steps) == pytest.approx((1000 - 250) / 5)    # 換檔那一步不比平常大
+
+
+def test_stop_leaves_current_level():
+    lk = _Recorder()
+    assert not ramp_olv(lk, 0, 100, 1, slew_mv_s=0, steps=10, stop=lambda: len(lk.sent) >= 3)
+    assert lk.sent == [(10, 1), (20, 1), (30, 1)]
@@ -0,0 +1,91 @@
+# test_raw_store.py — .trraw 寫入 / memmap 讀回、遞減能量軸、續寫與尾端截斷
+
+import numpy as np
+import pytest
+
+from models.asc_io import read_asc
+from models.raw_store import RECORD, RawReader, RawWriter, read_header
+
+EV = np.linspace(2.0, 1.9, 6)                   # 計畫網格遞減 (高能量往低能量掃)
+
+
+def items(run, ev=EV, offset=0.0):
+    return [(e, run + offset + k, -(run + k), 1.0 + k, {"run": run, "idx": 100 + k, "n": 1})
+            for k, e in enumerate(ev)]
+
+
+def write(path, runs, **kw):
+    w = RawWriter(str(path), dict(ev_arr=EV, repeat=len(runs), recipe={"ev_step": -0.02}), **kw)
+    for r in runs:
+        w.append(items(r))
+    w.close()
+
+
+def test_round_trip(tmp_path):
+    p = tmp_path / "a.trraw"
+    write(p, [0, 1])
+    hdr = read_header(str(p))
+    assert hdr["recipe"] == {"ev_step": -0.02} and hdr["repeat"] == 2
+    np.testing.assert_allclose(hdr["ev_arr"], EV)
+    r = RawReader(str(p))
+    assert len(r) == 12 and r.n_runs == 2
+    np.testing.assert_array_equal(r.records["idx"][:6], 100 + np.arange(6))
+    np.testing.assert_array_equal(r.records["edc"][:6], 1.0 + np.arange(6))
+
+
+def test_descending_cube_follows_plan(tmp_path):
+    p = tmp_path / "a.trraw"
+    write(p, [0, 1])
+    r = RawReader(str(p))
+    np.testing.assert_allclose(r.ev, EV)                    # 方向同計畫網格
+    x = r.cube("x")
+    np.testing.assert_allclose(x[0], np.arange(6))          # 第 k 點在第 k 欄
+    np.testing.assert_allclose(x[1], 1 + np.arange(6))
+    ev, xm, ym = r.average()
+    np.testing.assert_allclose(xm, 0.5 + np.arange(6))
+    np.testing.assert_allclose(ym, -(0.5 + np.arange(6)))
+
+
+def test_partial_run_and_export(tmp_path):
+    p = tmp_path / "a.trraw"
+    w = RawWriter(str(p), dict(ev_arr=EV))
+    w.append(items(0))
+    w.append(items(1)[:3])                                  # 第 2 輪只量到一半
+    w.close()
+    r = RawReader(str(p))
+    assert np.isnan(r.cube("x")[1, 3:]).all()
+    np.testing.assert_array_equal(r.complete_runs(), [0])
+    asc = tmp_path / "avg.asc"
+    assert r.export_asc(str(asc)) == 1
+    ev, x, y = read_asc(str(asc))
+    np.testing.assert_allclose(ev, EV)
+    np.testing.assert_allclose(x, np.arange(6))
+
+
+def test_resume_appends_and_truncates_torn_record(tmp_path):
+    p = tmp_path / "a.trraw"
+    write(p, [0])
+    with open(p, "ab") as f:                                # 當機：最後一筆只寫了一半
+        f.write(b"\0" * (RECORD.itemsize // 2))
+    w = RawWriter(str(p), run_offset=1)
+    w.append(items(0))                                      # 引擎從 0 數，接在第 1 輪
+    w.close()
+    r = RawReader(str(p))
+    assert len(r) == 12 and r.n_runs == 2
+    np.testing.assert_allclose(r.cube("x")[1], np.arange(6))
+
+
+def test_deferred_writer_opens_lazily(tmp_path):
+    p = tmp_path / "a.trraw"
+    w = RawWriter(str(p), dict(ev_arr=EV), defer=True)
+    assert not p.exists()
+    w.close()                                               # 沒有任何點也留下標頭
+    r = RawReader(str(p))
+    assert len(r) == 0 and r.n_runs == 0
+
+
+def test_not_a_raw_file(tmp_path):
+    p = tmp_path / "x.trraw"
+    p.write_bytes(b"hello world")
+    with pytest.raises(ValueError):
+        RawReader(str(p))
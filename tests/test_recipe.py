@@ -0,0 +1,43 @@
+# test_recipe.py — run_recipe (CLI / 排程共用)：無頭執行的輸出與錯誤回報
+
+import os
+
+import pytest
+
+from drivers.motor import MotorArduino
+from drivers.sim import LockInSim, SimSerial
+from models.mapper import Mapper
+from models.recipe import parse_recipe, run_recipe
+
+
+@pytest.fixture
+def mapper(tmp_path):
+    p = tmp_path / "calibration.csv"
+    p.write_text("idx,nm\n0,800\n900,950\n")
+    return Mapper(p)
+
+
+def run(tmp_path, mapper, err_rate=0.0):
+    rec = parse_recipe(dict(ev_start=1.40, ev_end=1.42, ev_step=0.01, repeat=2,
+                            lockin={"time_const": "0.1 ms"}, save_dir=str(tmp_path / "out")))
+    ser = SimSerial(pulse_time=0.0002, err_rate=err_rate, seed=0)
+    motor = MotorArduino(transport=ser)
+    try:
+        return run_recipe(rec, motor, LockInSim(mapper, ser.idx_now, query_s=0.0005, seed=0),
+                          mapper)
+    finally:
+        motor.close()
+
+
+def test_completes_and_saves(tmp_path, mapper, capsys):
+    assert run(tmp_path, mapper)
+    out = capsys.readouterr().out
+    assert "[scan] completed" in out and out.count("[scan] run done") == 2
+    assert {"1.asc", "2.asc", "avg_all.asc", "checkpoint.jsonl"} <= set(os.listdir(tmp_path / "out"))
+
+
+def test_motor_error_is_reported(tmp_path, mapper, capsys):
+    assert not run(tmp_path, mapper, err_rate=1.0)
+    cap = capsys.readouterr()
+    assert "[scan] ERROR" in cap.err                       # 不能默默以 rc=1 結束
+    assert "[scan] aborted" in cap.out
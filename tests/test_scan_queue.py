@@ -0,0 +1,72 @@
+# test_scan_queue.py — estimate_s：settle 每停點一次、取樣依 weight 加長、走位時間；
+#                      中斷的配方只接回網格相符的 checkpoint
+
+import numpy as np
+import pytest
+
+from models.checkpoint import CheckpointSink, checkpoint_path
+from models.mapper import Mapper
+from models.recipe import build_plan, parse_recipe
+from models.acquire import ntau_settle
+from models.scan_queue import QUERY_S, estimate_s, matching_checkpoint
+
+TAU = 0.1                                   # "100 ms"
+NTAU = ntau_settle(12, 0.01) + 0.5          # 預設 12 dB/oct、rel_tol 1 % 的最短等待 + 一次輪詢
+
+
+@pytest.fixture
+def mapper(tmp_path):
+    p = tmp_path / "calibration.csv"
+    p.write_text("idx,nm\n0,800\n900,950\n")
+    return Mapper(p)
+
+
+def recipe(**kw):
+    data = dict(ev_start=1.40, ev_end=1.4001, ev_step=0.00001, lockin={"time_const": "100 ms"})
+    data.update(kw)
+    return parse_recipe(data)
+
+
+def test_merged_points_settle_once(mapper):
+    rec = recipe(repeat=2, serpentine=True)
+    plan = build_plan(rec, mapper)
+    assert plan.weight.sum() > len(plan.idx_arr)           # 確實有合併點
+    est = estimate_s(rec, mapper, pulse_time=0.0, ack_s=0.0)
+    settle = len(plan.idx_arr) * (NTAU * TAU + 2 * QUERY_S)
+    extra = (plan.weight - 1).sum() * (TAU + QUERY_S)
+    assert est == pytest.approx(2 * (settle + extra))
+
+
+def test_dwell_scales_with_weight(mapper):
+    rec = recipe()
+    plan = build_plan(rec, mapper)
+    base = estimate_s(rec, mapper, pulse_time=0.0, ack_s=0.0)
+    rec["dwell"] = {"max_dwell_s": 1.0}
+    with_dwell = estimate_s(rec, mapper, pulse_time=0.0, ack_s=0.0)
+    assert with_dwell - base == pytest.approx(
+        plan.weight.sum() * 1.0 - (plan.weight - 1).sum() * (TAU + QUERY_S))
+
+
+def test_motion_time(mapper):
+    rec = recipe(ev_start=1.40, ev_end=1.45, ev_step=0.01, repeat=3)
+    plan = build_plan(rec, mapper)
+    idx = np.asarray(plan.idx_arr)
+    pt = 0.003 * 10                                         # pulse_time × pulse_per_idx
+    still = estimate_s(rec, mapper, pulse_time=0.0)
+    moving = estimate_s(rec, mapper, from_idx=0)
+    steps = np.abs(np.diff(idx)).sum() * pt
+    back = abs(idx[-1] - idx[0]) * pt                       # 非來回：每輪之間走回起點
+    assert moving - still == pytest.approx(3 * steps + 2 * back + abs(idx[0]) * pt)
+
+
+def test_matching_checkpoint(mapper, tmp_path):
+    rec = recipe(ev_start=1.40, ev_end=1.45, ev_step=0.01, repeat=2, save_dir=str(tmp_path))
+    plan = build_plan(rec, mapper)
+    # 控制頁寫的 header：未經 parse_recipe、能量經 spinbox 捨入
+    gui = dict(ev_start=1.4, ev_end=1.45, ev_step=0.010000001, repeat=2, save_dir=str(tmp_path))
+    ck = CheckpointSink(checkpoint_path(str(tmp_path)), plan, header={"recipe": gui})
+    ck._f.close()                                           # 當機：沒有 end 紀錄
+    assert matching_checkpoint(rec).resumable
+    assert matching_checkpoint(dict(rec, ev_end=1.46)) is None
+    assert matching_checkpoint(dict(rec, repeat=3)) is None
+    assert matching_checkpoint(dict(rec, save_dir=str(tmp_path / "x"))) is None
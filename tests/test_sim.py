@@ -0,0 +1,55 @@
+# test_sim.py — 離線模擬的接線：LockInSim 經 Mapper 依 SimSerial 的實際位置產生光譜
+
+import threading
+import time
+
+import pytest
+
+from drivers.motor import MotorArduino
+from drivers.sim import HC_EV_NM, LockInSim, SimSerial
+from models.mapper import Mapper
+
+
+@pytest.fixture
+def rig(tmp_path):
+    p = tmp_path / "calibration.csv"
+    p.write_text("idx,nm\n0,800\n900,950\n")
+    mapper = Mapper(p)
+    ser = SimSerial(pulse_time=0.00004, seed=0)
+    motor = MotorArduino(transport=ser)
+    lk = LockInSim(mapper, ser.idx_now, spectrum=lambda ev: 1e-4 * ev, phase_deg=0.0,
+                   noise_v=0.0, query_s=0.0, seed=0)
+    lk.set_param(time_const="0.1 ms")
+    yield mapper, ser, motor, lk
+    motor.close()
+
+
+def test_reads_follow_motor_through_mapper(rig):
+    mapper, ser, motor, lk = rig
+    for idx in (100, 450.5, 800):
+        motor.goto(idx)
+        time.sleep(0.005)                                   # 濾波 50 τ
+        x, y, e = lk.read_xyz()
+        assert x == pytest.approx(1e-4 * HC_EV_NM / mapper.nm_from_idx(idx), rel=1e-6)
+        assert y == pytest.approx(0.0, abs=1e-12) and e == 1.0
+
+
+def test_sees_position_while_moving(rig):
+    mapper, ser, motor, lk = rig
+    th = threading.Thread(target=motor.goto, args=(800,))   # 8000 脈衝約 0.3 s
+    th.start()
+    time.sleep(0.15)
+    idx = ser.idx_now()
+    x = lk.read_xyz()[0]
+    th.join()
+    assert 100 < idx < 700                                  # 讀值時馬達還在半路
+    ev = HC_EV_NM / mapper.nm_from_idx(idx)
+    assert x == pytest.approx(1e-4 * ev, rel=1e-3)          # 不是軟體 idx (0 或 800) 的光譜
+    assert motor.position == 800
+
+
+def test_out_of_calibration_is_dark_not_error(rig):
+    mapper, ser, motor, lk = rig
+    x, y, e = lk.signal_at(5000)
+    assert x == 0.0 and e == 1.0
+    assert LockInSim(None).signal_at(10)[0] == 0.0          # 尚未載入校正
@@ -0,0 +1,57 @@
+# test_stats.py — models.stats (Welford) 對照 numpy 直接計算
+
+import math
+
+import numpy as np
+import pytest
+
+from models.stats import RunAccumulator, RunningStat
+
+
+def test_running_stat_matches_numpy():
+    v = np.random.default_rng(0).normal(3.0, 2.0, 200)
+    s = RunningStat()
+    for x in v:
+        s.push(x)
+    assert s.n == v.size
+    assert s.mean == pytest.approx(v.mean())
+    assert s.var == pytest.approx(v.var(ddof=1))
+    assert s.sem == pytest.approx(v.std(ddof=1) / math.sqrt(v.size))
+
+
+def test_running_stat_single_sample_is_inf():
+    s = RunningStat()
+    s.push(1.0)
+    assert s.mean == 1.0 and math.isinf(s.var) and math.isinf(s.sem)
+
+
+def test_run_accumulator_matches_vstack():
+    rng = np.random.default_rng(1)
+    ev = np.linspace(2.0, 1.9, 11)
+    xs, ys = rng.normal(size=(5, ev.size)), rng.normal(size=(5, ev.size))
+    acc = RunAccumulator()
+    for x, y in zip(xs, ys):
+        acc.push(ev, x, y)
+    assert len(acc) == 5
+    np.testing.assert_array_equal(acc.ev, ev)
+    x_m, y_m = acc.mean
+    np.testing.assert_allclose(x_m, xs.mean(axis=0))
+    np.testing.assert_allclose(y_m, ys.mean(axis=0))
+    x_se, y_se = acc.sem
+    np.testing.assert_allclose(x_se, xs.std(axis=0, ddof=1) / math.sqrt(5))
+    np.testing.assert_allclose(y_se, ys.std(axis=0, ddof=1) / math.sqrt(5))
+
+
+def test_run_accumulator_single_run_and_reset():
+    acc = RunAccumulator()
+    acc.push([1.0, 2.0], [1.0, 2.0], [0.0, 0.0])
+    assert np.isinf(acc.sem[0]).all()
+    acc.reset()
+    assert len(acc) == 0 and acc.ev is None
+
+
+def test_run_accumulator_rejects_other_grid():
+    acc = RunAccumulator()
+    acc.push([1.0, 2.0], [1.0, 2.0], [0.0, 0.0])
+    with pytest.raises(ValueError):
+        acc.push([1.0, 2.0, 3.0], [1.0, 2.0, 3.0], [0.0, 0.0, 0.0])
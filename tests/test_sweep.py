@@ -0,0 +1,41 @@
+# test_sweep.py — 連續掃描：中斷時不等正在走的那一趟
+
+import threading
+import time
+
+import numpy as np
+
+from models.sweep import sweep
+
+
+class SlowMotor:
+    PULSE_PER_IDX = 10
+
+    def __init__(self, move_s):
+        self.move_s, self.position = move_s, 0
+        self.arrived = threading.Event()
+
+    def goto(self, idx, backlash=None):
+        if idx != self.position:
+            time.sleep(self.move_s)
+        self.position = idx
+        if idx != 0:
+            self.arrived.set()
+
+
+class Lockin:
+    tau_s, slope_db = 1e-4, 12
+
+    def read_xyz_block(self, n, interval_s):
+        return np.array([[time.perf_counter(), 1.0, 0.0, 1.0]] * n)
+
+
+def test_stop_returns_without_joining_move():
+    motor = SlowMotor(move_s=1.0)
+    calls = []
+    stop = lambda: calls.append(1) or len(calls) > 2
+    t0 = time.perf_counter()
+    assert sweep(motor, Lockin(), None, 0, 100, np.linspace(2.0, 1.9, 5), stop=stop) is None
+    assert time.perf_counter() - t0 < 0.5
+    assert not motor.arrived.is_set()                   # 那一趟還在背景走
+    assert motor.arrived.wait(2.0)
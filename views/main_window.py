@@ -2,12 +2,16 @@ import sys
 from PyQt5 import QtCore, QtWidgets
 from PyQt5 import QtGui
 from drivers.motor import MotorArduino
-from drivers.lockin import LockInNF5610B, LockInDummy
+from drivers.motion import MotionService
+from drivers.lockin import LockInNF5610B
+from drivers.sim import SimSerial, LockInSim
 from models.mapper import Mapper
 from widgets.calibration_widget import CalibrationWidget
 from widgets.experiment_widget import ExperimentWidget
 from widgets.live_plot_widget import LivePlotWidget
 from widgets.lockin_param_widget import LockInParamWidget
+from widgets.queue_widget import QueueWidget
+from widgets.catalog_widget import CatalogWidget
 
 ##################################################
 # 1. Lock-in 抽象層
@@ -31,13 +35,16 @@ class MultiTabMainWindow(QtWidgets.QMainWindow):
         self.statusBar().showMessage("Initializing…")
         
         self.mapper = Mapper()
+        self.sim_motor = offline
         try:
-            self.motor = MotorArduino()
+            self.motor = MotorArduino(transport=SimSerial() if offline else None)
         except Exception as e:  # noqa: broad-except
-            show_fatal("Motor Error", str(e))
+            # 不可退回模擬馬達：真 lock-in 的資料會對到假的位置；要離線請用 --offline
+            show_fatal("Motor Error", f"{e}\n(離線測試請加 --offline)")
+        self.motion = MotionService(self.motor)   # 所有移動經由單一執行緒排隊
 
         if offline:
-            self.lockin = LockInDummy()
+            self.lockin = self._make_sim_lockin()
             self.offline = True
         else:
             try:
@@ -45,20 +52,30 @@ class MultiTabMainWindow(QtWidgets.QMainWindow):
                 self.offline = False
             except Exception as e:  # noqa: broad-except
                 show_fatal_lockin("Lock‑in Error", f"無法連接 NF 5610B\n{e}")
-                self.lockin = LockInDummy()
+                self.lockin = self._make_sim_lockin()
                 self.offline = True
             
         tabs = QtWidgets.QTabWidget()
-        self.mapper = Mapper()
         live_tab = LivePlotWidget()
-        ctrl_tab = ExperimentWidget(self.lockin, live_tab, tabs, self.motor, self.mapper)
-        cal_tab = CalibrationWidget(self.motor, self.mapper)
+        ctrl_tab = ExperimentWidget(self.lockin, live_tab, tabs, self.motion, self.mapper)
+        cal_tab = CalibrationWidget(self.motion, self.mapper)
         cal_tab.cal_loaded.connect(ctrl_tab.set_calibration)
         tabs.addTab(ctrl_tab, "掃描控制")
+        self.ctrl_tab = ctrl_tab
         tabs.addTab(live_tab, "即時圖")   
         tabs.addTab(cal_tab, "馬達校正")
         tabs.addTab(QtWidgets.QLabel("溫控頁 (待完成)"), "溫度控制")
-        tabs.addTab(LockInParamWidget(self.lockin), "Lock‑in 參數")
+        param_tab = LockInParamWidget(self.lockin)
+        param_tab.ramp_started.connect(ctrl_tab.on_ramp_started)
+        param_tab.ramp_finished.connect(ctrl_tab.on_ramp_finished)
+        ctrl_tab.olv_ramp_requested.connect(                         # 續掃恢復 OLV
+            lambda a, b, rng, a_rng: param_tab.start_ramp(a, b, rng, start_rng=a_rng))
+        tabs.addTab(param_tab, "Lock‑in 參數")
+        queue_tab = QueueWidget(ctrl_tab, param_tab, self.mapper, self.motion)
+        cal_tab.cal_loaded.connect(lambda *_: queue_tab.refresh())
+        tabs.addTab(queue_tab, "排程")
+        self.catalog_tab = CatalogWidget(ctrl_tab.save_dir)
+        tabs.addTab(self.catalog_tab, "資料瀏覽")
         self.setCentralWidget(tabs)
         
         live_tab.btn_stop.clicked.connect(ctrl_tab.stop_scan)
@@ -72,13 +89,20 @@ class MultiTabMainWindow(QtWidgets.QMainWindow):
         ctrl_tab.scan_started.connect(lambda: self.shortcut_stop.setEnabled(True))
         ctrl_tab.scan_finished.connect(lambda: self.shortcut_stop.setEnabled(False))
 
-        st = "Online(" + self.lockin.name() + ")" if not self.offline else "Offline(Dummy)"
-        self.statusBar().showMessage(f"Lock‑in: {st}")
+        st = "Online(" + self.lockin.name() + ")" if not self.offline else "Offline(Sim)"
+        mt = "Sim" if self.sim_motor else self.motor._ser.port
+        self.statusBar().showMessage(f"Lock‑in: {st}   Motor: {mt}")
+
+    def _make_sim_lockin(self):
+        # 模擬馬達時依移動中的實際位置產生光譜，否則用軟體 idx
+        ser = self.motor._ser
+        pos = ser.idx_now if isinstance(ser, SimSerial) else (lambda: self.motor.position)
+        return LockInSim(self.mapper, pos)
     
     # MultiTabMainWindow
     def stop_all_threads(self):
         """Gracefully stop any running worker threads."""
-        for name in ("scan_thread", "jog_thread", "check_thread"):
+        for name in ("scan_thread", "jog_thread"):
             th = getattr(self, name, None)
             if th and th.isRunning():
                 th.requestInterruption()
@@ -90,6 +114,13 @@ class MultiTabMainWindow(QtWidgets.QMainWindow):
         try:
             self.stop_all_threads()
         finally:
+            if hasattr(self, "ctrl_tab"):
+                self.ctrl_tab.close_aio()
+                self.ctrl_tab.file_writer.close()     # 排隊中的存檔寫完再離開
+            if hasattr(self, "catalog_tab"):
+                self.catalog_tab.stop()
+            if hasattr(self, "motion"):
+                self.motion.close()
             if hasattr(self, "motor"):
                 try:
                     self.motor.close()
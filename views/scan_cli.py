@@ -0,0 +1,121 @@
+# ---------------------------------------------------------------------------
+#  無頭掃描 (不建 GUI)
+#  ------------------
+#  python -m views.scan_cli recipe.json              實機 (NF 5610B + Arduino)
+#  python -m views.scan_cli recipe.json --simulate   模擬儀器
+#  python -m views.scan_cli recipe.json --dry-run    只檢查配方與網格
+#  python -m views.scan_cli --queue scan_queue.json  依序跑排程 (可與 GUI 共用檔案)
+#  python -m views.scan_cli --resume ./backup        從 checkpoint.jsonl 中斷處接著量
+#
+#  配方格式見 models/recipe.py；Ctrl+C 於目前這點結束後停止並照常存檔。
+#  排程模式的儀器設定 (simulate / motor_port / lockin_resource / position_idx)
+#  取自第一份待執行的配方。
+# ---------------------------------------------------------------------------
+
+import argparse
+import os
+import pathlib
+import signal
+import sys
+import threading
+
+from models.checkpoint import ScanCheckpoint, checkpoint_path
+from models.mapper import Mapper
+from models.recipe import build_plan, load_recipe, parse_recipe, run_recipe
+from models.scan_queue import ScanQueue, estimate_s, run_queue
+
+
+def _open_instruments(rec: dict, mapper):
+    if rec["simulate"]:
+        from drivers.motor import MotorArduino
+        from drivers.sim import SimSerial, LockInSim
+        ser = SimSerial()
+        motor = MotorArduino(transport=ser)
+        return motor, LockInSim(mapper, ser.idx_now)
+    from drivers.lockin import LockInNF5610B
+    from drivers.motor import MotorArduino
+    motor = MotorArduino(rec["motor_port"])
+    return motor, LockInNF5610B(rec["lockin_resource"])
+
+
+def _fmt_s(s: float) -> str:
+    return f"{int(s) // 3600}:{int(s) % 3600 // 60:02d}:{int(s) % 60:02d}"
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="HeatMod 無頭掃描")
+    ap.add_argument("recipe", nargs="?", help="JSON 配方")
+    ap.add_argument("--queue", help="排程檔 (models/scan_queue.py)")
+    ap.add_argument("--resume", help="存檔資料夾或 checkpoint.jsonl (models/checkpoint.py)")
+    ap.add_argument("--simulate", action="store_true", help="使用模擬馬達 / lock-in")
+    ap.add_argument("--position", type=int, help="馬達目前 idx (覆寫配方 position_idx)")
+    ap.add_argument("--dry-run", action="store_true")
+    args = ap.parse_args(argv)
+    if sum(a is not None for a in (args.recipe, args.queue, args.resume)) != 1:
+        ap.error("請指定配方檔、--queue 或 --resume 其中之一")
+
+    queue = ck = None
+    try:
+        if args.resume:
+            path = args.resume if os.path.isfile(args.resume) else checkpoint_path(args.resume)
+            ck = ScanCheckpoint(path)
+            if not ck.resumable:
+                print("[scan] 該掃描已完成，無需續掃")
+                return 0
+            rec = parse_recipe(ck.header["recipe"])
+            print(f"[scan] {ck.summary()}")
+            if ck.position is not None:
+                rec["position_idx"] = int(round(ck.position))     # S<idx> 只到 idx 解析度
+                if abs(ck.position - rec["position_idx"]) > 1e-6:
+                    print(f"[scan] 馬達停在 idx {ck.position:g}，同步為 {rec['position_idx']} "
+                          f"(偏移 < 0.5 idx)", file=sys.stderr)
+            else:
+                print(f"[scan] 中斷時馬達正在 {ck.moving[0]} → {ck.moving[1]} 移動，位置不確定",
+                      file=sys.stderr)
+                rec["position_idx"] = None              # 必須由 --position 指定
+        elif args.queue:
+            queue = ScanQueue(args.queue)
+            head = queue.next_pending()
+            if head is None:
+                print("[queue] 沒有待執行的配方")
+                return 0
+            rec = parse_recipe(head["recipe"])
+        else:
+            rec = load_recipe(args.recipe)
+        rec["simulate"] = rec["simulate"] or args.simulate
+        if args.position is not None:
+            rec["position_idx"] = args.position
+        mapper = Mapper(pathlib.Path(rec["calibration"]))
+        if queue is not None:
+            print(f"[queue] 預估 {_fmt_s(queue.estimate_pending(mapper))}")
+        elif ck is None:
+            plan = build_plan(rec, mapper)
+            print(f"[scan] {len(plan)} pts × {plan.repeat}  "
+                  f"idx {min(plan.idx_arr):g}–{max(plan.idx_arr):g}  "
+                  f"{plan.ev_arr[0]:.4f} → {plan.ev_arr[-1]:.4f} eV  "
+                  + (f"(合併 {plan.merged} 個重疊點)  " if plan.merged else "") +
+                  f"預估 {_fmt_s(estimate_s(rec, mapper))}")
+    except (OSError, ValueError) as e:
+        print(f"[scan] 配方錯誤：{e}", file=sys.stderr)
+        return 2
+    if args.dry_run:
+        return 0
+    if rec["position_idx"] is None and (not rec["simulate"] or ck is not None):
+        print("[scan] 需要馬達目前 idx：配方 position_idx 或 --position", file=sys.stderr)
+        return 2
+
+    motor, lockin = _open_instruments(rec, mapper)
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    try:
+        if rec["position_idx"] is not None:
+            motor.position = rec["position_idx"]
+        if queue is not None:
+            return 0 if run_queue(queue, motor, lockin, mapper, stop.is_set) else 1
+        return 0 if run_recipe(rec, motor, lockin, mapper, stop.is_set, resume=ck) else 1
+    finally:
+        motor.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,4 @@
 from PyQt5 import QtCore, QtWidgets
-from workers import MotorMoveWorker
 
 class CalibrationWidget(QtWidgets.QWidget):
     """手動建立 / 載入校正表；支援 jog 微移馬達。"""
@@ -77,9 +76,7 @@ class CalibrationWidget(QtWidgets.QWidget):
 
     
     def jog(self, sign: int):
-        if hasattr(self, "worker") and self.worker.isRunning():
-            return
-
+        """連點會在 MotionService 合併成一次移動 (不必等上一步走完)"""
         if not self._idx_known:
             QtWidgets.QMessageBox.warning(self, "未知計數器", "請先輸入目前計數器位置！")
             return
@@ -95,10 +92,16 @@ class CalibrationWidget(QtWidgets.QWidget):
             # 還沒正式校正 → 用簡單斜率估計
             pulse_step = self._nm_to_pulse(step_nm)
 
-        target_idx = max(0, min(999, self.motor.position + sign * pulse_step))
-        self.worker = MotorMoveWorker(self.motor, target_idx, self)
-        self.worker.finished.connect(self._on_motor_pos)
-        self.worker.start()
+        fut = self.motor.jog_by(sign * pulse_step, 0, 999)
+        self.motor.when_done(fut, self._on_jog_done)
+
+    def _on_jog_done(self, fut) -> None:
+        if fut.cancelled():
+            return
+        if fut.exception() is not None:
+            QtWidgets.QMessageBox.critical(self, "馬達錯誤", str(fut.exception()))
+            return
+        self._on_motor_pos(fut.result())
 
     def add_point(self):
         lam_nm = self.spn_nm.value()
@@ -0,0 +1,197 @@
+# catalog_widget.py
+# ---------------------------------------------------------------------------
+#  資料瀏覽頁：所有已索引的 .asc 平均檔 (models/catalog.py)
+#  ------------------------------------------------------
+#  · 「加入資料夾…」登記根目錄 (子資料夾一併索引)；「重新索引」只重讀變動的檔
+#    (第一次切到本頁也會自動更新一次)；索引在背景執行緒，完成後才更新清單
+#  · 依資料夾字串 / 能量範圍 / 最少掃描次數篩選，可多選
+#  · 「疊圖」平行讀入所選各檔畫在同一張圖；「匯出 .npz」存成 ev、x、y、paths
+#    (x / y 形狀 (檔數, 點數)，能量軸不同時內插到第一個檔的網格)
+# ---------------------------------------------------------------------------
+
+import os
+import time
+import numpy as np
+from PyQt5 import QtCore, QtWidgets
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+from models.catalog import Catalog, DEFAULT_DB, load_stack
+from workers import CatalogRefreshWorker
+
+MAX_LEGEND = 12           # 超過就不畫圖例
+
+
+class CatalogWidget(QtWidgets.QWidget):
+    COLS = ("檔名", "資料夾", "能量範圍 (eV)", "點數", "掃描次數", "修改時間", "Lock-in")
+
+    def __init__(self, default_root: str = "backup", path: str = DEFAULT_DB, parent=None):
+        super().__init__(parent)
+        self.catalog = Catalog(path)
+        if not self.catalog.roots and os.path.isdir(default_root):
+            self.catalog.add_root(default_root)
+        self._refreshed = False           # 第一次顯示時自動索引
+        self._rows = []
+        self._worker = None               # CatalogRefreshWorker
+        self._again = False               # 索引中又要求重新索引 → 完成後再跑一次
+
+        self.btn_add     = QtWidgets.QPushButton("加入資料夾…")
+        self.btn_remove  = QtWidgets.QPushButton("移除資料夾…")
+        self.btn_refresh = QtWidgets.QPushButton("重新索引")
+        self.le_dir      = QtWidgets.QLineEdit(); self.le_dir.setPlaceholderText("資料夾含…")
+        self.chk_ev      = QtWidgets.QCheckBox("能量範圍")
+        self.spn_ev_lo   = QtWidgets.QDoubleSpinBox(); self.spn_ev_lo.setRange(0.1, 10.0); self.spn_ev_lo.setDecimals(3); self.spn_ev_lo.setValue(1.9)
+        self.spn_ev_hi   = QtWidgets.QDoubleSpinBox(); self.spn_ev_hi.setRange(0.1, 10.0); self.spn_ev_hi.setDecimals(3); self.spn_ev_hi.setValue(2.1)
+        self.spn_scans   = QtWidgets.QSpinBox(); self.spn_scans.setRange(0, 99999); self.spn_scans.setPrefix("掃描 ≥ ")
+        self.cmb_comp    = QtWidgets.QComboBox(); self.cmb_comp.addItems(["X/EDC", "Y/EDC"])
+        self.btn_plot    = QtWidgets.QPushButton("疊圖")
+        self.btn_export  = QtWidgets.QPushButton("匯出 .npz…")
+        self.lbl_status  = QtWidgets.QLabel("")
+
+        self.tbl = QtWidgets.QTableWidget(0, len(self.COLS))
+        self.tbl.setHorizontalHeaderLabels(self.COLS)
+        self.tbl.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.tbl.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.tbl.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.tbl.horizontalHeader().setStretchLastSection(True)
+
+        self.fig = Figure(figsize=(5, 3)); self.ax = self.fig.add_subplot(111)
+        self.canvas = FigureCanvas(self.fig)
+
+        row = QtWidgets.QHBoxLayout()
+        for w in (self.btn_add, self.btn_remove, self.btn_refresh, self.le_dir, self.chk_ev,
+                  self.spn_ev_lo, self.spn_ev_hi, self.spn_scans):
+            row.addWidget(w)
+        row2 = QtWidgets.QHBoxLayout()
+        row2.addWidget(self.lbl_status); row2.addStretch()
+        row2.addWidget(self.cmb_comp); row2.addWidget(self.btn_plot); row2.addWidget(self.btn_export)
+        split = QtWidgets.QSplitter(QtCore.Qt.Vertical)
+        split.addWidget(self.tbl); split.addWidget(self.canvas)
+        vbox = QtWidgets.QVBoxLayout(self)
+        vbox.addLayout(row); vbox.addWidget(split); vbox.addLayout(row2)
+
+        self.btn_add.clicked.connect(self.add_root)
+        self.btn_remove.clicked.connect(self.remove_root)
+        self.btn_refresh.clicked.connect(self.refresh)
+        self.le_dir.textChanged.connect(self.update_table)
+        for w in (self.chk_ev, self.spn_ev_lo, self.spn_ev_hi, self.spn_scans):
+            (w.toggled if w is self.chk_ev else w.valueChanged).connect(self.update_table)
+        self.btn_plot.clicked.connect(self.plot_selected)
+        self.btn_export.clicked.connect(self.export_selected)
+
+    def showEvent(self, ev):
+        super().showEvent(ev)
+        if not self._refreshed:
+            self._refreshed = True
+            QtCore.QTimer.singleShot(0, self.refresh)
+
+    # ---------------- 索引 ----------------
+    def add_root(self):
+        d = QtWidgets.QFileDialog.getExistingDirectory(self, "加入資料夾 (含子資料夾)")
+        if d:
+            self.catalog.add_root(d)
+            self.refresh()
+
+    def remove_root(self):
+        roots = self.catalog.roots
+        if not roots:
+            return
+        d, ok = QtWidgets.QInputDialog.getItem(self, "移除資料夾", "不再索引：", roots, 0, False)
+        if ok:
+            self.catalog.remove_root(d)
+            self.update_table()
+
+    def refresh(self):
+        if self._worker is not None and self._worker.isRunning():
+            self._again = True
+            return
+        self._again = False
+        self.btn_refresh.setEnabled(False)
+        self.lbl_status.setText("索引中…")
+        self._worker = CatalogRefreshWorker(self.catalog.path, self)
+        self._worker.finished.connect(self.on_refresh_finished)
+        self._worker.start()
+
+    def on_refresh_finished(self, err: str):
+        w = self._worker
+        self.btn_refresh.setEnabled(True)
+        if err:
+            self.lbl_status.setText(f"索引失敗：{err}")
+        else:
+            n_new, _, n_gone = w.counts
+            bad = self.catalog.errors()
+            self.update_table()
+            self.lbl_status.setText(
+                f"索引 {len(self.catalog)} 檔 (更新 {n_new}、刪除 {n_gone}，"
+                f"{w.elapsed:.2f} s)" + (f"；{len(bad)} 檔無法讀取" if bad else ""))
+            for p, e in bad:
+                print(f"[catalog] {p}: {e}")
+        if self._again:
+            self.refresh()
+
+    def stop(self):
+        """關閉視窗前呼叫：等背景索引跑完 (執行緒還在跑就被回收會當掉)"""
+        self._again = False
+        if self._worker is not None:
+            self._worker.wait()
+
+    # ---------------- 清單 ----------------
+    def update_table(self):
+        ev = (self.spn_ev_lo.value(), self.spn_ev_hi.value()) if self.chk_ev.isChecked() else None
+        self._rows = self.catalog.query(self.le_dir.text().strip() or None, ev,
+                                        min_scans=self.spn_scans.value() or None)
+        self.tbl.setRowCount(len(self._rows))
+        for r, row in enumerate(self._rows):
+            lk = (row["params"] or {}).get("lockin") or {}
+            cells = (row["name"], row["dir"],
+                     "" if row["ev_min"] is None else f"{row['ev_min']:.3f} – {row['ev_max']:.3f}",
+                     str(row["n_points"]),
+                     "" if row["scans"] is None else str(row["scans"]),
+                     time.strftime("%Y-%m-%d %H:%M", time.localtime(row["mtime"])),
+                     ", ".join(f"{k}={v}" for k, v in lk.items()))
+            for c, txt in enumerate(cells):
+                self.tbl.setItem(r, c, QtWidgets.QTableWidgetItem(txt))
+
+    def _selected(self):
+        rows = sorted({i.row() for i in self.tbl.selectedIndexes()})
+        return [self._rows[r] for r in rows]
+
+    def _load(self, rows):
+        try:
+            return load_stack([r["path"] for r in rows])
+        except (OSError, ValueError) as e:
+            QtWidgets.QMessageBox.warning(self, "讀檔失敗", f"{e}\n請重新索引")
+            return None
+
+    # ---------------- 疊圖 / 匯出 ----------------
+    def plot_selected(self):
+        rows = self._selected()
+        if not rows:
+            return
+        data = self._load(rows)
+        if data is None:
+            return
+        ev, x, y = data
+        v = x if self.cmb_comp.currentIndex() == 0 else y
+        self.ax.clear()
+        for r, line in zip(rows, v):
+            self.ax.plot(ev, line, lw=1, label=f"{os.path.basename(r['dir'])}/{r['name']}")
+        self.ax.set_xlabel("Energy (eV)"); self.ax.set_ylabel(self.cmb_comp.currentText())
+        if len(rows) <= MAX_LEGEND:
+            self.ax.legend(fontsize="small")
+        self.ax.grid(True)
+        self.canvas.draw_idle()
+        self.lbl_status.setText(f"疊圖 {len(rows)} 檔 × {ev.size} 點")
+
+    def export_selected(self):
+        rows = self._selected()
+        if not rows:
+            return
+        fn, _ = QtWidgets.QFileDialog.getSaveFileName(self, "匯出疊圖資料", "stack.npz", "NumPy (*.npz)")
+        if not fn:
+            return
+        data = self._load(rows)
+        if data is None:
+            return
+        ev, x, y = data
+        np.savez(fn, ev=ev, x=x, y=y, paths=np.array([r["path"] for r in rows]))
+        print(f"[SAVE] {fn} ({len(rows)} 檔)")
@@ -4,8 +4,19 @@ from PyQt5.QtWidgets import QFileDialog
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import os
-from collections import deque
-from workers import ScanWorker, AutoCheckWorker
+from workers import ScanWorker, SweepWorker, WriterSignals, auto_check
+from drivers.aio import AsyncLockIn, AsyncMotor, Orchestrator, QtBridge
+from models.acquire import Settler, Dwell
+from models.engine import ScanPlan
+from models.planner import AdaptivePlanner
+from models.stats import RunAccumulator
+from models.asc_io import read_asc, write_asc
+from models.telemetry import TimingLog
+from models.raw_store import RawReader, RawWriter, new_path as new_raw_path
+from models.persist import numbered_asc
+from models.checkpoint import CheckpointSink, checkpoint_path, load_checkpoint, motor_idx
+from models.recipe import parse_recipe
+import time
 ##################################################
 # 1. Lock-in 抽象層
 
@@ -15,6 +26,7 @@ class ExperimentWidget(QtWidgets.QWidget):
 
     scan_started  = QtCore.pyqtSignal()
     scan_finished = QtCore.pyqtSignal()
+    olv_ramp_requested = QtCore.pyqtSignal(int, int, int, int)  # (起始, 目標, range, 起始 range) → Lock-in 頁漸進
 
     def __init__(self, lockin, live_widget, parent, motor, mapper):
         super().__init__(parent)
@@ -26,16 +38,37 @@ class ExperimentWidget(QtWidgets.QWidget):
         self.cal_table = None      # ★ 新增：存 [(idx_user, idx_phys), ...]
 
         # ---------------- 掃描/平均狀態 ----------------
-        self.completed_runs = []   # [(ev, x, y), ...]
-        self.current_ev, self.current_x, self.current_y = [], [], []
-        self.pending_runs   = []   # 累積 N 次就平均存檔
-        self.saved_files    = deque()
+        self.acc_all        = RunAccumulator()   # 全部完成輪的逐點平均 / 標準誤差
+        self.acc_batch      = RunAccumulator()   # 累積 N 次就平均存檔，存完歸零
         self.save_dir       = "./backup"; os.makedirs(self.save_dir, exist_ok=True)
         self.batch_counter  = 0     # 已寫出平均檔批數
+        self._live_run      = 0     # 圖頁 live 線目前這一輪 (引擎的輪號)
+        self._held          = []    # 已取出但屬於下一輪的點 (等換線後再畫)
+        self.timing_log     = None  # 每點計時 CSV (掃描期間開啟)
+        self.raw_writer     = None  # 每點原始值 .trraw (掃描期間開啟)
+        self.raw_path       = None  # 本次掃描的 .trraw；續掃接在同一檔後面
+        # 寫檔 / FIFO 刪檔都在背景執行緒，GUI 只收通知
+        self.writer_signals = WriterSignals()
+        self.file_writer    = self.writer_signals.make_writer()
+        self.writer_signals.saved.connect(self._on_file_saved)
+        self.writer_signals.deleted.connect(lambda p: print(f"[DEL ] {p}"))
+        self.writer_signals.error.connect(self._on_write_error)
+        self.writer_signals.backpressure.connect(self._on_write_backpressure)
+        # Auto-Check 走 asyncio 協調層：馬達 / lock-in 各自的執行緒，結果由 bridge 送回 GUI
+        self.aio            = Orchestrator()
+        self.aio_bridge     = QtBridge(self.aio)
+        self.amotor         = AsyncMotor(self.motor)
+        self.alockin        = AsyncLockIn(self.lockin)
+        self._ac_future     = None
+        self.last_completed = False # 上一次掃描是否跑完全部輪數 (排程用)
+        self._ramping       = False # Lock-in 頁 OLV 漸進中
+        self._after_ramp    = None  # 漸進完成後要執行的動作 (開始 / 續掃)
+        self._stopping      = False # 已要求停止，等 worker 結束 (on_worker_finish 收尾)
       
         # ---------------- 控件 ----------------
         self._build_controls()
         self._idx_known = False
+        self._refresh_resume()
 
     # -------------------------------------------------
     # 控件建構
@@ -52,6 +85,22 @@ class ExperimentWidget(QtWidgets.QWidget):
         self.spn_keep_files = QtWidgets.QSpinBox(); self.spn_keep_files.setRange(1,999); self.spn_keep_files.setValue(3)
         self.spn_wl_set = QtWidgets.QDoubleSpinBox(); self.spn_wl_set.setRange(100,3000); self.spn_wl_set.setDecimals(1); self.spn_wl_set.setValue(619.9); self.spn_wl_set.setSingleStep(0.1)
         self.spn_ev_set = QtWidgets.QDoubleSpinBox(); self.spn_ev_set.setRange(0.1,10.0); self.spn_ev_set.setDecimals(3); self.spn_ev_set.setValue(2.0); self.spn_ev_set.setSingleStep(0.001)
+        self.spn_settle_tol  = QtWidgets.QDoubleSpinBox(); self.spn_settle_tol.setRange(0.01,50.0); self.spn_settle_tol.setDecimals(2); self.spn_settle_tol.setValue(1.0); self.spn_settle_tol.setSingleStep(0.1); self.spn_settle_tol.setSuffix(" %")
+        self.spn_settle_ntau = QtWidgets.QDoubleSpinBox(); self.spn_settle_ntau.setRange(0.0,50.0); self.spn_settle_ntau.setDecimals(1); self.spn_settle_ntau.setValue(0.0); self.spn_settle_ntau.setSingleStep(0.5); self.spn_settle_ntau.setSuffix(" τ")
+        self.spn_settle_ntau.setSpecialValueText("依斜率自動")   # 0 = acquire.ntau_max(斜率, 容差)
+        self.chk_serpentine = QtWidgets.QCheckBox("來回掃描"); self.chk_serpentine.setChecked(False)
+        self.cmb_collapse   = QtWidgets.QComboBox()       # 多個網格點落在同一脈衝時
+        self.cmb_collapse.addItem("合併 (加長停留)", "merge"); self.cmb_collapse.addItem("錯開到相鄰脈衝", "shift")
+        self.spn_backlash   = QtWidgets.QSpinBox(); self.spn_backlash.setRange(0,50); self.spn_backlash.setValue(self.motor.backlash_idx); self.spn_backlash.setSuffix(" idx")
+        self.chk_dwell     = QtWidgets.QCheckBox("自適應取樣"); self.chk_dwell.setChecked(False)
+        self.spn_target_se = QtWidgets.QDoubleSpinBox(); self.spn_target_se.setRange(0.001,1000.0); self.spn_target_se.setDecimals(3); self.spn_target_se.setValue(1.0); self.spn_target_se.setSuffix(" e-6")
+        self.spn_max_dwell = QtWidgets.QDoubleSpinBox(); self.spn_max_dwell.setRange(0.1,600.0); self.spn_max_dwell.setDecimals(1); self.spn_max_dwell.setValue(10.0); self.spn_max_dwell.setSuffix(" s")
+        self.chk_adaptive   = QtWidgets.QCheckBox("自適應網格"); self.chk_adaptive.setChecked(False)
+        self.spn_coarse_step = QtWidgets.QDoubleSpinBox(); self.spn_coarse_step.setRange(0.001,1.0); self.spn_coarse_step.setDecimals(3); self.spn_coarse_step.setValue(0.008); self.spn_coarse_step.setSingleStep(0.001)
+        self.spn_refine_tol = QtWidgets.QDoubleSpinBox(); self.spn_refine_tol.setRange(0.1,100.0); self.spn_refine_tol.setDecimals(1); self.spn_refine_tol.setValue(5.0); self.spn_refine_tol.setSuffix(" %")
+        self.chk_sweep   = QtWidgets.QCheckBox("連續掃描"); self.chk_sweep.setChecked(False)
+        self.spn_cadence = QtWidgets.QDoubleSpinBox(); self.spn_cadence.setRange(1.0,1000.0); self.spn_cadence.setDecimals(1); self.spn_cadence.setValue(10.0); self.spn_cadence.setSuffix(" ms")
+        self.spn_fps = QtWidgets.QSpinBox(); self.spn_fps.setRange(1,60); self.spn_fps.setValue(10); self.spn_fps.setSuffix(" fps")
         self.spn_idx_now = QtWidgets.QSpinBox()
         self.spn_idx_now.setRange(99, 999)              # -1 當作「尚未設定」
         self.spn_idx_now.setSpecialValueText("— 未設定 —")
@@ -70,7 +119,7 @@ class ExperimentWidget(QtWidgets.QWidget):
         self.btn_autocheck = QtWidgets.QPushButton("Auto Check")
         self.btn_goto = QtWidgets.QPushButton("Go")
 
-        self._ctrl_widgets = [self.spn_ev_start, self.spn_ev_end, self.spn_ev_step, self.spn_repeat,self.spn_wl_start, self.spn_wl_end, self.spn_save_every, self.spn_keep_files,self.btn_save, self.btn_load, self.btn_sel_dir]
+        self._ctrl_widgets = [self.spn_ev_start, self.spn_ev_end, self.spn_ev_step, self.spn_repeat,self.spn_wl_start, self.spn_wl_end, self.spn_save_every, self.spn_keep_files,self.spn_settle_tol, self.spn_settle_ntau,self.chk_serpentine, self.cmb_collapse, self.spn_backlash,self.chk_dwell, self.spn_target_se, self.spn_max_dwell,self.chk_adaptive, self.spn_coarse_step, self.spn_refine_tol,self.chk_sweep, self.spn_cadence,self.btn_save, self.btn_load, self.btn_sel_dir]
 
         # ---- 版面：參數格 ----
         param_w = QtWidgets.QWidget(); grid = QtWidgets.QGridLayout(param_w)
@@ -88,11 +137,28 @@ class ExperimentWidget(QtWidgets.QWidget):
         grid.addWidget(QtWidgets.QLabel("目標能量 (eV)"), row,1); grid.addWidget(self.spn_ev_set,row+1,1)
         grid.addWidget(QtWidgets.QLabel("移動至目標波長"),     row,2); grid.addWidget(self.btn_goto,row+1,2)
         grid.addWidget(QtWidgets.QLabel("計數器位置"),     row,3); grid.addWidget(self.spn_idx_now,row+1,3)
+        row = 7
+        grid.addWidget(QtWidgets.QLabel("穩定容差"),      row,0); grid.addWidget(self.spn_settle_tol,row+1,0)
+        grid.addWidget(QtWidgets.QLabel("最長等待"),      row,1); grid.addWidget(self.spn_settle_ntau,row+1,1)
+        grid.addWidget(QtWidgets.QLabel("背隙補償"),      row,2); grid.addWidget(self.spn_backlash,row+1,2)
+        grid.addWidget(self.chk_serpentine,                row+1,3)
+        row = 9
+        grid.addWidget(QtWidgets.QLabel("目標標準誤差"),  row,0); grid.addWidget(self.spn_target_se,row+1,0)
+        grid.addWidget(QtWidgets.QLabel("每點最長停留"),  row,1); grid.addWidget(self.spn_max_dwell,row+1,1)
+        grid.addWidget(self.chk_dwell,                     row+1,2)
+        grid.addWidget(QtWidgets.QLabel("重疊點"),        row,3); grid.addWidget(self.cmb_collapse,row+1,3)
+        row = 11
+        grid.addWidget(QtWidgets.QLabel("粗掃間距 (eV)"), row,0); grid.addWidget(self.spn_coarse_step,row+1,0)
+        grid.addWidget(QtWidgets.QLabel("細化門檻"),      row,1); grid.addWidget(self.spn_refine_tol,row+1,1)
+        grid.addWidget(self.chk_adaptive,                  row+1,2)
+        grid.addWidget(QtWidgets.QLabel("取樣週期"),      row,3); grid.addWidget(self.spn_cadence,row+1,3)
+        grid.addWidget(self.chk_sweep,                     row+2,3)
+        grid.addWidget(QtWidgets.QLabel("畫面更新率"),    row+2,0); grid.addWidget(self.spn_fps,row+2,1)
         # 按鈕列
         btn_row = QtWidgets.QHBoxLayout(); btn_row.addStretch();
         for b in (self.btn_save,self.btn_load,self.btn_sel_dir,self.lbl_dir): btn_row.addWidget(b)
         btn_row.addStretch(); grid.addLayout(btn_row,0,0,1,4)
-        param_w.setFixedHeight(190); param_w.setSizePolicy(QtWidgets.QSizePolicy.Expanding,QtWidgets.QSizePolicy.Fixed)
+        param_w.setFixedHeight(370); param_w.setSizePolicy(QtWidgets.QSizePolicy.Expanding,QtWidgets.QSizePolicy.Fixed)
 
         # ---- 儲存路徑顯示 ----
         row_start = QtWidgets.QHBoxLayout()
@@ -108,12 +174,17 @@ class ExperimentWidget(QtWidgets.QWidget):
         vbox.addWidget(self.canvas_avg)
 
         # 事件連線
-        self.btn_start.clicked.connect(self.start_scan)
+        self.btn_start.clicked.connect(lambda: self.start_scan())
         self.btn_save .clicked.connect(self.save_data_dialog)
         self.btn_load .clicked.connect(self.load_avg_file)
         self.btn_sel_dir.clicked.connect(self.choose_save_dir)
         self.btn_resume.clicked.connect(self.resume_scan)
 
+        # 點資料以固定畫面更新率批次取出 (量測端不等繪圖)
+        self._ui_timer = QtCore.QTimer(self)
+        self._ui_timer.timeout.connect(self._drain_points)
+        self.spn_fps.valueChanged.connect(lambda v: self._ui_timer.setInterval(int(1000 / v)))
+
         self.spn_ev_start.valueChanged.connect(self.update_from_energy)
         self.spn_ev_end  .valueChanged.connect(self.update_from_energy)
         self.spn_wl_start.valueChanged.connect(self.update_from_wavelength)
@@ -121,6 +192,7 @@ class ExperimentWidget(QtWidgets.QWidget):
 
         self.btn_autocheck.clicked.connect(self.auto_check)
         self.btn_goto.clicked.connect(self.goto_target)
+        self.spn_backlash.valueChanged.connect(lambda v: setattr(self.motor, "backlash_idx", v))
         self.motor.positionChanged.connect(self._on_motor_pos)
         self.motor.hitLimit.connect(self._on_limit)
         self.spn_idx_now.editingFinished.connect(self._on_idx_edit)
@@ -169,7 +241,7 @@ class ExperimentWidget(QtWidgets.QWidget):
         self._goto_with_progress(idx_target)
 
     def _goto_with_progress(self, idx_target: int):
-        """把馬達走到目標 idx，並在 GUI 顯示進度；整段不凍結 UI"""
+        """把馬達走到目標 idx，並在 GUI 顯示進度；移動交給 MotionService，UI 不凍結"""
         # 1) 進度條設定範圍
         idx_origin = self.motor.position
         self.prg_goto.setRange(0, abs(idx_target - idx_origin))
@@ -180,22 +252,15 @@ class ExperimentWidget(QtWidgets.QWidget):
             self.prg_goto.setValue(abs(pos - idx_origin))
         self.motor.positionChanged.connect(_on_pos)
 
-        # 3) 真正移動馬達：放到 QThread 免得主執行緒卡住
-        def _run():
-            try:
-                self.motor.goto(idx_target)  # 韌體阻塞直到到位
-            finally:
-                # 4) 清理
-                self.motor.positionChanged.disconnect(_on_pos)
-                self.prg_goto.setValue(self.prg_goto.maximum())
-
-        self._goto_thread = QtCore.QThread(self)       # ← 挂在 self
-        self._goto_thread.run = _run
-        self._goto_thread.finished.connect(
-            lambda: setattr(self, "_goto_thread", None))
-        self._goto_thread.start()
+        # 3) 排入移動佇列；完成時 (GUI 執行緒) 清理
+        def _done(fut):
+            self.motor.positionChanged.disconnect(_on_pos)
+            self.prg_goto.setValue(self.prg_goto.maximum())
+            if not fut.cancelled() and fut.exception() is not None:
+                QtWidgets.QMessageBox.critical(self, "馬達錯誤", str(fut.exception()))
+
+        self.motor.when_done(self.motor.submit(idx_target), _done)
 
-            
     @QtCore.pyqtSlot(list)
     def set_calibration(self, tbl_nm_phys):
         ev_s, step = self.spn_ev_start.value(), self.spn_ev_step.value()
@@ -224,9 +289,17 @@ class ExperimentWidget(QtWidgets.QWidget):
     # -------------------------------------------------
     # 掃描控制
     # -------------------------------------------------
-    def start_scan(self) -> None:
+    def start_scan(self, confirm: bool = True) -> None:
+        """confirm：save_dir 有未完成的掃描時先問是否覆蓋 (排程頁自己判斷續掃，傳 False)"""
         if not self._check_ready():
             return
+        if confirm and not self._confirm_overwrite():
+            return
+        if self._ramping:
+            # OLV 還在漸進：記下來，漸進一完成就自動開始
+            self._after_ramp = lambda: self.start_scan(confirm=False)
+            self.btn_start.setText("等待 OLV 漸進…"); self.btn_start.setEnabled(False)
+            return
         ev_s = self.spn_ev_start.value()
         ev_e = self.spn_ev_end.value()
         step = self.spn_ev_step.value() or 0.01
@@ -237,59 +310,260 @@ class ExperimentWidget(QtWidgets.QWidget):
             QtWidgets.QMessageBox.warning(self, "步距錯誤", "請確認起迄能量與步距")
             return
 
-        lam_arr = 1239.84193 / ev_arr      # eV → nm
+        repeat = self.spn_repeat.value()
         try:
-            idx_arr = [int(round(self.mapper.idx_from_nm(l))) for l in lam_arr]
+            # 脈衝解析度定位；plan.ev_arr 是實際能量，重疊點依下拉選單合併 / 錯開
+            plan = ScanPlan.from_energy(self.mapper, ev_s, ev_e, step, repeat,
+                                        self.chk_serpentine.isChecked(),
+                                        self.cmb_collapse.currentData())
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, "校正錯誤", str(e))
             return
-        repeat = self.spn_repeat.value()
+        self.acc_all.reset(); self.acc_batch.reset()   # 新掃描 = 新能量軸
 
-        self.worker = ScanWorker(self.lockin, self.motor, idx_arr, ev_arr, repeat, self)
-        self.worker.point_ready.connect(self.on_point)
+        if self.chk_sweep.isChecked():
+            # 連續掃描只用頭尾位置，分 bin 仍用名目網格
+            self.worker = SweepWorker(self.lockin, self.motor, self.mapper, plan.idx_arr, ev_arr,
+                                      repeat, self, cadence_s=self.spn_cadence.value() / 1000)
+        else:
+            ev_arr = plan.ev_arr
+            self.worker = ScanWorker(self.lockin, self.motor, plan.idx_arr, ev_arr, repeat, self,
+                                     settler=self._make_settler(),
+                                     serpentine=plan.serpentine,
+                                     dwell=self._make_dwell(),
+                                     planner=self._make_planner(len(ev_arr), abs(step)),
+                                     weight=plan.weight)
+        self.live_widget.set_plan(ev_arr, repeat)
+        self._start_worker()
+
+    def _confirm_overwrite(self) -> bool:
+        """重新開始會以新的 checkpoint 覆蓋 save_dir 內未完成的那份 → 之後無法再續掃"""
+        try:
+            ck = load_checkpoint(self.save_dir)
+        except (OSError, ValueError):
+            return True                             # 壞掉的 checkpoint 本來就不能續掃
+        if ck is None:
+            return True
+        ans = QtWidgets.QMessageBox.question(
+            self, "有未完成的掃描",
+            f"存檔資料夾內有未完成的掃描 ({ck.summary()})。\n"
+            "重新開始會覆蓋它的 checkpoint，之後無法再按「繼續掃描」。\n要重新開始嗎？",
+            QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No, QtWidgets.QMessageBox.No)
+        return ans == QtWidgets.QMessageBox.Yes
+
+    # ---------------- OLV 漸進 (LockInParamWidget) ----------------
+    def on_ramp_started(self):
+        self._ramping = True
+
+    def on_ramp_finished(self, ok: bool):
+        self._ramping = False
+        pending, self._after_ramp = self._after_ramp, None
+        self.btn_start.setText("開始掃描"); self.btn_start.setEnabled(True)
+        if pending and ok:
+            pending()
+
+    def _start_worker(self, resume=None):
+        """resume：ScanCheckpoint → 原始檔與 checkpoint 都接在既有檔後面"""
+        # 計時 CSV 與原始檔都在寫檔執行緒第一次寫入時才開 (排在上次的 close 之後，GUI 不等)
+        self.timing_log = TimingLog(os.path.join(
+            self.save_dir, time.strftime("timing_%Y%m%d_%H%M%S.csv")), defer=True)
+        raw_path = resume.header.get("raw_path") if resume is not None else None
+        if raw_path and os.path.exists(raw_path):
+            # 續掃：引擎的輪號本來就是絕對輪號，不必再加 offset
+            self.raw_path = raw_path
+            self.raw_writer = RawWriter(self.raw_path, defer=True)
+        else:
+            self.raw_path = new_raw_path(self.save_dir)
+            plan = getattr(self.worker, "plan", self.worker)        # SweepWorker 沒有 plan
+            self.raw_writer = RawWriter(self.raw_path, dict(
+                ev_arr=plan.ev_arr, repeat=self.spn_repeat.value(),
+                recipe=self.current_recipe(), lockin=dict(self.lockin.state)), defer=True)
+        ckpt = checkpoint_path(self.save_dir)
+        if hasattr(self.worker, "sinks"):
+            # 每點 write-ahead checkpoint；當機 / 斷電後按「繼續掃描」從下一點接著量
+            header = None if resume is not None else dict(
+                recipe=self.current_recipe(), lockin=dict(self.lockin.state), raw_path=self.raw_path)
+            self.worker.sinks.append(CheckpointSink(ckpt, self.worker.plan, header,
+                                                    resume=resume is not None,
+                                                    position_fn=lambda: motor_idx(self.motor)))
+        elif os.path.exists(ckpt):
+            os.remove(ckpt)                         # 連續掃描不可續掃；舊的 checkpoint 作廢
+        self._live_run, self._held = getattr(self.worker, "start_run", 0), []
         self.worker.run_complete.connect(self.on_run_complete)
         self.worker.finished.connect(self.on_worker_finish)
         self.worker.start()
+        self._ui_timer.start(int(1000 / self.spn_fps.value()))
+
+    def is_scanning(self) -> bool:
+        return hasattr(self, "worker") and self.worker.isRunning()
 
     def stop_scan(self):
-        if hasattr(self,"worker") and self.worker.isRunning():
-            self.worker.requestInterruption(); self.worker.wait()
+        """要求停止後立刻返回，不在 GUI 執行緒等 worker：正在走的那一趟由
+        MotionService 走完，worker 結束 (finished) 時 on_worker_finish 收尾"""
+        if self.is_scanning():
+            if not self._stopping:
+                self._stopping = True
+                self.worker.requestInterruption()
+                self.motor.cancel_pending()
+                self.live_widget.btn_stop.setEnabled(False)
+            return
+        self.last_completed = False
         self.btn_start.setEnabled(True); self.live_widget.btn_stop.setEnabled(False)
         self.live_widget.reset_plot()
         self._switch_to_ctrl_and_load()
 
     def resume_scan(self):
-        if hasattr(self, "worker") and self.worker.isRunning():
+        """從 save_dir 的 checkpoint 接著量：同一網格、同一配方，從中斷的下一點開始
+        (程式重開 / 當機後也可以)"""
+        if self.is_scanning():
             return  # 正在掃描
-        if not self.current_ev:
-            QtWidgets.QMessageBox.information(self, "無可續掃", "請先停止於中途的掃描")
+        try:
+            ck = load_checkpoint(self.save_dir)
+        except (OSError, ValueError) as e:
+            QtWidgets.QMessageBox.critical(self, "checkpoint 錯誤", str(e))
+            return
+        if ck is None:
+            QtWidgets.QMessageBox.information(self, "無可續掃", "存檔資料夾內沒有未完成的掃描")
+            self._refresh_resume()
             return
+        if not self._idx_known:
+            # 程式重開：計數器以 checkpoint 最後位置同步 (S<idx> 只到整數 idx)
+            if ck.position is None:
+                a, b = ck.moving
+                QtWidgets.QMessageBox.warning(
+                    self, "馬達位置不確定",
+                    f"中斷時馬達正由 {a} 移往 {b}，請先在「目前 idx」輸入計數器讀值")
+                return
+            self.motor.position = int(round(ck.position))
+            self.spn_idx_now.setValue(int(round(ck.position)))
+            self._idx_known = True
         if not self._check_ready():
             return
-
-        ev_left = np.array(self.current_ev)
-        repeat_left = self.spn_repeat.value() - len(self.completed_runs)
-        if repeat_left <= 0:
-            QtWidgets.QMessageBox.information(self, "已完成", "無剩餘掃描")
+        try:
+            rec = parse_recipe(ck.header["recipe"])
+            self.apply_recipe(rec)              # 控件 + lock-in 參數 (OLV 另外漸進)
+        except Exception as e:  # noqa: broad-except
+            QtWidgets.QMessageBox.critical(self, "配方錯誤", str(e))
+            return
+        ramp = rec["olv_ramp"]
+        st = self.lockin.state
+        start_rng = st.get("int_osc_level_range", ramp["range"]) if ramp else None
+        if ramp and (st.get("int_osc_level"), start_rng) != (ramp["target"], ramp["range"]):
+            self.olv_ramp_requested.emit(int(st.get("int_osc_level", 0)),
+                                         ramp["target"], ramp["range"], start_rng)
+        if self._ramping:
+            self._after_ramp = self.resume_scan
+            self.btn_start.setText("等待 OLV 漸進…"); self.btn_start.setEnabled(False)
+            self.btn_resume.setEnabled(False)
             return
 
+        # 已完成的輪放回累積器 (自動存檔批次照舊接下去)
+        N = self.spn_save_every.value()
+        self.acc_all.reset(); self.acc_batch.reset()
+        for ev, x, y in ck.runs:
+            self.acc_all.push(ev, x, y)
+        self.batch_counter = ck.start_run // N
+        for ev, x, y in ck.runs[self.batch_counter * N:]:
+            self.acc_batch.push(ev, x, y)
+        self.file_writer.track(numbered_asc(self.save_dir, self.batch_counter * N))   # FIFO 接著輪替
+
+        plan = ck.plan
+        print(f"[scan] 續掃：{ck.summary()}")
+        self.live_widget.set_plan(plan.ev_arr, plan.repeat - ck.start_run)
         self.live_widget.start_new_run()
+        if self.acc_all.n:
+            self.live_widget.update_average(self.acc_all)
         for w in self._ctrl_widgets:
             w.setEnabled(False)
         self.btn_start.setEnabled(False)
         self.live_widget.btn_stop.setEnabled(True)
         self.btn_resume.setEnabled(False)
 
-        idx_left = [int(round(self.mapper.idx_from_nm(1239.84193/e))) for e in ev_left]
-        self.worker = ScanWorker(self.lockin, self.motor, idx_left, ev_left,
-                                 repeat_left, self)   # 6 參數對齊
-
-        self.worker.point_ready.connect(self.on_point)
-        self.worker.run_complete.connect(self.on_run_complete)
-        self.worker.finished.connect(self.on_worker_finish)
-        self.worker.start()
+        # 自適應網格只在第 1 輪；已過第 1 輪沿用 checkpoint 的網格
+        planner = (self._make_planner(len(plan), abs(rec["ev_step"]))
+                   if ck.start_run == 0 else None)
+        self.worker = ScanWorker(self.lockin, self.motor, plan.idx_arr, plan.ev_arr,
+                                 plan.repeat, self, settler=self._make_settler(),
+                                 serpentine=plan.serpentine, dwell=self._make_dwell(),
+                                 planner=planner, weight=plan.weight,
+                                 start_run=ck.start_run, done=ck.partial)
+        self._start_worker(resume=ck)
         self.tab_widget.setCurrentWidget(self.live_widget)
 
+    def _refresh_resume(self):
+        """save_dir 內有未完成的 checkpoint 才能按「繼續掃描」"""
+        try:
+            ok = load_checkpoint(self.save_dir) is not None
+        except (OSError, ValueError):
+            ok = False
+        self.btn_resume.setEnabled(ok and not self.is_scanning())
+
+    # ---------------- 配方 (排程頁) ----------------
+    def current_recipe(self) -> dict:
+        """目前控件設定 → 配方 dict (格式見 models/recipe.py)"""
+        step = abs(self.spn_ev_step.value())
+        rec = dict(ev_start=self.spn_ev_start.value(), ev_end=self.spn_ev_end.value(),
+                   ev_step=step, repeat=self.spn_repeat.value(),
+                   serpentine=self.chk_serpentine.isChecked(), backlash_idx=self.spn_backlash.value(),
+                   collapse=self.cmb_collapse.currentData(),
+                   lockin=dict(self.lockin.state),
+                   settle=dict(rel_tol=self.spn_settle_tol.value() / 100,
+                               max_ntau=self.spn_settle_ntau.value() or None),
+                   save_dir=self.save_dir, save_every=self.spn_save_every.value(),
+                   keep_files=self.spn_keep_files.value())
+        if self.chk_dwell.isChecked():
+            rec["dwell"] = dict(target_se=self.spn_target_se.value() * 1e-6,
+                                max_dwell_s=self.spn_max_dwell.value())
+        if self.chk_adaptive.isChecked():
+            rec["adaptive"] = dict(coarse_step=self.spn_coarse_step.value(),
+                                   tol=self.spn_refine_tol.value() / 100)
+        # OLV 不直接 set_param (加熱功率不可跳變)，改由漸進到目標
+        level = rec["lockin"].pop("int_osc_level", None)
+        if level is not None:
+            rec["olv_ramp"] = dict(target=level, range=rec["lockin"].get("int_osc_level_range", 0))
+        return rec
+
+    def apply_recipe(self, rec: dict):
+        """配方 (已 parse_recipe) → 控件；lock-in 參數直接 set_param"""
+        self.spn_ev_start.setValue(rec["ev_start"]); self.spn_ev_end.setValue(rec["ev_end"])
+        self.spn_ev_step.setValue(abs(rec["ev_step"])); self.spn_repeat.setValue(rec["repeat"])
+        self.chk_serpentine.setChecked(rec["serpentine"]); self.spn_backlash.setValue(rec["backlash_idx"])
+        self.cmb_collapse.setCurrentIndex(max(self.cmb_collapse.findData(rec["collapse"]), 0))
+        st = rec["settle"]
+        self.spn_settle_tol.setValue(st.get("rel_tol", 0.01) * 100)
+        self.spn_settle_ntau.setValue(st.get("max_ntau") or 0.0)
+        self.chk_dwell.setChecked(bool(rec["dwell"]))
+        if rec["dwell"]:
+            self.spn_target_se.setValue(rec["dwell"]["target_se"] * 1e6)
+            self.spn_max_dwell.setValue(rec["dwell"].get("max_dwell_s", 10.0))
+        self.chk_adaptive.setChecked(bool(rec["adaptive"]))
+        if rec["adaptive"]:
+            self.spn_coarse_step.setValue(rec["adaptive"]["coarse_step"])
+            self.spn_refine_tol.setValue(rec["adaptive"].get("tol", 0.05) * 100)
+        self.chk_sweep.setChecked(False)
+        self.save_dir = rec["save_dir"]; os.makedirs(self.save_dir, exist_ok=True)
+        self.lbl_dir.setText(self.save_dir)
+        self.spn_save_every.setValue(rec["save_every"]); self.spn_keep_files.setValue(rec["keep_files"])
+        if rec["lockin"]:
+            self.lockin.set_param(**rec["lockin"])
+
+    def _make_settler(self) -> Settler:
+        ntau = self.spn_settle_ntau.value()
+        return Settler(self.lockin, rel_tol=self.spn_settle_tol.value() / 100,
+                       max_ntau=ntau or None)
+
+    def _make_dwell(self):
+        if not self.chk_dwell.isChecked():
+            return None
+        return Dwell(self.lockin, target_se=self.spn_target_se.value() * 1e-6,
+                     max_dwell_s=self.spn_max_dwell.value())
+
+    def _make_planner(self, n_points: int, step: float):
+        if not self.chk_adaptive.isChecked():
+            return None
+        every = int(round(self.spn_coarse_step.value() / step))
+        return AdaptivePlanner(n_points, every, tol=self.spn_refine_tol.value() / 100)
+
     def auto_check(self):
         if not self._check_ready():
             return
@@ -298,19 +572,32 @@ class ExperimentWidget(QtWidgets.QWidget):
         step = self.spn_ev_step.value() or 0.01
         idx0 = 0
         idx1 = int(round((ev_e - ev_s) / step))
-        self.workerAC = AutoCheckWorker(self.motor, idx0, idx1)
-        self.workerAC.progress.connect(self.prg_goto.setValue)
-        self.workerAC.finished.connect(self._ac_done)
-        self.workerAC.start()
-        
-    def _ac_done(self, msg):
+        self._lock_ctrl(True)
+        post = self.aio_bridge.post
+        self._ac_future = self.aio_bridge.run(
+            auto_check(self.amotor, idx0, idx1, lambda p: post(self.prg_goto.setValue, p),
+                       self.alockin),
+            self._ac_done)
+
+    def _ac_done(self, fut):
+        self._ac_future = None
         self._lock_ctrl(False)
         self.prg_goto.setValue(0)
+        if fut.cancelled():                 # 關窗時取消，不再跳訊息
+            return
+        msg = fut.result()
         if msg:
             QtWidgets.QMessageBox.critical(self,"Auto-Check 失敗",msg)
         else:
             QtWidgets.QMessageBox.information(self,"Auto-Check","完成")
 
+    def close_aio(self):
+        """關窗時呼叫：取消進行中的 Auto-Check，收掉 event loop 與儀器執行緒"""
+        if self._ac_future is not None:
+            self._ac_future.cancel()
+        self.aio.close()
+        self.amotor.close(); self.alockin.close()
+
     def _lock_ctrl(self, on):
         for w in self._ctrl_widgets+[self.btn_start,self.btn_resume,self.btn_autocheck]:
             w.setEnabled(not on)
@@ -319,24 +606,57 @@ class ExperimentWidget(QtWidgets.QWidget):
     # -------------------------------------------------
     # 執行緒信號
     # -------------------------------------------------
-    def on_point(self, ev, x_n, y_n, edc):
-        self.current_ev.append(ev); self.current_x.append(x_n); self.current_y.append(y_n)
-        # 傳給圖頁
-        self.live_widget.point_updated.emit(ev,x_n,y_n,edc)
+    def _drain_points(self, flush: bool = False):
+        """QTimer 定時呼叫：一次取出 worker 累積的所有點，整批交給圖頁。
+        緩衝裡可能已有下一輪開頭的點 (run_complete 還沒處理)，先留著，
+        等 on_run_complete 換線後再畫；flush=True 全部送出"""
+        worker = getattr(self, "worker", None)
+        if worker is None:
+            return
+        batch, self._held = self._held + worker.points.drain(), []
+        if not flush:
+            self._held = [b for b in batch if b[4].get("run", 0) > self._live_run]
+            batch = [b for b in batch if b[4].get("run", 0) <= self._live_run]
+        if not batch:
+            return
+        # 傳給圖頁 (一批只重畫一次)
+        t0 = time.perf_counter()
+        self.live_widget.on_points(batch)
+        gui_ms = (time.perf_counter() - t0) * 1e3 / len(batch)
+        for *_, meta in batch:
+            meta["gui_ms"] = gui_ms
+        # 寫檔都排進寫檔執行緒；磁碟跟不上時同一種 append 會合併，GUI 不阻塞
+        if self.timing_log is not None:
+            self.file_writer.call(self.timing_log.write, [m for *_, m in batch], merge=True)
+        if self.raw_writer is not None:
+            self.file_writer.call(self.raw_writer.append, batch, sync=self.raw_writer, merge=True)
 
     def on_run_complete(self, ev_arr, x_arr, y_arr):
-        # 保存本輪資料
-        self.completed_runs.append((np.asarray(ev_arr), x_arr, y_arr))
+        self._drain_points()            # 本輪剩餘的點先畫完再換線
+        # 累積本輪資料 (running mean / variance)
+        self.acc_all.push(ev_arr, x_arr, y_arr)
+        self.acc_batch.push(ev_arr, x_arr, y_arr)
         # 更新平均線
-        self.live_widget.update_average(self.completed_runs)
+        self.live_widget.update_average(self.acc_all)
         # 累積待存
-        self.pending_runs.append((ev_arr, x_arr, y_arr))
-        if len(self.pending_runs) >= self.spn_save_every.value():
-            self._save_average_file(); self.pending_runs.clear()
-        # 通知圖頁下一輪 live 線
+        if self.acc_batch.n >= self.spn_save_every.value():
+            self._save_average_file(); self.acc_batch.reset()
+        # 通知圖頁下一輪 live 線，再畫已收到的下一輪的點
         self.live_widget.start_new_run()
+        self._live_run += 1
+        self._drain_points()
 
     def on_worker_finish(self):
+        self.last_completed = self.worker.completed
+        self._drain_points(flush=True)          # 中途停止：已量到的點也留給續掃
+        if self._stopping:
+            self._stopping = False
+            self.live_widget.reset_plot()
+        self._ui_timer.stop()
+        if self.timing_log is not None:
+            self.file_writer.call(self.timing_log.close); self.timing_log = None
+        if self.raw_writer is not None:
+            self.file_writer.call(self.raw_writer.close); self.raw_writer = None
         self.btn_start.setEnabled(True); self.live_widget.btn_stop.setEnabled(False)
         self._switch_to_ctrl_and_load()
 
@@ -351,8 +671,8 @@ class ExperimentWidget(QtWidgets.QWidget):
             tab.setCurrentWidget(self)          # 切到控制分頁
 
         # ② 把最新平均畫到 ax_avg
-        if self.completed_runs:
-            ev, xs, ys = self.completed_runs[-1]
+        if self.acc_all.n:
+            ev = self.acc_all.ev; xs, ys = self.acc_all.mean
             self.ax_avg.clear()
             self.ax_avg.plot(ev, xs, "--b", label="X/EDC")
             self.ax_avg.plot(ev, ys, "--r", label="Y/EDC")
@@ -361,20 +681,17 @@ class ExperimentWidget(QtWidgets.QWidget):
             self.canvas_avg.draw_idle()
         for w in self._ctrl_widgets:
             w.setEnabled(True)
-        self.btn_resume.setEnabled(True)       # 只有暫停時才亮
+        self._refresh_resume()                 # 只有中途停止 (checkpoint 未完成) 才亮
 
 
     # -------------------------------------------------
     # 檔案 I/O
     # -------------------------------------------------
     def _save_average_file(self):
-        """把 pending_runs 求平均後寫成 .asc，並做 FIFO 刪檔"""
-        if not self.pending_runs:
+        """把 acc_batch 的平均排進寫檔執行緒 (.asc + FIFO 刪檔)"""
+        if not self.acc_batch.n:
             return
-        ev = self.pending_runs[0][0]
-        xs = np.vstack([d[1] for d in self.pending_runs])
-        ys = np.vstack([d[2] for d in self.pending_runs])
-        x_m = xs.mean(axis=0); y_m = ys.mean(axis=0)
+        x_m, y_m = self.acc_batch.mean
 
         # 批次計數器 → 檔名 = 掃描次數 .asc
         self.batch_counter += 1
@@ -383,54 +700,61 @@ class ExperimentWidget(QtWidgets.QWidget):
         fname = f"{scans_done}.asc"
         fpath = os.path.join(self.save_dir, fname)
 
-        # 二欄區塊：energy X/EDC ；空行；energy Y/EDC
-        lines = ["energy\tX/EDC\n"]
-        for e, x in zip(ev, x_m):
-            lines.append(f"{e:.6e}\t{x:.6e}\n")
-        lines.append("\n")
-        lines.append("energy\tY/EDC\n")
-        for e, y in zip(ev, y_m):
-            lines.append(f"{e:.6e}\t{y:.6e}\n")
-        with open(fpath, "w", encoding="utf-8") as f:
-            f.writelines(lines)
-        print(f"[SAVE] {fpath}")
-
-        # FIFO 刪舊檔
-        self.saved_files.append(fpath)
-        M = self.spn_keep_files.value()
-        while len(self.saved_files) > M:
-            old = self.saved_files.popleft()
-            try:
-                os.remove(old); print(f"[DEL ] {old}")
-            except FileNotFoundError:
-                pass
+        # 二欄區塊：energy X/EDC ；空行；energy Y/EDC；超過保留數由寫檔執行緒刪最舊的
+        self.file_writer.save_asc(fpath, self.acc_batch.ev, x_m, y_m,
+                                  keep=self.spn_keep_files.value())
+
+    def _on_file_saved(self, path: str):
+        print(f"[SAVE] {path}")
+        self.lbl_dir.setText(self.save_dir); self.lbl_dir.setStyleSheet("")
+
+    def _on_write_error(self, msg: str):
+        QtWidgets.QMessageBox.warning(self, "寫檔失敗", msg)
+
+    def _on_write_backpressure(self, n: int):
+        # 佇列滿 = 磁碟 (網路磁碟) 跟不上；下次寫完會恢復
+        self.lbl_dir.setText(f"{self.save_dir}  ⚠ 寫檔延遲 (佇列 {n})")
+        self.lbl_dir.setStyleSheet("color: #c00")
 
     def save_data_dialog(self):
-        """手動把目前平均寫檔 (.asc)"""
-        if not self.completed_runs:
+        """手動把目前平均寫檔 (.asc)；有原始檔時由 .trraw 匯出 (所有完整的輪)"""
+        if not self.acc_all.n:
             QtWidgets.QMessageBox.warning(self, "尚無資料", "請先完成至少一次掃描"); return
-        ev, xs, ys = self.completed_runs[-1]
         fn, _ = QFileDialog.getSaveFileName(self, "另存平均檔", "avg.asc", "ASC Files (*.asc)")
         if not fn:
             return
-        lines = ["energy\tX/EDC\n"]
-        for e, x in zip(ev, xs): lines.append(f"{e:.6e}\t{x:.6e}\n")
-        lines.append("\n")
-        lines.append("energy\tY/EDC\n")
-        for e, y in zip(ev, ys): lines.append(f"{e:.6e}\t{y:.6e}\n")
-        with open(fn, "w", encoding="utf-8") as f:
-            f.writelines(lines)
+        # 匯出排進寫檔執行緒 (排在已送出的 append 之後)；完成時 saved 訊號更新狀態列
+        x, y = self.acc_all.mean
+        self.file_writer.call(self._export_avg, fn, self.raw_path,
+                              self.acc_all.ev.copy(), x.copy(), y.copy())
+
+    def _export_avg(self, fn, raw_path, ev, x, y):
+        """寫檔執行緒：有原始檔由 .trraw 匯出 (所有完整的輪)，否則寫記憶體內平均"""
+        if raw_path and os.path.exists(raw_path):
+            try:
+                n = RawReader(raw_path).export_asc(fn)
+                print(f"[RAW ] {raw_path} → {n} runs")
+                self.writer_signals.saved.emit(fn)
+                return
+            except ValueError as e:
+                print(f"[SAVE] {raw_path}: {e}；改用記憶體內平均")
+        write_asc(fn, ev, x, y)
+        self.writer_signals.saved.emit(fn)
 
     def choose_save_dir(self):
         new_dir = QFileDialog.getExistingDirectory(self, "選擇自動存檔資料夾", self.save_dir)
         if new_dir:
             self.save_dir = new_dir; os.makedirs(self.save_dir, exist_ok=True)
             self.lbl_dir.setText(self.save_dir)
+            self._refresh_resume()
 
     def load_avg_file(self):
         fn, _ = QFileDialog.getOpenFileName(self, "選擇 .asc 平均檔", "", "ASC Files (*.asc)")
         if not fn: return
-        ev, x_avg, y_avg = self._read_avg_asc(fn)
+        try:
+            ev, x_avg, y_avg = read_asc(fn)
+        except (OSError, ValueError) as e:
+            QtWidgets.QMessageBox.warning(self, "讀檔失敗", str(e)); return
         self.ax_avg.clear()
         self.ax_avg.plot(ev, x_avg, "--b", label="X/EDC")
         self.ax_avg.plot(ev, y_avg, "--r", label="Y/EDC")
@@ -441,19 +765,6 @@ class ExperimentWidget(QtWidgets.QWidget):
         self.ax_avg.autoscale_view()  # 依界限自動縮放
         self.canvas_avg.draw_idle()
 
-    @staticmethod
-    def _read_avg_asc(fn):
-        ev=[]; x=[]; y=[]; mode=0
-        with open(fn, encoding="utf-8") as f:
-            for ln in f:
-                ln = ln.strip()
-                if not ln: continue
-                if ln.startswith("energy") and "X" in ln: mode=1; continue
-                if ln.startswith("energy") and "Y" in ln: mode=2; continue
-                e,v = map(float, ln.split())
-                if mode==1: ev.append(e); x.append(v)
-                elif mode==2: y.append(v)
-        return np.asarray(ev), np.asarray(x), np.asarray(y)
   
     @QtCore.pyqtSlot(str)
     def show_error_dialog(self, msg: str):
@@ -1,4 +1,6 @@
+import time
 import numpy as np
+from collections import deque
 from PyQt5 import QtCore, QtWidgets
 
 ##################################################
@@ -22,6 +24,10 @@ class LivePlotWidget(QtWidgets.QWidget):
 
         self.lbl_status = QtWidgets.QLabel("X=…   Y=…   EDC=…")
         self.lbl_status.setAlignment(QtCore.Qt.AlignRight)
+        self.lbl_meta = QtWidgets.QLabel("")
+        self.lbl_rate = QtWidgets.QLabel("")     # 點速率 / 預估完成時間
+        self._t_done  = deque(maxlen=32)         # 最近完成點的 t_wall
+        self._n_done  = 0
         self.run_idx   = 0      # 第幾次掃描
         self.point_idx = 0      # 目前點序
         self.total_runs = 0        # 由控制頁在 start_scan() 設定
@@ -36,6 +42,8 @@ class LivePlotWidget(QtWidgets.QWidget):
         hbox   = QtWidgets.QHBoxLayout(footer)
         hbox.setContentsMargins(4, 0, 4, 0)
         hbox.addWidget(self.lbl_status)
+        hbox.addWidget(self.lbl_meta)
+        hbox.addWidget(self.lbl_rate)
         hbox.addStretch()
         hbox.addWidget(self.btn_stop)
         footer.setFixedHeight(28)
@@ -48,11 +56,34 @@ class LivePlotWidget(QtWidgets.QWidget):
         self.line_live_y = None
         self.line_avg_x  = None
         self.line_avg_y  = None
+        self._se_bands   = []                   # 平均線 ±1 SE 帶
+
+        # live 線預先配置的緩衝 (依掃描計畫大小；不足時倍增)
+        self._ev_range = None                   # 計畫能量範圍 → 固定 x 軸
+        self._alloc(0)
+        # blit：背景 (座標軸 / 平均線) 快取，live 線 animated 疊上去
+        self._bg = None
+        self.canvas.mpl_connect("draw_event", self._on_draw)
 
         # 連接即時點訊號
         self.point_updated.connect(self.on_point)
 
     # ---------------- 繪圖 API ----------------
+    def set_plan(self, ev_arr, n_runs: int):
+        """控制頁在 start_scan() 呼叫：依計畫配置緩衝並固定 x 軸範圍"""
+        ev_arr = np.asarray(ev_arr, dtype=float)
+        self.total_runs = n_runs
+        self.total_pts = ev_arr.size
+        self._ev_range = (ev_arr.min(), ev_arr.max()) if ev_arr.size else None
+        self._alloc(ev_arr.size)
+        self._t_done.clear(); self._n_done = 0
+        self.lbl_rate.setText("")
+
+    def _alloc(self, n: int):
+        self._buf = np.empty((3, max(n, 16)))   # ev, X/EDC, Y/EDC
+        self._n = 0
+        self._sorted = True
+
     def reset_plot(self):
         """外部在每次 Start 之前呼叫，清空整張圖。"""
         self.ax.clear()
@@ -61,6 +92,8 @@ class LivePlotWidget(QtWidgets.QWidget):
         self.ax.grid(True)
         self.line_live_x = self.line_live_y = None
         self.line_avg_x  = self.line_avg_y  = None
+        self._se_bands = []
+        self._bg = None
         self.run_idx = 0
         self.point_idx = 0
         self.canvas.draw_idle()
@@ -72,45 +105,150 @@ class LivePlotWidget(QtWidgets.QWidget):
         if self.line_live_x is not None:
             self.line_live_x.remove(); self.line_live_y.remove()
 
-        # 建立新的 live 線
-        self.line_live_x, = self.ax.plot([], [], color="blue", label="X/EDC")
-        self.line_live_y, = self.ax.plot([], [], color="red",  label="Y/EDC")
+        self._n = 0
+        self._sorted = True
+
+        # 建立新的 live 線 (animated → 不進背景，由 blit 疊畫)
+        self.line_live_x, = self.ax.plot([], [], color="blue", label="X/EDC", animated=True)
+        self.line_live_y, = self.ax.plot([], [], color="red",  label="Y/EDC", animated=True)
+        if self._ev_range is not None:
+            lo, hi = self._ev_range
+            pad = (hi - lo) * 0.02 or 0.001
+            self.ax.set_xlim(lo - pad, hi + pad)
         self.ax.legend(loc="upper right")
         self.canvas.draw_idle()
 
     @QtCore.pyqtSlot(float, float, float, float)
     def on_point(self, ev, x_n, y_n, edc):
-        """即時更新目前 live 線。"""
+        """即時更新目前 live 線 (單點)。"""
+        self.on_points([(ev, x_n, y_n, edc, None)])
+
+    def on_points(self, batch):
+        """batch = [(ev, x/edc, y/edc, edc, meta), …]；寫入預配置緩衝後只重畫一次。"""
+        if not batch:
+            return
         if self.line_live_x is None:
             self.start_new_run()
-        # 更新線條資料
-        xs = np.append(self.line_live_x.get_xdata(), ev)
-        ys = np.append(self.line_live_x.get_ydata(), x_n)
-        self.line_live_x.set_data(xs, ys)
-        ys2 = np.append(self.line_live_y.get_ydata(), y_n)
-        self.line_live_y.set_data(xs, ys2)
-        # 重設座標範圍
-        self.ax.relim(); self.ax.autoscale_view()
-        # 更新右上角數值
-        self.point_idx += 1
+        first = self._n == 0
+        m = len(batch)
+        if self._n + m > self._buf.shape[1]:
+            grown = np.empty((3, max(2 * self._buf.shape[1], self._n + m)))
+            grown[:, :self._n] = self._buf[:, :self._n]
+            self._buf = grown
+        new = np.array([b[:3] for b in batch], dtype=float).T
+        self._buf[:, self._n:self._n + m] = new
+        self._n += m
+        if self._sorted and self._n > 2:         # 自適應細化：點非依序到達
+            d = np.diff(self._buf[0, :self._n])
+            self._sorted = bool(np.all(d >= 0) or np.all(d <= 0))
+        ev, xs, ys = self._buf[:, :self._n]
+        if not self._sorted:
+            o = np.argsort(ev); ev, xs, ys = ev[o], xs[o], ys[o]
+        # 線條直接指向緩衝 (view，不複製)
+        self.line_live_x.set_data(ev, xs)
+        self.line_live_y.set_data(ev, ys)
+
+        # 更新右上角數值 (顯示該批最後一點)
+        ev_l, x_n, y_n, edc, meta = batch[-1]
+        self.point_idx += m
         self.lbl_status.setText(f"Scan {self.run_idx}/{self.total_runs}  Point {self.point_idx}/{self.total_pts}   "f"X={x_n:.3e}   Y={y_n:.3e}   EDC={edc:.3e}")
-        self.canvas.draw_idle()
+        if meta:
+            self.show_meta(meta)
+        self._update_rate(batch)
+
+        # 只有資料跑出目前視窗 (或本輪第一批) 才重設座標並整張重畫
+        if first or self._leaves_view(new):
+            self._rescale()
+            self.canvas.draw_idle()
+        else:
+            self._blit()
+
+    def _leaves_view(self, new) -> bool:
+        x0, x1 = sorted(self.ax.get_xlim())
+        y0, y1 = sorted(self.ax.get_ylim())
+        yv = new[1:]
+        return bool(new[0].min() < x0 or new[0].max() > x1
+                    or np.nanmin(yv) < y0 or np.nanmax(yv) > y1)
+
+    def _rescale(self):
+        """依所有線條重設 y 軸並留 20 % 餘裕，減少之後再次重設的次數"""
+        ys = [self._buf[1:, :self._n].ravel()]
+        for ln in (self.line_avg_x, self.line_avg_y):
+            if ln is not None:
+                ys.append(np.asarray(ln.get_ydata(), dtype=float))
+        y = np.concatenate(ys)
+        y = y[np.isfinite(y)]
+        if y.size:
+            lo, hi = y.min(), y.max()
+            pad = (hi - lo) * 0.2 or abs(hi) * 0.2 or 1e-6
+            self.ax.set_ylim(lo - pad, hi + pad)
+        if self._ev_range is None and self._n:
+            ev = self._buf[0, :self._n]
+            lo, hi = ev.min(), ev.max()
+            pad = (hi - lo) * 0.1 or 0.001
+            self.ax.set_xlim(lo - pad, hi + pad)
+
+    def _on_draw(self, _event):
+        """整張重畫後：快取背景，再把 animated 的 live 線疊上"""
+        self._bg = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._draw_live()
+
+    def _blit(self):
+        if self._bg is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._bg)
+        self._draw_live()
+        self.canvas.blit(self.canvas.figure.bbox)
+
+    def _draw_live(self):
+        for ln in (self.line_live_x, self.line_live_y):
+            if ln is not None:
+                self.ax.draw_artist(ln)
+
+    def show_meta(self, meta):
+        """顯示單點附帶資訊 (settle 時間、取樣數、標準誤差)"""
+        txt = f"settle={meta['settle_s']:.3f} s"
+        if meta.get("n", 1) > 1:
+            txt += f"   n={meta['n']}   σX={meta['x_se']:.1e}   σY={meta['y_se']:.1e}"
+        self.lbl_meta.setText(txt)
+
+    def _update_rate(self, batch):
+        """最近 32 點的平均速率 → points/s 與預估完成時間"""
+        self._n_done += len(batch)
+        self._t_done.extend(b[4]["t_wall"] for b in batch if b[4] and "t_wall" in b[4])
+        if len(self._t_done) < 2:
+            return
+        span = self._t_done[-1] - self._t_done[0]
+        if span <= 0:
+            return
+        rate = (len(self._t_done) - 1) / span
+        left = max(self.total_runs * self.total_pts - self._n_done, 0) / rate
+        finish = time.strftime("%H:%M:%S", time.localtime(self._t_done[-1] + left))
+        self.lbl_rate.setText(f"{rate:.2f} pts/s   ETA {int(left) // 60}:{int(left) % 60:02d} ({finish})")
 
-    def update_average(self, runs):
-        """runs = [(ev_arr, x_arr, y_arr), …] → 畫/更新平均虛線"""
-        if not runs:
+    def update_average(self, acc):
+        """acc = RunAccumulator → 畫/更新平均虛線與 ±1 標準誤差帶"""
+        if not acc.n:
             return
-        ev_ref = runs[0][0]
-        xs = np.vstack([d[1] for d in runs])
-        ys = np.vstack([d[2] for d in runs])
-        x_avg = xs.mean(axis=0)
-        y_avg = ys.mean(axis=0)
+        ev_ref = acc.ev
+        x_avg, y_avg = acc.mean
         if self.line_avg_x is None:
             self.line_avg_x, = self.ax.plot(ev_ref, x_avg, "--", color="cyan", label="X/EDC avg")
             self.line_avg_y, = self.ax.plot(ev_ref, y_avg, "--", color="magenta", label="Y/EDC avg")
         else:
             self.line_avg_x.set_data(ev_ref, x_avg)
             self.line_avg_y.set_data(ev_ref, y_avg)
+        for band in self._se_bands:
+            band.remove()
+        self._se_bands = []
+        if acc.n >= 2:
+            x_se, y_se = acc.sem
+            self._se_bands = [
+                self.ax.fill_between(ev_ref, x_avg - x_se, x_avg + x_se, color="cyan", alpha=0.25, lw=0),
+                self.ax.fill_between(ev_ref, y_avg - y_se, y_avg + y_se, color="magenta", alpha=0.25, lw=0),
+            ]
+        self._rescale()
         self.ax.legend(loc="upper right"); self.canvas.draw_idle()
 
     def plot_avg_from_file(self, ev, x_avg, y_avg):
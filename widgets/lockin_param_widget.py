@@ -1,11 +1,14 @@
-import time
-from PyQt5 import QtWidgets
+from PyQt5 import QtCore, QtWidgets
 from drivers.lockin import LockInNF5610B, LockInBase
+from workers import OlvRampWorker
 
 ##################################################
 # 1. Lock-in 抽象層
 
 class LockInParamWidget(QtWidgets.QGroupBox):
+    ramp_started  = QtCore.pyqtSignal()
+    ramp_finished = QtCore.pyqtSignal(bool)     # True = 已到目標並套用全部參數
+
     def __init__(self, lockin: LockInBase, parent=None):
         super().__init__("Lock-in 參數設定", parent)
         self.lockin = lockin
@@ -16,6 +19,7 @@ class LockInParamWidget(QtWidgets.QGroupBox):
         sens_keys = list(nf._SENS.keys())
         tc_keys = list(nf._TIME_CONST.keys())
         fmo_keys = list(nf._FMO.keys())
+        slope_keys = list(nf._SLOPE.keys())
         ofq_keys = list(nf._OFQ_RANGE.keys())
         olv_ranges = ["0–25.5 mV", "0–255 mV", "0–2.55 V"]
 
@@ -23,6 +27,7 @@ class LockInParamWidget(QtWidgets.QGroupBox):
         self.cmb_sens = QtWidgets.QComboBox(); self.cmb_sens.addItems(sens_keys)
         self.cmb_tc = QtWidgets.QComboBox(); self.cmb_tc.addItems(tc_keys)
         self.cmb_fmode = QtWidgets.QComboBox(); self.cmb_fmode.addItems(fmo_keys)
+        self.cmb_slope = QtWidgets.QComboBox(); self.cmb_slope.addItems(slope_keys)
 
         self.spn_ofq = QtWidgets.QSpinBox()
         self.cmb_ofq_rng = QtWidgets.QComboBox(); self.cmb_ofq_rng.addItems(ofq_keys)
@@ -38,6 +43,12 @@ class LockInParamWidget(QtWidgets.QGroupBox):
         self.spn_olv.setRange(0, 255)
 
         self.chk_safe = QtWidgets.QCheckBox("啟用安全漸進 OLV")
+        self.spn_slew  = QtWidgets.QDoubleSpinBox(); self.spn_slew.setRange(0.1, 1000.0); self.spn_slew.setDecimals(1); self.spn_slew.setValue(10.0); self.spn_slew.setSuffix(" mV/s")
+        self.spn_steps = QtWidgets.QSpinBox(); self.spn_steps.setRange(1, 1000); self.spn_steps.setValue(10)
+        self.prg_ramp  = QtWidgets.QProgressBar(); self.prg_ramp.setRange(0, 100); self.prg_ramp.setValue(0)
+        self.btn_cancel = QtWidgets.QPushButton("取消漸進"); self.btn_cancel.setEnabled(False)
+        ramp_l = QtWidgets.QHBoxLayout(); ramp_l.addWidget(self.spn_slew); ramp_l.addWidget(self.spn_steps); ramp_l.addWidget(self.prg_ramp); ramp_l.addWidget(self.btn_cancel)
+        ramp_w = QtWidgets.QWidget(); ramp_w.setLayout(ramp_l)
 
         self.btn_apply = QtWidgets.QPushButton("套用參數")
 
@@ -46,6 +57,7 @@ class LockInParamWidget(QtWidgets.QGroupBox):
         self.cmb_sens  .setCurrentIndex(10)   # 10 mV
         self.cmb_tc    .setCurrentIndex(6)   # 1 s
         self.cmb_fmode .setCurrentIndex(5)  # Normal Q30
+        self.cmb_slope .setCurrentIndex(1)  # 12 dB/oct
         self.spn_ofq .setValue(40); self.cmb_ofq_rng.setCurrentIndex(0)
         self.spn_olv .setValue(0); self.cmb_olv_rng.setCurrentIndex(2)
         self.chk_safe.setChecked(True)
@@ -54,12 +66,16 @@ class LockInParamWidget(QtWidgets.QGroupBox):
         form.addRow("Sensitivity", self.cmb_sens)
         form.addRow("Time Constant", self.cmb_tc)
         form.addRow("Filter Mode", self.cmb_fmode)
+        form.addRow("TC Slope (面板)", self.cmb_slope)
         form.addRow("INT OSC Freq / Range", ofq_w)
         form.addRow("INT OSC Level / Range", olv_w)
         form.addRow(self.chk_safe)
+        form.addRow("漸進速率 / 步數", ramp_w)
         form.addRow(self.btn_apply)
 
         self.btn_apply.clicked.connect(self._apply)
+        self.btn_cancel.clicked.connect(self.cancel_ramp)
+        self._ramp = None
         for w in [self.cmb_ref, self.cmb_sens, self.cmb_tc, self.cmb_fmode,
                   self.spn_ofq, self.cmb_ofq_rng,
                   self.spn_olv, self.cmb_olv_rng]:
@@ -97,6 +113,7 @@ class LockInParamWidget(QtWidgets.QGroupBox):
             sensitivity=self.cmb_sens.currentText(),
             time_const=self.cmb_tc.currentText(),
             filter_mode=self.cmb_fmode.currentText(),
+            filter_slope=self.cmb_slope.currentText(),
             int_osc_freq=self.spn_ofq.value(),
             int_osc_range=self.cmb_ofq_rng.currentIndex(),
             int_osc_level_range=self.cmb_olv_rng.currentIndex(),
@@ -105,18 +122,45 @@ class LockInParamWidget(QtWidgets.QGroupBox):
         params["int_osc_level"] = target
 
         safe = self.chk_safe.isChecked()
-
+        rng = params["int_osc_level_range"]
+        state = self.lockin.state
+        start = state.get("int_osc_level")                  # None = 尚未設定過，位準未知
+        start_rng = state.get("int_osc_level_range", rng)
+
+        if safe and start is not None and (start, start_rng) != (target, rng):
+            # OLV 於背景漸進 (range 不同時在兩邊都能表示的位準換檔)，到目標後才套用其餘參數
+            self.start_ramp(start, target, rng, final_params=params, start_rng=start_rng)
+            return
         try:
-            if safe and hasattr(self, "_olv_last"):
-                start = self._olv_last
-                for i in range(1, 11):
-                    v = round(start + (target - start) * i / 10)
-                    self.lockin.set_param(int_osc_level=v, int_osc_level_range=params["int_osc_level_range"])
-                    QtWidgets.QApplication.processEvents()
-                    time.sleep(1)
-                self.lockin.set_param(**params)
-            else:
-                self.lockin.set_param(**params)
-            self._olv_last = target
+            self.lockin.set_param(**params)
         except Exception as e:
             QtWidgets.QMessageBox.warning(self, "Set-param Error", str(e))
+
+    # ---------------- OLV 漸進 ----------------
+    def is_ramping(self) -> bool:
+        return self._ramp is not None and self._ramp.isRunning()
+
+    def start_ramp(self, start: int, target: int, rng: int, final_params: dict = None,
+                   start_rng: int = None):
+        """背景漸進；GUI 不凍結，可取消。掃描排程也可直接呼叫。
+        start_rng：start 所在的 range (None = 與 rng 相同)"""
+        if self.is_ramping():
+            return
+        self._ramp = OlvRampWorker(self.lockin, start, target, rng, self.spn_slew.value(),
+                                   self.spn_steps.value(), final_params, self, start_rng)
+        self._ramp.progress.connect(self.prg_ramp.setValue)
+        self._ramp.finished.connect(self._on_ramp_done)
+        self.btn_apply.setEnabled(False); self.btn_cancel.setEnabled(True)
+        self.prg_ramp.setValue(0)
+        self._ramp.start()
+        self.ramp_started.emit()
+
+    def cancel_ramp(self):
+        if self.is_ramping():
+            self._ramp.requestInterruption()
+
+    def _on_ramp_done(self, msg: str):
+        self.btn_apply.setEnabled(True); self.btn_cancel.setEnabled(False)
+        if msg and msg != "中斷":
+            QtWidgets.QMessageBox.warning(self, "Set-param Error", msg)
+        self.ramp_finished.emit(not msg)
@@ -0,0 +1,199 @@
+# queue_widget.py
+# ---------------------------------------------------------------------------
+#  排程頁：配方清單依序交給控制頁執行
+#  ----------------------------------
+#  · 每份配方：apply_recipe() 設好控件 → (需要時) Lock-in 頁漸進 OLV →
+#    start_scan()；掃描結束 (scan_finished) 依 last_completed 記錄
+#    done / aborted 後接著下一份。即時圖、自動存檔、計時 CSV 都沿用控制頁。
+#  · 排程狀態存在 scan_queue.json (與 scan_cli --queue 同格式)，
+#    重開程式後按「開始排程」從未完成的那份繼續：save_dir 的 checkpoint
+#    與配方相符就交給控制頁 resume_scan() 接著量 (同 run_queue)，否則重新開始。
+# ---------------------------------------------------------------------------
+
+import json
+import time
+from PyQt5 import QtCore, QtWidgets
+from models.recipe import parse_recipe
+from models.scan_queue import ScanQueue, estimate_s, matching_checkpoint
+
+
+class QueueWidget(QtWidgets.QWidget):
+    COLS = ("名稱", "能量範圍 (eV)", "步距", "輪數", "預估", "狀態")
+
+    def __init__(self, ctrl, param_widget, mapper, motor, path="scan_queue.json", parent=None):
+        super().__init__(parent)
+        self.ctrl = ctrl                  # ExperimentWidget
+        self.param = param_widget         # LockInParamWidget (OLV 漸進)
+        self.mapper = mapper
+        self.motor = motor
+        self.queue = ScanQueue(path)
+        self._running = False             # 排程執行中
+        self._cur = None                  # 目前配方 id
+
+        self.tbl = QtWidgets.QTableWidget(0, len(self.COLS))
+        self.tbl.setHorizontalHeaderLabels(self.COLS)
+        self.tbl.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.tbl.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.tbl.horizontalHeader().setStretchLastSection(True)
+
+        self.btn_add    = QtWidgets.QPushButton("加入目前設定")
+        self.btn_load   = QtWidgets.QPushButton("載入配方…")
+        self.btn_del    = QtWidgets.QPushButton("刪除")
+        self.btn_up     = QtWidgets.QPushButton("上移")
+        self.btn_down   = QtWidgets.QPushButton("下移")
+        self.btn_requeue = QtWidgets.QPushButton("重新排入")
+        self.btn_start  = QtWidgets.QPushButton("開始排程")
+        self.btn_stop   = QtWidgets.QPushButton("停止排程"); self.btn_stop.setEnabled(False)
+        self.lbl_eta    = QtWidgets.QLabel("")
+
+        row = QtWidgets.QHBoxLayout()
+        for b in (self.btn_add, self.btn_load, self.btn_del, self.btn_up, self.btn_down,
+                  self.btn_requeue):
+            row.addWidget(b)
+        row.addStretch()
+        row2 = QtWidgets.QHBoxLayout()
+        row2.addWidget(self.lbl_eta); row2.addStretch()
+        row2.addWidget(self.btn_start); row2.addWidget(self.btn_stop)
+        vbox = QtWidgets.QVBoxLayout(self)
+        vbox.addLayout(row); vbox.addWidget(self.tbl); vbox.addLayout(row2)
+
+        self.btn_add.clicked.connect(self.add_current)
+        self.btn_load.clicked.connect(self.load_recipe_file)
+        self.btn_del.clicked.connect(lambda: self._on_selected(self.queue.remove))
+        self.btn_up.clicked.connect(lambda: self._on_selected(lambda i: self.queue.move(i, -1)))
+        self.btn_down.clicked.connect(lambda: self._on_selected(lambda i: self.queue.move(i, +1)))
+        self.btn_requeue.clicked.connect(lambda: self._on_selected(self.queue.requeue))
+        self.btn_start.clicked.connect(self.start_queue)
+        self.btn_stop.clicked.connect(self.stop_queue)
+        self.ctrl.scan_finished.connect(self._on_scan_finished)
+        self.param.ramp_finished.connect(self._on_ramp_finished)
+        self.refresh()
+
+    # ---------------- 清單 ----------------
+    def refresh(self):
+        self.tbl.setRowCount(len(self.queue.entries))
+        kw = dict(pulse_time=self.motor.PULSE_TIME, pulse_per_idx=self.motor.PULSE_PER_IDX)
+        for r, e in enumerate(self.queue.entries):
+            try:
+                rec = parse_recipe(e["recipe"])
+                est = self._fmt(estimate_s(rec, self.mapper, **kw))
+                rng = f"{rec['ev_start']:.3f} – {rec['ev_end']:.3f}"
+                step, rep = f"{abs(rec['ev_step']):.4f}", str(rec["repeat"])
+            except (ValueError, KeyError) as ex:
+                est, rng, step, rep = "—", str(ex), "", ""
+            status = e["status"] + (f" ({e['message']})" if e["message"] else "")
+            for c, txt in enumerate((e["name"], rng, step, rep, est, status)):
+                item = QtWidgets.QTableWidgetItem(txt)
+                item.setData(QtCore.Qt.UserRole, e["id"])
+                self.tbl.setItem(r, c, item)
+        try:
+            total = self.queue.estimate_pending(self.mapper, from_idx=self.motor.position, **kw)
+            done_at = time.strftime("%m/%d %H:%M", time.localtime(time.time() + total))
+            self.lbl_eta.setText(f"未完成配方預估 {self._fmt(total)} (約 {done_at} 完成)")
+        except ValueError as ex:          # 尚未載入校正
+            self.lbl_eta.setText(str(ex))
+
+    @staticmethod
+    def _fmt(s: float) -> str:
+        return f"{int(s) // 3600}:{int(s) % 3600 // 60:02d}:{int(s) % 60:02d}"
+
+    def _on_selected(self, fn):
+        row = self.tbl.currentRow()
+        if row < 0:
+            return
+        eid = self.tbl.item(row, 0).data(QtCore.Qt.UserRole)
+        if self._running and eid == self._cur:
+            return                        # 執行中的那份不可動
+        fn(eid)
+        self.refresh()
+
+    def add_current(self):
+        name, ok = QtWidgets.QInputDialog.getText(self, "加入排程", "名稱 (可留白)：")
+        if ok:
+            self.queue.add(self.ctrl.current_recipe(), name or None)
+            self.refresh()
+
+    def load_recipe_file(self):
+        fn, _ = QtWidgets.QFileDialog.getOpenFileName(self, "載入配方", "", "Recipe (*.json)")
+        if not fn:
+            return
+        try:
+            with open(fn, encoding="utf-8") as f:
+                self.queue.add(json.load(f))
+        except (OSError, ValueError) as e:
+            QtWidgets.QMessageBox.warning(self, "配方錯誤", str(e))
+        self.refresh()
+
+    # ---------------- 執行 ----------------
+    def start_queue(self):
+        if self.queue.next_pending() is None or not self.ctrl._check_ready():
+            return
+        self._running = True
+        self.btn_start.setEnabled(False); self.btn_stop.setEnabled(True)
+        self._next()
+
+    def stop_queue(self):
+        """目前這份停在原處 (aborted)，之後不再開始新的"""
+        self._running = False
+        self.btn_stop.setEnabled(False)
+        if self._cur is not None:
+            self.ctrl.stop_scan()
+        else:
+            self.btn_start.setEnabled(True)
+
+    def _next(self):
+        e = self.queue.next_pending() if self._running else None
+        if e is None:
+            self._running = False
+            self.btn_start.setEnabled(True); self.btn_stop.setEnabled(False)
+            self.refresh()
+            return
+        self._cur = e["id"]
+        resume = e.get("resume", False)   # mark() 會清掉
+        self.queue.mark(self._cur, "running")
+        self.refresh()
+        try:
+            rec = parse_recipe(e["recipe"])
+            self.ctrl.apply_recipe(rec)
+            ck = matching_checkpoint(rec) if resume else None
+        except Exception as ex:  # noqa: broad-except
+            self._finish("failed", str(ex))
+            return
+        if ck is not None:
+            self.ctrl.resume_scan()       # 上次中斷在這份：接著量 (OLV 漸進由控制頁處理)
+            if not self.ctrl.is_scanning() and not self.param.is_ramping():
+                self._finish("failed", "無法續掃")
+            return
+        ramp = rec["olv_ramp"]
+        if ramp:
+            st = self.ctrl.lockin.state
+            start = st.get("int_osc_level", ramp.get("from", 0))
+            start_rng = st.get("int_osc_level_range", ramp["range"]) if "int_osc_level" in st \
+                else ramp["range"]
+            if (start, start_rng) != (ramp["target"], ramp["range"]):
+                self.param.spn_slew.setValue(ramp.get("slew_mv_s", 10.0))
+                self.param.spn_steps.setValue(ramp.get("steps", 10))
+                self.param.start_ramp(start, ramp["target"], ramp["range"], start_rng=start_rng)
+        self.ctrl.start_scan(confirm=False)   # 漸進中 → 控制頁等漸進完成才開始
+        if not self.ctrl.is_scanning() and not self.param.is_ramping():
+            self._finish("failed", "無法開始掃描")
+
+    def _on_scan_finished(self):
+        if self._cur is None:
+            return                        # 手動掃描
+        if self.ctrl.last_completed:
+            self._finish("done")
+        else:
+            self._finish("aborted")
+            self._running = False         # 使用者中止 / 錯誤 → 排程暫停
+
+    def _on_ramp_finished(self, ok: bool):
+        # 漸進被取消 / 失敗 → 控制頁不會開始掃描，這份記為失敗
+        if self._cur is not None and not ok and not self.ctrl.is_scanning():
+            self._finish("failed", "OLV 漸進未完成")
+            self._running = False
+
+    def _finish(self, status: str, msg: str = ""):
+        self.queue.mark(self._cur, status, msg)
+        self._cur = None
+        QtCore.QTimer.singleShot(0, self._next)
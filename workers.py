@@ -1,79 +1,202 @@
 import numpy as np
 import time
 from PyQt5 import QtCore
+from models.acquire import Settler, Dwell
+from models.engine import ScanEngine, ScanPlan, ScanSink
+from models.planner import AdaptivePlanner
+from models.sweep import sweep
+from models.stream import PointBuffer
+from models.ramp import ramp_olv
+from models.persist import FileWriter
+from models.catalog import Catalog
+from drivers.aio import poll_during
+
+class WriterSignals(QtCore.QObject):
+    """FileWriter 的 callback → Qt 訊號 (寫檔執行緒 emit，GUI 執行緒排隊接收)"""
+    saved = QtCore.pyqtSignal(str)
+    deleted = QtCore.pyqtSignal(str)
+    error = QtCore.pyqtSignal(str)
+    backpressure = QtCore.pyqtSignal(int)           # 佇列已滿時的長度
+
+    def make_writer(self, maxsize: int = 32) -> FileWriter:
+        return FileWriter(maxsize, on_saved=self.saved.emit, on_deleted=self.deleted.emit,
+                          on_error=self.error.emit, on_backpressure=self.backpressure.emit)
+
+class _WorkerSink(ScanSink):
+    """ScanEngine → QThread：點進 PointBuffer，整輪發 run_complete，錯誤跳對話框"""
+
+    def __init__(self, worker) -> None:
+        self.w = worker
+
+    def on_point(self, item) -> None:
+        self.w.points.push(item)
+
+    def on_run(self, ev_arr, x_arr, y_arr) -> None:
+        self.w.run_complete.emit(ev_arr, x_arr, y_arr)
+
+    def on_error(self, msg: str) -> None:
+        if self.w.ui is None:
+            print(f"[scan] {msg}")
+            return
+        QtCore.QMetaObject.invokeMethod(
+            self.w.ui,
+            "show_error_dialog",
+            QtCore.Qt.QueuedConnection,
+            QtCore.Q_ARG(str, msg),
+        )
 
 class ScanWorker(QtCore.QThread):
+    """models.engine.ScanEngine 的 QThread 包裝；點資料 push 進 self.points
+    (PointBuffer) 由 GUI 定時批次取出，meta = {"ev", "settle_s", "n", "x_se",
+    "y_se", …} 加上計時欄位 (models.telemetry.TIMING_FIELDS)"""
 
-    point_ready = QtCore.pyqtSignal(float, float, float, float)   # ev, x/edc, y/edc, edc
     run_complete = QtCore.pyqtSignal(object, object, object)      # ev_arr, x_arr, y_arr
 
-    def __init__(self, lockin, motor, idx_arr, ev_arr, repeat: int, ui_widget):
+    def __init__(self, lockin, motor, idx_arr, ev_arr, repeat: int, ui_widget,
+                 settler: Settler = None, serpentine: bool = False,
+                 dwell: Dwell = None, planner: AdaptivePlanner = None, weight=None,
+                 start_run: int = 0, done: dict = None):
         super().__init__()
         self.lockin = lockin
         self.motor = motor
+        self.plan = ScanPlan(ev_arr, idx_arr, repeat, serpentine, weight)
+        self.ui = ui_widget
+        self.points = PointBuffer()
+        self.settler = settler or Settler(lockin)
+        self.dwell = dwell             # None = 每點單次讀值
+        self.planner = planner         # None = 均勻網格；否則第 1 輪自適應細化
+        self.completed = False         # 全部輪數跑完 (非中斷 / 錯誤)
+        self.start_run, self.done = start_run, done     # 續掃 (見 ScanEngine)
+        self.sinks = []                # 額外的 ScanSink (checkpoint…)，於 worker 執行緒呼叫
+
+    def run(self) -> None:
+        self.completed = ScanEngine(self.lockin, self.motor, self.plan, self.settler, self.dwell,
+                                    self.planner, sinks=[*self.sinks, _WorkerSink(self)],
+                                    stop=self.isInterruptionRequested,
+                                    start_run=self.start_run, done=self.done).run()
+
+class SweepWorker(QtCore.QThread):
+    """連續掃描：馬達等速走完全程，邊走邊取樣，事後依時間重建能量再分 bin。
+    介面與 ScanWorker 相同 (points / run_complete)，控制頁可直接沿用。"""
+
+    run_complete = QtCore.pyqtSignal(object, object, object)      # ev_arr, x_arr, y_arr
+
+    def __init__(self, lockin, motor, mapper, idx_arr, ev_arr, repeat: int, ui_widget,
+                 cadence_s: float = 0.01):
+        super().__init__()
+        self.lockin = lockin
+        self.motor = motor
+        self.mapper = mapper
         self.idx_arr = idx_arr
-        self.ev_arr = ev_arr
+        self.ev_arr = np.asarray(ev_arr)
         self.repeat = repeat
         self.ui = ui_widget
+        self.points = PointBuffer()
+        self.cadence_s = cadence_s
+        self.completed = False
 
     def run(self) -> None:
-        for _ in range(self.repeat):
+        ends = (self.idx_arr[0], self.idx_arr[-1])
+        for run in range(self.repeat):
             if self.isInterruptionRequested():
                 return
-            xs, ys = [], []
-            for idx, ev in zip(self.idx_arr, self.ev_arr):
-                self.motor.goto(idx)
-                if self.isInterruptionRequested():
-                    return
-                time.sleep(0.05)                     # lock-in settle
-                x, y, edc = self.lockin.read_xyz()
-                if edc == 0:
-                    QtCore.QMetaObject.invokeMethod(
-                        self.ui,
-                        "show_error_dialog",
-                        QtCore.Qt.QueuedConnection,
-                        QtCore.Q_ARG(str, f"{ev:.3f} eV: EDC = 0; aborted"),
-                    )
-                    return
-                xs.append(x / edc)
-                ys.append(y / edc)
-                self.point_ready.emit(ev, xs[-1], ys[-1], edc)
-            self.run_complete.emit(self.ev_arr.copy(), np.asarray(xs), np.asarray(ys))
-            
-class AutoCheckWorker(QtCore.QThread):
+            idx0, idx1 = ends if run % 2 == 0 else ends[::-1]   # 來回走，省回程
+            try:
+                res = sweep(self.motor, self.lockin, self.mapper, idx0, idx1, self.ev_arr,
+                            self.cadence_s, stop=self.isInterruptionRequested)
+            except Exception as e:  # noqa: broad-except
+                QtCore.QMetaObject.invokeMethod(
+                    self.ui,
+                    "show_error_dialog",
+                    QtCore.Qt.QueuedConnection,
+                    QtCore.Q_ARG(str, f"Sweep aborted: {e}"),
+                )
+                return
+            if res is None:
+                return
+            order = range(len(self.ev_arr)) if run % 2 == 0 else reversed(range(len(self.ev_arr)))
+            for k in order:
+                ev = float(self.ev_arr[k])
+                self.points.push((ev, res["x"][k], res["y"][k], res["edc"][k],
+                                  {"ev": ev, "settle_s": 0.0, "n": int(res["counts"][k]),
+                                   "x_se": float("nan"), "y_se": float("nan"),
+                                   "run": run, "t_wall": time.time()}))
+            self.run_complete.emit(self.ev_arr.copy(), res["x"], res["y"])
+        self.completed = True
+
+async def auto_check(amotor, idx0: int, idx1: int, progress=lambda pct: None,
+                     alockin=None, poll_s: float = 0.2) -> str:
+    """Auto-Check (drivers.aio 協程)：依序走過 idx0…idx1；alockin 不為 None 時
+    移動期間同時輪詢 lock-in (兩台儀器各自的執行緒，互不等待)，走完若有 EDC = 0
+    回報。progress 在 event loop 執行緒呼叫。回傳 "" = OK；其他 = 錯誤訊息"""
+    async def walk():
+        step = 1 if idx1 >= idx0 else -1
+        total = abs(idx1 - idx0) + 1
+        for i, idx in enumerate(range(idx0, idx1 + step, step), 1):
+            await amotor.goto(idx)
+            progress(int(i / total * 100))
+
+    try:
+        if alockin is None:
+            await walk()
+            return ""
+        _, samples = await poll_during(walk(), alockin.read_xyz, poll_s)
+    except Exception as e:  # noqa: broad-except
+        return str(e)
+    dark = sum(1 for _, (_, _, edc) in samples if edc == 0)
+    return f"移動中 {dark}/{len(samples)} 次讀到 EDC = 0" if dark else ""
+
+class OlvRampWorker(QtCore.QThread):
+    """背景漸進 OLV；完成後套用其餘參數 (final_params)"""
     progress = QtCore.pyqtSignal(int)
-    finished = QtCore.pyqtSignal(str)  # "" = OK; 其他 = 錯誤訊息
+    finished = QtCore.pyqtSignal(str)  # "" = OK；"中斷"；其他 = 錯誤訊息
 
-    def __init__(self, motor, idx0: int, idx1: int):
-        super().__init__()
-        self.motor = motor
-        self.idx0 = idx0
-        self.idx1 = idx1
+    def __init__(self, lockin, start: int, target: int, rng: int,
+                 slew_mv_s: float, steps: int, final_params: dict = None, parent=None,
+                 start_rng: int = None):
+        super().__init__(parent)
+        self.lockin = lockin
+        self.start_lv, self.target, self.rng = start, target, rng
+        self.start_rng = start_rng          # start 所在的 range (None = 同 rng)
+        self.slew_mv_s, self.steps = slew_mv_s, steps
+        self.final_params = final_params or {}
 
     def run(self) -> None:
-        step = 1 if self.idx1 >= self.idx0 else -1
-        total = abs(self.idx1 - self.idx0) + 1
-        for i, idx in enumerate(range(self.idx0, self.idx1 + step, step), 1):
-            if self.isInterruptionRequested():
+        try:
+            done = ramp_olv(self.lockin, self.start_lv, self.target, self.rng,
+                            self.slew_mv_s, self.steps, stop=self.isInterruptionRequested,
+                            progress=lambda f: self.progress.emit(int(f * 100)),
+                            start_rng=self.start_rng)
+            if not done:
                 self.finished.emit("中斷")
                 return
-            try:
-                self.motor.goto(idx)
-            except Exception as e:
-                self.finished.emit(str(e))
-                return
-            self.progress.emit(int(i / total * 100))
-            time.sleep(0.02)
+            if self.final_params:
+                self.lockin.set_param(**self.final_params)
+        except Exception as e:  # noqa: broad-except
+            self.finished.emit(str(e))
+            return
         self.finished.emit("")
-        
-class MotorMoveWorker(QtCore.QThread):
-    finished = QtCore.pyqtSignal(int)      # 把真正位置回傳給 GUI
-    def __init__(self, motor, idx, parent=None):
-        super().__init__(parent)
-        self.motor = motor
-        self.idx = idx
 
-    def run(self):
-        self.motor.goto(self.idx)
-        self.finished.emit(self.idx)
+class CatalogRefreshWorker(QtCore.QThread):
+    """背景重新索引 .asc 目錄 (sqlite 連線不能跨執行緒，這裡自己開一個)"""
+    finished = QtCore.pyqtSignal(str)  # "" = OK；其他 = 錯誤訊息
 
+    def __init__(self, path: str, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.counts = (0, 0, 0)         # (新增 / 更新, 未變, 刪除)
+        self.elapsed = 0.0
+
+    def run(self) -> None:
+        t0 = time.perf_counter()
+        try:
+            cat = Catalog(self.path)
+            try:
+                self.counts = cat.refresh()
+            finally:
+                cat.close()
+        except Exception as e:  # noqa: broad-except
+            self.finished.emit(str(e))
+            return
+        self.elapsed = time.perf_counter() - t0
+        self.finished.emit("")